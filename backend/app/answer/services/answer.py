@@ -18,13 +18,13 @@ class AnswerService:
         question_id: int,
         schema: CreateAnswerSchema,
     ) -> Answer:
-        await self.question_serv.get_question(quiz_id, question_id)
+        await self.question_serv.get_question(quiz_id, question_id, profile="bare")
 
         answer = Answer(
             description=schema.description,
             is_correct=schema.is_correct,
         )
-        return self.repo.create(answer)
+        return await self.repo.create(answer)
 
     async def delete_answer(
         self,
@@ -32,13 +32,13 @@ class AnswerService:
         question_id: int,
         answer_id: int,
     ) -> None:
-        await self.question_serv.get_question(quiz_id, question_id)
+        await self.question_serv.get_question(quiz_id, question_id, profile="bare")
 
-        answer = self.repo.get_by_id(answer_id)
+        answer = await self.repo.get_by_id(answer_id)
         if not answer:
             raise AnswerNotFoundException
 
-        self.repo.delete(answer)
+        await self.repo.delete(answer)
 
     async def update_answer(
         self,
@@ -47,9 +47,9 @@ class AnswerService:
         answer_id: int,
         schema: UpdateAnswerSchema,
     ) -> Answer:
-        await self.question_serv.get_question(quiz_id, question_id)
+        await self.question_serv.get_question(quiz_id, question_id, profile="bare")
 
-        answer = self.repo.get_by_id(answer_id)
+        answer = await self.repo.get_by_id(answer_id)
         if not answer:
             raise AnswerNotFoundException
 
@@ -58,8 +58,8 @@ class AnswerService:
             "description": schema.description,
         }
 
-        self.repo.update_by_id(answer_id, params)
-        return self.repo.get_by_id(answer_id)
+        await self.repo.update_by_id(answer_id, params)
+        return await self.repo.get_by_id(answer_id)
 
     async def get_answer(
         self,
@@ -67,9 +67,9 @@ class AnswerService:
         question_id: int,
         answer_id: int,
     ) -> Answer:
-        await self.question_serv.get_question(quiz_id, question_id)
+        await self.question_serv.get_question(quiz_id, question_id, profile="bare")
 
-        answer = self.repo.get_by_id(answer_id)
+        answer = await self.repo.get_by_id(answer_id)
         if not answer:
             raise AnswerNotFoundException
 
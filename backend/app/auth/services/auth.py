@@ -1,5 +1,7 @@
 ""
 
+from starlette.concurrency import run_in_threadpool
+
 from app.auth.schemas.jwt import RefreshTokenSchema, TokensSchema
 from app.auth.schemas.auth import LoginSchema
 from app.auth.services.jwt import JwtService
@@ -54,7 +56,7 @@ class AuthService:
         user = await self.user_serv.get_by_username(schema.username)
         if not user:
             raise BadCredentialsException()
-        if not verify_password(schema.password, user.password):
+        if not await run_in_threadpool(verify_password, schema.password, user.password):
             raise BadCredentialsException()
         
         user_id = encode(user.id)
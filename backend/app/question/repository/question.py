@@ -1,8 +1,14 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from core.db.models import Question
 from core.repository.base import BaseRepository
 
 
 class QuestionRepository(BaseRepository):
-    def __init__(self, session: Session):
+    loader_profiles = {
+        "bare": (),
+        "answers": ((Question.answers,),),
+    }
+    default_profile = "answers"
+
+    def __init__(self, session: AsyncSession):
         super().__init__(Question, session)
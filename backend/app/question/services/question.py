@@ -15,26 +15,26 @@ class QuestionService:
         quiz_id: int,
         schema: CreateQuestionSchema,
     ) -> Question:
-        await self.quiz_serv.get_quiz(quiz_id)
+        await self.quiz_serv.get_quiz(quiz_id, profile="bare")
 
         question = Question(
             name=schema.name,
             description=schema.description,
         )
-        return self.repo.create(question)
+        return await self.repo.create(question)
 
     async def delete_question(
         self,
         quiz_id: int,
         question_id: int,
     ) -> None:
-        await self.quiz_serv.get_quiz(quiz_id)
+        await self.quiz_serv.get_quiz(quiz_id, profile="bare")
 
-        question = self.repo.get_by_id(question_id)
+        question = await self.repo.get_by_id(question_id, profile="bare")
         if not question:
             raise QuestionNotFoundException
 
-        self.repo.delete(question)
+        await self.repo.delete(question)
 
     async def update_question(
         self,
@@ -42,9 +42,9 @@ class QuestionService:
         question_id: int,
         schema: UpdateQuestionSchema,
     ) -> Question:
-        await self.quiz_serv.get_quiz(quiz_id)
+        await self.quiz_serv.get_quiz(quiz_id, profile="bare")
 
-        question = self.repo.get_by_id(question_id)
+        question = await self.repo.get_by_id(question_id, profile="bare")
         if not question:
             raise QuestionNotFoundException
 
@@ -54,17 +54,18 @@ class QuestionService:
             "time_limit": schema.time_limit,
         }
 
-        self.repo.update_by_id(question_id, params)
-        return self.repo.get_by_id(question_id)
+        await self.repo.update_by_id(question_id, params)
+        return await self.repo.get_by_id(question_id)
 
     async def get_question(
         self,
         quiz_id: int,
         question_id: int,
+        profile: str | None = None,
     ) -> Question:
-        await self.quiz_serv.get_quiz(quiz_id)
+        await self.quiz_serv.get_quiz(quiz_id, profile="bare")
 
-        question = self.repo.get_by_id(question_id)
+        question = await self.repo.get_by_id(question_id, profile)
         if not question:
             raise QuestionNotFoundException
 
@@ -74,6 +75,6 @@ class QuestionService:
         self,
         quiz_id: int,
     ) -> list[Question]:
-        quiz = await self.quiz_serv.get_quiz(quiz_id)
+        quiz = await self.quiz_serv.get_quiz(quiz_id, profile="questions")
 
         return quiz.questions
@@ -11,3 +11,51 @@ class QuizNotFoundException(CustomException):
     status_code = 404
     error_code = "QUIZ__NOT_FOUND"
     message = "quiz not found"
+
+
+class NotSessionHostException(CustomException):
+    status_code = 403
+    error_code = "QUIZ__NOT_SESSION_HOST"
+    message = "only the host of the session can do this"
+
+
+class SessionNotStartedException(CustomException):
+    status_code = 409
+    error_code = "QUIZ__SESSION_NOT_STARTED"
+    message = "the session has not started yet"
+
+
+class QuestionInProgressException(CustomException):
+    status_code = 409
+    error_code = "QUIZ__QUESTION_IN_PROGRESS"
+    message = "a question is still in progress"
+
+
+class QuestionNotActiveException(CustomException):
+    status_code = 409
+    error_code = "QUIZ__QUESTION_NOT_ACTIVE"
+    message = "there is no question to vote on"
+
+
+class NoQuestionsLeftException(CustomException):
+    status_code = 409
+    error_code = "QUIZ__NO_QUESTIONS_LEFT"
+    message = "all questions have been asked"
+
+
+class InvalidAnswerException(CustomException):
+    status_code = 400
+    error_code = "QUIZ__INVALID_ANSWER"
+    message = "answer does not exist on this question"
+
+
+class AlreadyVotedException(CustomException):
+    status_code = 409
+    error_code = "QUIZ__ALREADY_VOTED"
+    message = "you have already voted on this question"
+
+
+class HostCannotVoteException(CustomException):
+    status_code = 403
+    error_code = "QUIZ__HOST_CANNOT_VOTE"
+    message = "the host of a session cannot vote"
@@ -1,15 +1,22 @@
 from sqlalchemy import select
-from sqlalchemy.orm import Session
-from core.db.models import Quiz
+from sqlalchemy.ext.asyncio import AsyncSession
+from core.db.models import Question, Quiz
 from core.repository.base import BaseRepository
 
 
 class QuizRepository(BaseRepository):
-    def __init__(self, session: Session):
+    loader_profiles = {
+        "bare": (),
+        "questions": ((Quiz.questions, Question.answers),),
+        "full": ((Quiz.creator,), (Quiz.questions, Question.answers)),
+    }
+    default_profile = "full"
+
+    def __init__(self, session: AsyncSession):
         super().__init__(Quiz, session)
 
-    def get_by_name(self, name: str):
+    async def get_by_name(self, name: str, profile: str | None = None):
         query = select(self.model).where(self.model.name==name)
-        query = self.query_options(query)
-        result = self.session.execute(query)
+        query = self.query_options(query, profile)
+        result = await self.session.execute(query)
         return result.scalars().first()
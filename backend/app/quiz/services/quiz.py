@@ -13,7 +13,7 @@ class QuizService:
         schema: UploadQuizSchema,
         current_user: int,
     ) -> Quiz:
-        quiz = self.repo.get_by_name(schema.name)
+        quiz = await self.repo.get_by_name(schema.name, profile="bare")
 
         if quiz and quiz.id != schema.id:
             raise DuplicateNameException
@@ -42,21 +42,17 @@ class QuizService:
 
             quiz.questions.append(new_question)
 
-        self.repo.session.add(quiz)
-        self.repo.session.commit()
-        self.repo.session.refresh(quiz)
-
-        return quiz
+        return await self.repo.create(quiz)
 
     async def get_by_name(self, name) -> Quiz:
-        return self.repo.get_by_name(name)
+        return await self.repo.get_by_name(name)
 
     async def create_quiz(
         self,
         schema: CreateQuizSchema,
         current_user: int,
     ) -> Quiz:
-        quiz = self.repo.get_by_name(schema.name)
+        quiz = await self.repo.get_by_name(schema.name, profile="bare")
 
         if quiz:
             raise DuplicateNameException
@@ -66,24 +62,24 @@ class QuizService:
             description=schema.description,
             created_by=current_user,
         )
-        return self.repo.create(quiz)
+        return await self.repo.create(quiz)
 
     async def delete_quiz(
         self,
         quiz_id: int,
     ) -> None:
-        quiz = self.repo.get_by_id(quiz_id)
+        quiz = await self.repo.get_by_id(quiz_id, profile="bare")
         if not quiz:
             raise QuizNotFoundException
 
-        self.repo.delete(quiz)
+        await self.repo.delete(quiz)
 
     async def update_quiz(
         self,
         quiz_id: int,
         schema: UpdateQuizSchema,
     ) -> Quiz:
-        quiz = self.repo.get_by_id(quiz_id)
+        quiz = await self.repo.get_by_id(quiz_id, profile="bare")
         if not quiz:
             raise QuizNotFoundException
 
@@ -92,18 +88,19 @@ class QuizService:
             "description": schema.description,
         }
 
-        self.repo.update_by_id(quiz_id, params)
-        return self.repo.get_by_id(quiz_id)
+        await self.repo.update_by_id(quiz_id, params)
+        return await self.repo.get_by_id(quiz_id)
 
     async def get_quiz(
         self,
         quiz_id: int,
+        profile: str | None = None,
     ) -> Quiz:
-        quiz = self.repo.get_by_id(quiz_id)
+        quiz = await self.repo.get_by_id(quiz_id, profile)
         if not quiz:
             raise QuizNotFoundException
 
         return quiz
 
-    async def get_quizzes(self) -> list[Quiz]:
-        return self.repo.get()
+    async def get_quizzes(self, profile: str | None = None) -> list[Quiz]:
+        return await self.repo.get(profile)
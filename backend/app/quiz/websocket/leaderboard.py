@@ -0,0 +1,131 @@
+"""Leaderboard of a live quiz session.
+
+Scores are kept ordered in a list of sorted buckets, found with bisect. Changing the
+score of a player moves one entry between buckets instead of sorting the whole
+board, and walking the buckets gives every rank in one pass.
+"""
+
+from bisect import bisect_left, insort
+from itertools import chain, islice
+from typing import Iterator, TypedDict
+
+from core.config import config
+
+
+class Standing(TypedDict):
+    number: int
+    score: int
+    rank: int
+
+
+def score_vote(elapsed: float, time_limit: float) -> int:
+    """Points for a correct answer, from the full amount for an instant answer down to
+    half of it for one at the deadline."""
+    if time_limit <= 0:
+        return config.QUIZ_MAX_POINTS
+
+    late = min(max(elapsed / time_limit, 0.0), 1.0)
+    return round(config.QUIZ_MAX_POINTS * (1 - late / 2))
+
+
+class Leaderboard:
+    def __init__(self, load: int = 256) -> None:
+        """
+        Args:
+            load (int): Amount of entries per bucket, a bucket is split when it grows
+            past twice this size.
+        """
+        self.load = load
+        self.scores: dict[int, int] = {}
+
+        # Entries are (-score, number) so the highest score comes first
+        self.buckets: list[list[tuple[int, int]]] = []
+        self.maxes: list[tuple[int, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def __contains__(self, number: int) -> bool:
+        return number in self.scores
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        """Iterate over (number, score) from the first to the last rank."""
+        for score, number in chain.from_iterable(self.buckets):
+            yield number, -score
+
+    def add(self, number: int, points: int = 0) -> int:
+        """Add points to the score of a player, adding the player when missing.
+
+        Returns:
+            int: The new score of the player.
+        """
+        if (score := self.scores.get(number)) is not None:
+            if not points:
+                return score
+
+            self._discard((-score, number))
+        else:
+            score = 0
+
+        score += points
+        self.scores[number] = score
+        self._insert((-score, number))
+
+        return score
+
+    def remove(self, number: int) -> None:
+        if (score := self.scores.pop(number, None)) is not None:
+            self._discard((-score, number))
+
+    def rank(self, number: int) -> int | None:
+        """The zero based rank of a player, None when the player is not on the board."""
+        if (score := self.scores.get(number)) is None:
+            return None
+
+        key = (-score, number)
+        index = bisect_left(self.maxes, key)
+
+        return sum(len(bucket) for bucket in self.buckets[:index]) + bisect_left(
+            self.buckets[index], key
+        )
+
+    def top(self, k: int) -> list[Standing]:
+        return [
+            {"number": number, "score": score, "rank": rank}
+            for rank, (number, score) in enumerate(islice(self, k))
+        ]
+
+    def _insert(self, key: tuple[int, int]) -> None:
+        if not self.buckets:
+            self.buckets.append([key])
+            self.maxes.append(key)
+            return
+
+        index = bisect_left(self.maxes, key)
+
+        if index == len(self.buckets):
+            index -= 1
+            self.buckets[index].append(key)
+            self.maxes[index] = key
+        else:
+            insort(self.buckets[index], key)
+
+        bucket = self.buckets[index]
+        if len(bucket) > 2 * self.load:
+            half = bucket[self.load :]
+            del bucket[self.load :]
+
+            self.buckets.insert(index + 1, half)
+            self.maxes[index] = bucket[-1]
+            self.maxes.insert(index + 1, half[-1])
+
+    def _discard(self, key: tuple[int, int]) -> None:
+        index = bisect_left(self.maxes, key)
+        bucket = self.buckets[index]
+        del bucket[bisect_left(bucket, key)]
+
+        if bucket:
+            self.maxes[index] = bucket[-1]
+        else:
+            del self.buckets[index]
+            del self.maxes[index]
@@ -2,36 +2,201 @@
 """
 
 from fastapi import WebSocket
+from app.quiz.exceptions.quiz import (
+    HostCannotVoteException,
+    NotSessionHostException,
+    SessionNotStartedException,
+)
+from app.quiz.websocket.session import QuizSession, quiz_sessions
+from core.exceptions.websocket import ClientNotFoundException, MailboxFullException
+from core.helpers.hashids import decode_single
+from core.helpers.logger import get_logger
 from core.helpers.websocket import manager
-from core.db.enums import WebsocketActionEnum
-from core.helpers.websocket.schemas.packet import QuizWebsocketPacketSchema
+from core.db.enums import QuizSessionActionEnum, WebsocketActionEnum
+from core.helpers.websocket.resume import ResumeEntry
+from core.helpers.websocket.schemas.packet import (
+    QuestionStartPacketSchema,
+    QuizWebsocketPacketSchema,
+    SubmitVotePacketSchema,
+    quiz_packet_parser,
+)
 from core.helpers.websocket.base import BaseWebsocketService
 from core.helpers.websocket.permission.permission_dependency import PermList
 
 
+logger = get_logger(__name__)
+
+
 class QuizWebsocketService(BaseWebsocketService):
     def __init__(self, perms: PermList | None = None):
         actions = {
             WebsocketActionEnum.POOL_MESSAGE.value: self.handle_pool_message,
             WebsocketActionEnum.GLOBAL_MESSAGE.value: self.handle_global_message,
+            QuizSessionActionEnum.QUESTION_START.value: self.handle_question_start,
+            QuizSessionActionEnum.QUESTION_STOP.value: self.handle_question_stop,
+            QuizSessionActionEnum.SUBMIT_VOTE.value: self.handle_submit_vote,
         }
 
-        self.perms = perms
-
         super().__init__(
             manager,
-            QuizWebsocketPacketSchema,
+            quiz_packet_parser,
             actions,
+            perms=perms,
+        )
+
+    def get_host_session(self, pool_id: str, websocket: WebSocket) -> QuizSession:
+        session = quiz_sessions.get(pool_id)
+        if not session:
+            raise SessionNotStartedException
+
+        if not session.is_host(websocket):
+            raise NotSessionHostException
+
+        return session
+
+    async def handle_question_start(
+        self,
+        pool_id: str,
+        packet: QuestionStartPacketSchema,
+        websocket: WebSocket,
+        **kwargs,
+    ):
+        """Start the next question. The first QUESTION_START of a pool creates the
+        session for the quiz in the payload, and makes the sender its host.
+
+        Args:
+            pool_id (str): Identifier of the pool of the session.
+            packet (QuestionStartPacketSchema): WebsocketPacket sent by client.
+            websocket (WebSocket): The websocket connection.
+
+        Returns:
+            None.
+        """
+        del kwargs
+
+        if pool_id not in quiz_sessions:
+            payload = packet.payload
+            quiz_id = decode_single(payload.quiz_id if payload else None)
+            quiz_sessions[pool_id] = await QuizSession.create(
+                pool_id,
+                quiz_id,
+                websocket,
+                self.manager,
+            )
+
+        await self.get_host_session(pool_id, websocket).start_question()
+
+    async def handle_question_stop(
+        self,
+        pool_id: str,
+        websocket: WebSocket,
+        **kwargs,
+    ):
+        """Close the current question before its time limit, host only.
+
+        Args:
+            pool_id (str): Identifier of the pool of the session.
+            websocket (WebSocket): The websocket connection.
+
+        Returns:
+            None.
+        """
+        del kwargs
+
+        await self.get_host_session(pool_id, websocket).stop_question()
+
+    async def handle_submit_vote(
+        self,
+        pool_id: str,
+        packet: SubmitVotePacketSchema,
+        websocket: WebSocket,
+        **kwargs,
+    ):
+        """Register the vote of a participant on the current question.
+
+        Args:
+            pool_id (str): Identifier of the pool of the session.
+            packet (SubmitVotePacketSchema): WebsocketPacket sent by client, with
+            the position of the chosen answer in its payload.
+            websocket (WebSocket): The websocket connection.
+
+        Returns:
+            None.
+        """
+        del kwargs
+
+        session = quiz_sessions.get(pool_id)
+        if not session:
+            raise SessionNotStartedException
+
+        if session.is_host(websocket):
+            raise HostCannotVoteException
+
+        if (client := self.manager.active_pools.get_client(websocket)) is None:
+            raise ClientNotFoundException
+
+        await session.record_vote(client["number"], packet.payload.answer)
+
+    async def handle_resume(
+        self,
+        websocket: WebSocket,
+        pool_id: str,
+        resume: ResumeEntry,
+    ):
+        session = quiz_sessions.get(pool_id)
+
+        # The host keeps hosting from its new connection
+        if session and session.host_number == resume.number:
+            session.host = websocket
+
+    async def send_snapshot(
+        self,
+        websocket: WebSocket,
+        pool_id: str,
+    ):
+        """Catch up a resumed client with the state of the quiz session.
+
+        Args:
+            websocket (WebSocket): The websocket connection.
+            pool_id (str): The pool the connection resumed in.
+
+        Returns:
+            None.
+        """
+        payload = {"seq": self.manager.get_replay_buffer(pool_id).seq}
+
+        client = self.manager.active_pools.get_client(websocket)
+        if client and (session := quiz_sessions.get(pool_id)):
+            payload.update(session.snapshot(client["number"]))
+
+        await self.manager.personal_packet(
+            websocket,
+            QuizWebsocketPacketSchema(
+                action=WebsocketActionEnum.SNAPSHOT,
+                message="snapshot",
+                payload=payload,
+            ),
         )
 
-    def handler(
+    async def handle_disconnect(
         self,
         websocket: WebSocket,
-        session_id: str,
-        access_token: str,
+        pool_id: str,
     ):
-        pool_id = session_id
+        if not (session := quiz_sessions.get(pool_id)):
+            return
 
-        self.manager.check_auth(*self.perms)
+        if self.manager.get_connection_count(pool_id) < 1:
+            quiz_sessions.close(pool_id)
+            return
 
-        return super().handler(websocket, pool_id)
+        # Whoever is left may now all have voted. Teardown must not fail on a full
+        # mailbox, the question still closes at its time limit then
+        try:
+            self.manager.executor.submit(pool_id, session.check_all_voted)
+        except MailboxFullException:
+            logger.warning(
+                "Mailbox of pool %s is full, skipped the vote check on disconnect",
+                pool_id,
+                extra={"pool_id": pool_id},
+            )
@@ -0,0 +1,125 @@
+"""Timing wheel shared by all live quiz sessions.
+
+Instead of a sleeping task per session, every deadline lives in one hashed timing
+wheel driven by a single task. Scheduling and cancelling a timer are O(1), and the
+driver only wakes up once per tick while there are timers left.
+"""
+
+import asyncio
+import math
+from typing import Callable
+
+from core.helpers.logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+class Timer:
+    __slots__ = ("deadline", "callback", "rounds", "cancelled")
+
+    def __init__(self, deadline: float, callback: Callable[[], None], rounds: int):
+        self.deadline = deadline
+        self.callback = callback
+        self.rounds = rounds
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimingWheel:
+    def __init__(self, tick: float = 0.05, slots: int = 1024) -> None:
+        """
+        Args:
+            tick (float): Seconds per slot, the precision of the timers.
+            slots (int): Amount of slots, timers further away than one revolution
+            (tick * slots seconds) wait for extra rounds.
+        """
+        self.tick = tick
+        self.wheel: list[list[Timer]] = [[] for _ in range(slots)]
+        self.cursor = 0
+        self.pending = 0
+        self.driver: asyncio.Task | None = None
+        self._origin = 0.0
+        self._ticks = 0
+
+    def schedule(self, delay: float, callback: Callable[[], None]) -> Timer:
+        """Call a callback after a delay.
+
+        The callback runs on the driver task and should not block, hand work that
+        touches pool state to the pool executor.
+
+        Args:
+            delay (float): Seconds from now.
+            callback (Callable[[], None]): The function to call.
+
+        Returns:
+            Timer: The timer, which can be cancelled.
+        """
+        loop = asyncio.get_running_loop()
+
+        if (
+            self.driver is None
+            or self.driver.done()
+            or self.driver.get_loop() is not loop
+        ):
+            self._origin = loop.time()
+            self._ticks = 0
+            self.driver = asyncio.ensure_future(self._drive())
+
+        # Count from the origin of the driver so a timer never fires early
+        deadline = loop.time() + delay
+        ticks = max(1, math.ceil((deadline - self._origin) / self.tick) - self._ticks)
+        slots = len(self.wheel)
+
+        timer = Timer(deadline, callback, (ticks - 1) // slots)
+        self.wheel[(self.cursor + ticks) % slots].append(timer)
+        self.pending += 1
+
+        return timer
+
+    async def _drive(self) -> None:
+        loop = asyncio.get_running_loop()
+
+        while self.pending:
+            # Sleep until the next tick based on the origin, so ticks don't drift
+            next_tick = self._origin + (self._ticks + 1) * self.tick
+            await asyncio.sleep(max(0, next_tick - loop.time()))
+
+            self._ticks += 1
+            self.cursor = (self.cursor + 1) % len(self.wheel)
+            self._advance(self.wheel[self.cursor])
+
+    def _advance(self, slot: list[Timer]) -> None:
+        # Take the slot apart before running anything, a callback that schedules a
+        # timer a full revolution away appends to this very slot
+        timers = slot[:]
+        slot.clear()
+        due = []
+
+        for timer in timers:
+            if timer.cancelled:
+                self.pending -= 1
+                continue
+
+            if timer.rounds:
+                timer.rounds -= 1
+                slot.append(timer)
+                continue
+
+            self.pending -= 1
+            due.append(timer)
+
+        for timer in due:
+            # An earlier callback of this tick may have cancelled it
+            if timer.cancelled:
+                continue
+
+            try:
+                timer.callback()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Timing wheel callback failed")
+
+
+timing_wheel = TimingWheel()
@@ -0,0 +1,401 @@
+"""Live quiz session engine.
+
+A session runs inside the pool executor of its pool, so none of its state needs a
+lock. Question deadlines are timers on the shared timing wheel, whose callbacks hand
+the deadline back to the pool executor.
+
+Votes only update the tally of the question. The host gets the tally on a fixed
+tick while the question runs, and only when it changed, so a burst of votes costs
+at most one packet per tick.
+
+The quiz is loaded once into an immutable snapshot when the session starts, see
+snapshot.py. Every question is encoded once as well, in a variant for the host with
+the correct answers and one for the players without them.
+
+When a question stops the correct votes are scored into the leaderboard. Everyone
+gets the top of the board, and each player gets their own rank and how far it moved,
+but only when it changed.
+"""
+
+import asyncio
+from typing import Any, NamedTuple
+
+from app.quiz.exceptions.quiz import (
+    NoQuestionsLeftException,
+    NotSessionHostException,
+    QuestionInProgressException,
+    QuestionNotActiveException,
+)
+from app.quiz.websocket.leaderboard import Leaderboard, score_vote
+from app.quiz.websocket.scheduler import Timer, TimingWheel, timing_wheel
+from app.quiz.websocket.snapshot import QuestionSnapshot, QuizSnapshot, load_quiz
+from app.quiz.websocket.tally import VoteTally
+from core.config import config
+from core.db.enums import QuizSessionActionEnum, WebsocketSessionEnum
+from core.exceptions.base import CustomException
+from core.helpers.websocket.active_pools import ClientConnection
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.schemas.packet import (
+    QuizWebsocketPacketSchema,
+    encode_packet,
+)
+from core.helpers.logger import get_logger
+from core.helpers.websocket.websocket import WebSocketConnection
+
+
+logger = get_logger(__name__)
+
+
+class QuestionFrames(NamedTuple):
+    host: str
+    player: str
+
+
+def encode_question_frames(index: int, question: QuestionSnapshot) -> QuestionFrames:
+    payload = {
+        "question": index,
+        "name": question.name,
+        "description": question.description,
+        "time_limit": question.time_limit,
+        "answers": question.answers,
+    }
+
+    def encode(payload: dict[str, Any]) -> str:
+        return encode_packet(
+            QuizWebsocketPacketSchema(
+                action=QuizSessionActionEnum.QUESTION_START,
+                message="question started",
+                payload=payload,
+            )
+        )
+
+    return QuestionFrames(
+        host=encode({**payload, "correct": question.correct}),
+        player=encode(payload),
+    )
+
+
+class QuizSession:
+    def __init__(
+        self,
+        pool_id: str,
+        quiz: QuizSnapshot,
+        host: WebSocketConnection,
+        manager: WebSocketConnectionManager,
+        wheel: TimingWheel = timing_wheel,
+    ) -> None:
+        self.pool_id = pool_id
+        self.quiz = quiz
+        self.host = host
+        host_client = manager.active_pools.get_client(host)
+        self.host_number = host_client["number"] if host_client else None
+        self.questions = quiz.questions
+        self.manager = manager
+        self.wheel = wheel
+
+        self.question_frames = [
+            encode_question_frames(index, question)
+            for index, question in enumerate(quiz.questions)
+        ]
+
+        self.state = WebsocketSessionEnum.STARTED
+        self.question_index = -1
+        self.tally = VoteTally(0)
+        self.timer: Timer | None = None
+        self.tally_timer: Timer | None = None
+        self.tally_interval = config.QUIZ_TALLY_INTERVAL
+        self.started_at = 0.0
+
+        self.leaderboard = Leaderboard()
+        self.ranks: dict[int, int] = {}
+
+    @classmethod
+    async def create(
+        cls,
+        pool_id: str,
+        quiz_id: int,
+        host: WebSocketConnection,
+        manager: WebSocketConnectionManager,
+    ) -> "QuizSession":
+        """Load a quiz and start a session of it, hosted by the owner of the quiz.
+
+        Raises:
+            QuizNotFoundException: When the quiz does not exist.
+            NotSessionHostException: When the host is not signed in as the creator
+            of the quiz. The host gets the correct answers of every question.
+        """
+        quiz = await load_quiz(quiz_id)
+
+        if host.user_id is None or host.user_id != quiz.created_by:
+            raise NotSessionHostException
+
+        return cls(pool_id, quiz, host, manager)
+
+    @property
+    def question(self) -> QuestionSnapshot | None:
+        if 0 <= self.question_index < len(self.questions):
+            return self.questions[self.question_index]
+
+        return None
+
+    def is_host(self, websocket: WebSocketConnection) -> bool:
+        return websocket.id == self.host.id
+
+    def snapshot(self, number: int) -> dict[str, Any]:
+        """The state of the session as seen by a participant, for a client that
+        resumed after missing too much to replay."""
+        snapshot = {
+            "state": self.state,
+            "question": self.question_index,
+            "score": self.leaderboard.scores.get(number, 0),
+            "rank": self.leaderboard.rank(number),
+        }
+
+        if self.state == WebsocketSessionEnum.IN_PROGRESS:
+            question = self.question
+            elapsed = asyncio.get_running_loop().time() - self.started_at
+
+            snapshot["current"] = {
+                "name": question.name,
+                "description": question.description,
+                "answers": question.answers,
+                "time_left": max(0.0, question.time_limit - elapsed),
+                "voted": self.tally.has_voted(number),
+            }
+
+        return snapshot
+
+    def get_participant_count(self) -> int:
+        count = self.manager.get_connection_count(self.pool_id)
+
+        if self.manager.active_pools.get_client(self.host):
+            count -= 1
+
+        return count
+
+    async def start_question(self) -> None:
+        """Go to the next question and start its countdown."""
+        if self.state == WebsocketSessionEnum.IN_PROGRESS:
+            raise QuestionInProgressException
+
+        if self.question_index + 1 >= len(self.questions):
+            raise NoQuestionsLeftException
+
+        self.question_index += 1
+        question = self.question
+        self.tally = VoteTally(len(question.answers))
+        self.started_at = asyncio.get_running_loop().time()
+        self.state = WebsocketSessionEnum.IN_PROGRESS
+
+        frames = self.question_frames[self.question_index]
+        await self.host.send_frame(frames.host)
+        await self.manager.publish_frame(
+            self.pool_id,
+            frames.player,
+            exclude=self.host,
+        )
+
+        self.timer = self.wheel.schedule(
+            question.time_limit,
+            lambda index=self.question_index: self._on_deadline(index),
+        )
+        self._schedule_tally_tick()
+
+    def _on_deadline(self, question_index: int) -> None:
+        try:
+            self.manager.executor.submit(
+                self.pool_id,
+                self.stop_question,
+                question_index=question_index,
+            )
+        except CustomException:
+            logger.error(
+                "Could not stop question of pool %s in time",
+                self.pool_id,
+                extra={"pool_id": self.pool_id},
+            )
+
+    def _schedule_tally_tick(self) -> None:
+        self.tally_timer = self.wheel.schedule(
+            self.tally_interval,
+            lambda index=self.question_index: self._on_tally_tick(index),
+        )
+
+    def _on_tally_tick(self, question_index: int) -> None:
+        if (
+            self.state != WebsocketSessionEnum.IN_PROGRESS
+            or question_index != self.question_index
+        ):
+            return
+
+        if self.tally.dirty:
+            try:
+                self.manager.executor.submit(self.pool_id, self.send_tally)
+            except CustomException:
+                # The next tick tries again, the tally is still dirty
+                pass
+
+        self._schedule_tally_tick()
+
+    async def send_tally(self) -> None:
+        """Send the votes so far to the host, when they changed since the last time."""
+        if (counts := self.tally.flush()) is None:
+            return
+
+        await self.manager.personal_packet(
+            self.host,
+            QuizWebsocketPacketSchema(
+                action=QuizSessionActionEnum.VOTE_TALLY,
+                message="vote tally",
+                payload={
+                    "question": self.question_index,
+                    "votes": counts,
+                    "total": self.tally.total,
+                },
+            ),
+            key=QuizSessionActionEnum.VOTE_TALLY.value,
+        )
+
+    async def stop_question(self, question_index: int | None = None) -> None:
+        """Close the current question.
+
+        Args:
+            question_index (int | None): Only stop when this is still the current
+            question, used by deadlines that may fire after an early close.
+        """
+        if self.state != WebsocketSessionEnum.IN_PROGRESS:
+            return
+
+        if question_index is not None and question_index != self.question_index:
+            return
+
+        self.cancel_timers()
+        self.state = WebsocketSessionEnum.FINISHED
+
+        await self.manager.pool_packet(
+            self.pool_id,
+            QuizWebsocketPacketSchema(
+                action=QuizSessionActionEnum.QUESTION_STOP,
+                message="question stopped",
+                payload={
+                    "question": self.question_index,
+                    "correct": self.question.correct,
+                    "votes": self.tally.counts.tolist(),
+                },
+            ),
+        )
+
+        players = self.get_players()
+        self.score_question(players)
+        await self.send_standings(players)
+
+    async def record_vote(self, number: int, answer: int) -> None:
+        """Count the vote of a participant, closing the question once everyone voted.
+
+        Args:
+            number (int): The number of the participant in the pool.
+            answer (int): The position of the chosen answer.
+        """
+        if self.state != WebsocketSessionEnum.IN_PROGRESS:
+            raise QuestionNotActiveException
+
+        elapsed = asyncio.get_running_loop().time() - self.started_at
+        self.tally.vote(number, answer, elapsed)
+        await self.check_all_voted()
+
+    async def check_all_voted(self) -> None:
+        if (
+            self.state == WebsocketSessionEnum.IN_PROGRESS
+            and self.tally.total >= self.get_participant_count()
+        ):
+            await self.stop_question()
+
+    def get_players(self) -> dict[int, ClientConnection]:
+        """The clients in the pool apart from the host, by their number."""
+        pool = self.manager.active_pools.get(self.pool_id)
+        if not pool:
+            return {}
+
+        return {
+            client["number"]: client
+            for client in pool["clients"].values()
+            if not self.is_host(client["ws"])
+        }
+
+    def score_question(self, players: dict[int, ClientConnection]) -> None:
+        """Add the points of the correct votes on the current question to the
+        leaderboard, and sync the board with the players still in the pool."""
+        question = self.question
+
+        for number, answer, elapsed in self.tally.votes():
+            if question.is_correct(answer):
+                self.leaderboard.add(number, score_vote(elapsed, question.time_limit))
+
+        for number in players:
+            self.leaderboard.add(number)
+
+        if len(self.leaderboard) > len(players):
+            for number in [n for n in self.leaderboard.scores if n not in players]:
+                self.leaderboard.remove(number)
+                self.ranks.pop(number, None)
+
+    async def send_standings(self, players: dict[int, ClientConnection]) -> None:
+        """Broadcast the top of the leaderboard, and send every player whose standing
+        changed their own rank and rank delta."""
+        await self.manager.pool_packet(
+            self.pool_id,
+            QuizWebsocketPacketSchema(
+                action=QuizSessionActionEnum.LEADERBOARD,
+                message="leaderboard",
+                payload={
+                    "question": self.question_index,
+                    "top": self.leaderboard.top(config.QUIZ_LEADERBOARD_SIZE),
+                    "players": len(self.leaderboard),
+                },
+            ),
+        )
+
+        for rank, (number, score) in enumerate(self.leaderboard):
+            previous = self.ranks.get(number)
+            self.ranks[number] = rank
+
+            if previous == rank and not self.tally.has_voted(number):
+                continue
+
+            if not (client := players.get(number)):
+                continue
+
+            await self.manager.personal_packet(
+                client["ws"],
+                QuizWebsocketPacketSchema(
+                    action=QuizSessionActionEnum.RANK,
+                    message="rank",
+                    payload={
+                        "question": self.question_index,
+                        "rank": rank,
+                        "score": score,
+                        "delta": 0 if previous is None else previous - rank,
+                    },
+                ),
+            )
+
+    def cancel_timers(self) -> None:
+        for timer in (self.timer, self.tally_timer):
+            if timer:
+                timer.cancel()
+
+        self.timer = None
+        self.tally_timer = None
+
+    def close(self) -> None:
+        self.cancel_timers()
+        self.state = WebsocketSessionEnum.STOPPED
+
+
+class QuizSessions(dict[str, QuizSession]):
+    def close(self, pool_id: str) -> None:
+        if session := self.pop(pool_id, None):
+            session.close()
+
+
+quiz_sessions = QuizSessions()
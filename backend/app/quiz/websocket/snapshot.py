@@ -0,0 +1,88 @@
+"""Immutable snapshot of a quiz for live sessions.
+
+A session loads its quiz, questions and answers once when it starts, in a single
+eager query, and plays entirely from the snapshot. The database models are never
+touched during play, so no lazy relationship load can block the event loop of the
+other pools of the process.
+
+The correct answers of a question are a bitmask over the positions of its answers,
+checking a vote is a shift and an and.
+"""
+
+from typing import Iterable, NamedTuple
+
+from app.quiz.exceptions.quiz import QuizNotFoundException
+from app.quiz.repository.quiz import QuizRepository
+from core.db import AsyncSessionLocal
+from core.db.models import Quiz
+
+
+def get_correct_mask(correct: Iterable[bool]) -> int:
+    """Pack the correctness of answers, in order, into a bitmask."""
+    mask = 0
+
+    for index, is_correct in enumerate(correct):
+        if is_correct:
+            mask |= 1 << index
+
+    return mask
+
+
+class QuestionSnapshot(NamedTuple):
+    name: str
+    description: str
+    time_limit: float
+    answers: tuple[str, ...]
+    correct_mask: int
+
+    @property
+    def correct(self) -> list[int]:
+        """The positions of the correct answers."""
+        return [
+            index for index in range(len(self.answers)) if self.correct_mask >> index & 1
+        ]
+
+    def is_correct(self, answer: int) -> bool:
+        return bool(self.correct_mask >> answer & 1)
+
+
+class QuizSnapshot(NamedTuple):
+    id: int
+    name: str
+    questions: tuple[QuestionSnapshot, ...]
+    created_by: int | None = None
+
+    @classmethod
+    def from_model(cls, quiz: Quiz) -> "QuizSnapshot":
+        """Copy a quiz with its questions and answers loaded out of the models."""
+        return cls(
+            id=quiz.id,
+            name=quiz.name,
+            created_by=quiz.created_by,
+            questions=tuple(
+                QuestionSnapshot(
+                    name=question.name,
+                    description=question.description,
+                    time_limit=question.time_limit,
+                    answers=tuple(answer.description for answer in question.answers),
+                    correct_mask=get_correct_mask(
+                        answer.is_correct for answer in question.answers
+                    ),
+                )
+                for question in quiz.questions
+            ),
+        )
+
+
+async def load_quiz(quiz_id: int) -> QuizSnapshot:
+    """Load the snapshot of a quiz.
+
+    Raises:
+        QuizNotFoundException: When the quiz does not exist.
+    """
+    async with AsyncSessionLocal() as session:
+        quiz = await QuizRepository(session).get_by_id(quiz_id, profile="questions")
+        if not quiz:
+            raise QuizNotFoundException
+
+        return QuizSnapshot.from_model(quiz)
@@ -0,0 +1,83 @@
+"""Vote tally of a single question.
+
+Votes are counted in a flat array indexed by answer position, and who already voted
+is kept in a bitset indexed by participant number. Both a vote and the duplicate
+check are O(1), no matter how many players vote at once. Every vote is also appended
+to flat arrays of voter, answer and answer time, which scoring reads back.
+"""
+
+from array import array
+from typing import Iterator
+
+from app.quiz.exceptions.quiz import AlreadyVotedException, InvalidAnswerException
+
+
+class VoteTally:
+    __slots__ = (
+        "counts",
+        "answered",
+        "voters",
+        "choices",
+        "elapsed",
+        "total",
+        "dirty",
+    )
+
+    def __init__(self, answer_count: int) -> None:
+        self.counts = array("I", bytes(4 * answer_count))
+        self.answered = bytearray()
+        self.voters = array("I")
+        self.choices = array("H")
+        self.elapsed = array("f")
+        self.total = 0
+        self.dirty = False
+
+    def has_voted(self, number: int) -> bool:
+        byte, bit = divmod(number, 8)
+        return byte < len(self.answered) and bool(self.answered[byte] & (1 << bit))
+
+    def vote(self, number: int, answer: int, elapsed: float = 0.0) -> None:
+        """Count the vote of a participant.
+
+        Args:
+            number (int): The number of the participant in the pool.
+            answer (int): The position of the chosen answer.
+            elapsed (float): Seconds between the start of the question and the vote.
+
+        Raises:
+            InvalidAnswerException: When the answer is not on the question.
+            AlreadyVotedException: When the participant already voted.
+        """
+        if not isinstance(answer, int) or not 0 <= answer < len(self.counts):
+            raise InvalidAnswerException
+
+        byte, bit = divmod(number, 8)
+        if byte >= len(self.answered):
+            self.answered.extend(bytes(byte - len(self.answered) + 1))
+
+        if self.answered[byte] & (1 << bit):
+            raise AlreadyVotedException
+
+        self.answered[byte] |= 1 << bit
+        self.counts[answer] += 1
+        self.voters.append(number)
+        self.choices.append(answer)
+        self.elapsed.append(elapsed)
+        self.total += 1
+        self.dirty = True
+
+    def votes(self) -> Iterator[tuple[int, int, float]]:
+        """Iterate over (number, answer, elapsed) of every vote in arrival order."""
+        return zip(self.voters, self.choices, self.elapsed)
+
+    def flush(self) -> list[int] | None:
+        """Take the counts when they changed since the last flush.
+
+        Returns:
+            list[int] | None: The votes per answer, None when nothing changed.
+        """
+        if not self.dirty:
+            return None
+
+        self.dirty = False
+        return self.counts.tolist()
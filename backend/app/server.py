@@ -12,9 +12,13 @@ from app.seed_db import seed_db
 from core.config import config
 from core.exceptions.base import CustomException
 from core.fastapi.dependencies.logging import Logging
+from core.helpers.logger import log_pipeline
+from core.helpers.loop_monitor import loop_monitor
+from core.helpers.websocket import manager
 from core.fastapi.middlewares import (
     AuthenticationMiddleware,
     AuthBackend,
+    LoopMonitorMiddleware,
     # ResponseLogMiddleware,
 )
 from core.versioning import VersionedFastAPI
@@ -52,6 +56,26 @@ def init_listeners(app_: FastAPI) -> None:
         )
 
 
+def init_logging(app_: FastAPI) -> None:
+    """
+    Send the logs of the process through the background writer thread. Logging
+    stops last, so what the other shutdown handlers log is still written
+    """
+    app_.router.on_startup.insert(0, log_pipeline.start)
+    app_.add_event_handler("shutdown", log_pipeline.stop)
+
+
+def init_websocket_manager(app_: FastAPI) -> None:
+    """
+    Connect the websocket manager to the broker shared by all workers and start
+    monitoring the event loop for lag and blocking calls
+    """
+    app_.add_event_handler("startup", manager.start)
+    app_.add_event_handler("startup", loop_monitor.start)
+    app_.add_event_handler("shutdown", manager.stop)
+    app_.add_event_handler("shutdown", loop_monitor.stop)
+
+
 def on_auth_error(exc: Exception):
     """
     Authentication exception handler
@@ -73,6 +97,7 @@ def make_middleware() -> list[Middleware]:
     Initialize FastAPI middleware
     """
     middleware = [
+        Middleware(LoopMonitorMiddleware),
         Middleware(
             CORSMiddleware,
             allow_origins=["*"],
@@ -118,6 +143,9 @@ def create_app() -> FastAPI:
         middleware=make_middleware(),
     )
 
+    init_websocket_manager(app_=app_)
+    init_logging(app_=app_)
+
     seed_db()
 
     return app_
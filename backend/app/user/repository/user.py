@@ -1,15 +1,15 @@
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from core.db.models import User
 from core.repository.base import BaseRepository
 
 
 class UserRepository(BaseRepository):
-    def __init__(self, session: Session):
+    def __init__(self, session: AsyncSession):
         super().__init__(User, session)
 
-    def get_by_username(self, username: str):
+    async def get_by_username(self, username: str, profile: str | None = None):
         query = select(self.model).where(self.model.username==username)
-        query = self.query_options(query)
-        result = self.session.execute(query)
+        query = self.query_options(query, profile)
+        result = await self.session.execute(query)
         return result.scalars().first()
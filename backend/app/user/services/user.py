@@ -1,3 +1,5 @@
+from starlette.concurrency import run_in_threadpool
+
 from app.user.schemas.user import CreateUserSchema, UpdateUserSchema
 from app.auth.services.utils import get_password_hash
 from app.user.exceptions.user import DuplicateUsernameException, UserNotFoundException
@@ -13,61 +15,61 @@ class UserService:
         self,
         username,
     ) -> User:
-        return self.repo.get_by_username(username)
+        return await self.repo.get_by_username(username)
 
     async def create_user(
         self,
         schema: CreateUserSchema,
     ) -> User:
-        user = self.repo.get_by_username(schema.username)
+        user = await self.repo.get_by_username(schema.username)
 
         if user:
             raise DuplicateUsernameException
 
-        hashed_pass = get_password_hash(schema.password)
+        hashed_pass = await run_in_threadpool(get_password_hash, schema.password)
         user = User(username=schema.username, password=hashed_pass)
-        return self.repo.create(user)
+        return await self.repo.create(user)
 
     async def delete_user(
         self,
         user_id: int,
     ) -> None:
-        user = self.repo.get_by_id(user_id)
+        user = await self.repo.get_by_id(user_id)
         if not user:
             raise UserNotFoundException
 
-        self.repo.delete(user)
+        await self.repo.delete(user)
 
     async def update_user(
         self,
         user_id: int,
         schema: UpdateUserSchema,
     ) -> User:
-        user = self.repo.get_by_id(user_id)
+        user = await self.repo.get_by_id(user_id)
         if not user:
             raise UserNotFoundException
 
-        hashed_pass = get_password_hash(schema.password)
+        hashed_pass = await run_in_threadpool(get_password_hash, schema.password)
         params = {
             "username": schema.username,
             "password": hashed_pass,
         }
 
-        self.repo.update_by_id(user_id, params)
-        return self.repo.get_by_id(user_id)
+        await self.repo.update_by_id(user_id, params)
+        return await self.repo.get_by_id(user_id)
 
     async def get_user(self, user_id: int) -> User:
-        user = self.repo.get_by_id(user_id)
+        user = await self.repo.get_by_id(user_id)
         if not user:
             raise UserNotFoundException
 
         return user
 
     async def get_users(self) -> list[User]:
-        return self.repo.get()
+        return await self.repo.get()
 
     async def is_admin(self, user_id) -> bool:
-        user = self.repo.get_by_id(user_id)
+        user = await self.repo.get_by_id(user_id)
         if not user:
             raise UserNotFoundException
 
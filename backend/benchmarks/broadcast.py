@@ -0,0 +1,109 @@
+"""
+Measure the CPU cost of a single pool broadcast against the pool size.
+
+Compares the old path, where every client got its own model_dump and JSON encode,
+with the serialize-once path of WebSocketConnectionManager.pool_packet. The
+connections have no writer task running, so only the work done by the broadcaster
+(encoding and queueing) is measured.
+
+Usage:
+    python -m benchmarks.broadcast
+
+Options:
+    --sizes : comma separated pool sizes
+    --rounds : broadcasts per pool size
+"""
+
+import asyncio
+import json
+import time
+
+import click
+from starlette.websockets import WebSocketState
+
+from core.db.enums import QuizSessionActionEnum
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.schemas.packet import QuizWebsocketPacketSchema
+from core.helpers.websocket.websocket import WebSocketConnection
+
+
+class NullWebSocket:
+    """Socket that never gets written to."""
+
+    client_state = WebSocketState.CONNECTED
+    application_state = WebSocketState.CONNECTED
+
+
+def make_packet() -> QuizWebsocketPacketSchema:
+    return QuizWebsocketPacketSchema(
+        action=QuizSessionActionEnum.QUESTION_START,
+        message="question started",
+        payload={
+            "question": "Is greg disappointed?",
+            "description": "Think long and hard about this one. " * 4,
+            "time_limit": 30.0,
+            "answers": ["Yes", "No", "Maybe", "Greg who?"],
+            "leaderboard": [
+                {"number": number, "username": f"player_{number}", "score": 1000 - number}
+                for number in range(10)
+            ],
+        },
+    )
+
+
+async def per_client_broadcast(
+    manager: WebSocketConnectionManager,
+    pool_id: str,
+    packet: QuizWebsocketPacketSchema,
+):
+    """The previous broadcast path: one dump and one encode per client."""
+    for client in manager.active_pools[pool_id]["clients"].values():
+        data = packet.model_dump()
+        client["ws"].enqueue(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+
+
+async def measure(size: int, rounds: int) -> tuple[float, float]:
+    manager = WebSocketConnectionManager()
+    packet = make_packet()
+
+    for _ in range(size):
+        manager.active_pools.append("bench", WebSocketConnection(NullWebSocket()))
+
+    start = time.process_time()
+    for _ in range(rounds):
+        await per_client_broadcast(manager, "bench", packet)
+    per_client = (time.process_time() - start) / rounds
+
+    start = time.process_time()
+    for _ in range(rounds):
+        await manager.pool_packet("bench", packet)
+    serialize_once = (time.process_time() - start) / rounds
+
+    return per_client, serialize_once
+
+
+@click.command()
+@click.option("--sizes", default="10,100,1000,5000")
+@click.option("--rounds", type=click.INT, default=20)
+def main(sizes: str, rounds: int):
+    """
+    Print the per broadcast CPU time for every pool size.
+
+    Args:
+        sizes (str): Comma separated pool sizes to measure.
+        rounds (int): Amount of broadcasts to average over.
+
+    Returns:
+        None
+    """
+    print(
+        f"{'clients':>8} {'per-client encode':>18} {'serialize-once':>15}"
+        "   (ms of CPU per broadcast)"
+    )
+
+    for size in [int(size) for size in sizes.split(",")]:
+        per_client, serialize_once = asyncio.run(measure(size, rounds))
+        print(f"{size:>8} {per_client * 1000:>18.3f} {serialize_once * 1000:>15.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,594 @@
+"""
+Soak and fan-out benchmark of the quiz websocket endpoint.
+
+Connects a host and thousands of simulated players to one quiz session and plays
+the quiz: the host starts every question, all players vote at once and the
+question stops as soon as everyone voted. Reports:
+
+- connect rate: completed handshakes per second
+- broadcast latency: p50/p99 from the host sending QUESTION_START until a player
+  received its frame
+- vote ingest: votes per second from the first vote sent until QUESTION_STOP
+  reached the host, and how many votes were refused
+- memory per connection: allocations made while connecting, per connection (only
+  in-process)
+
+By default the app runs in-process and the clients talk ASGI to it directly, without
+sockets, against the test database. With --url the clients connect to a running
+server instead, e.g. a local uvicorn, and --quiz-id has to name an existing quiz.
+
+Slow clients take longer than the send timeout of the server (1 s by default) for
+every frame and vote like everyone else. After the questions every other player
+floods the pool with messages, so frames back up at the slow clients over a real
+socket too. The run fails unless every slow client was evicted as a slow consumer.
+A disconnect storm drops a share of the players at once, right when the last
+question is broadcast.
+
+Usage:
+    python -m benchmarks.soak
+    python -m benchmarks.soak --clients 5000 --slow 50 --storm 0.3
+    python -m benchmarks.soak --url ws://localhost:8002/api/latest/quizzes/websocket \\
+        --quiz-id <hashid> --token <access token>
+
+Options:
+    --clients : amount of players
+    --questions : amount of questions to play, in-process only
+    --concurrency : handshakes in flight at the same time
+    --slow : amount of extra players that read slowly
+    --slow-delay : seconds a slow player takes per frame
+    --flood : pool messages every player sends after the questions, with --slow
+    --storm : share of the players that disconnect during the last question
+    --timeout : seconds to wait for a broadcast or for all votes
+    --url : websocket endpoint of a running server, without the session id
+    --quiz-id : hashid of the quiz to play, required with --url
+    --token : access token for --url
+"""
+
+import asyncio
+import gc
+import os
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import click
+import orjson
+
+
+SESSION_ID = "soak"
+PATH = "/api/v1/quizzes/websocket"
+
+# A server can't get its close frame through to a client whose socket is backed up,
+# so a remote slow client may only see the connection drop
+EVICTED_CODES = (4008, 1006)
+
+
+@dataclass
+class Waiter:
+    """Arrivals of one broadcast, until the expected amount of clients got it."""
+
+    started: float
+    expected: int
+    latencies: list[float] = field(default_factory=list)
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def arrive(self, now: float) -> None:
+        self.latencies.append(now - self.started)
+
+        if len(self.latencies) >= self.expected:
+            self.done.set()
+
+
+class Collector:
+    """Shared by the readers of all clients, counts the frames of interest."""
+
+    def __init__(self) -> None:
+        self.waiters: dict[str, Waiter] = {}
+        self.status_codes: dict[int, int] = {}
+
+    def expect(self, action: str, expected: int) -> Waiter:
+        waiter = self.waiters[action] = Waiter(time.perf_counter(), expected)
+        if expected <= 0:
+            waiter.done.set()
+
+        return waiter
+
+    def receive(self, packet: dict[str, Any], now: float) -> None:
+        action = packet.get("action")
+
+        if action == "STATUS_CODE":
+            code = packet.get("status_code")
+            self.status_codes[code] = self.status_codes.get(code, 0) + 1
+
+        if waiter := self.waiters.get(action):
+            waiter.arrive(now)
+
+
+class HostCollector(Collector):
+    """Collector of the host, keeps the vote counts of the last QUESTION_STOP."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.last_stop_votes = 0
+
+    def receive(self, packet: dict[str, Any], now: float) -> None:
+        if packet.get("action") == "QUESTION_STOP":
+            self.last_stop_votes = sum(packet["payload"]["votes"])
+
+        super().receive(packet, now)
+
+
+class AsgiClient:
+    """Websocket client that calls the ASGI app directly, without a socket."""
+
+    def __init__(self, app: Callable, path: str, delay: float = 0.0) -> None:
+        self.app = app
+        self.path, _, self.query = path.partition("?")
+        self.delay = delay
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.frames: asyncio.Queue = asyncio.Queue()
+        self.accepted = asyncio.Event()
+        self.close_code: int | None = None
+        self.task: asyncio.Task | None = None
+
+    async def connect(self) -> None:
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "http_version": "1.1",
+            "path": self.path,
+            "raw_path": self.path.encode(),
+            "root_path": "",
+            "query_string": self.query.encode(),
+            "headers": [(b"host", b"soak")],
+            "client": ("127.0.0.1", 0),
+            "server": ("soak", 80),
+            "subprotocols": [],
+        }
+
+        self.incoming.put_nowait({"type": "websocket.connect"})
+        self.task = asyncio.ensure_future(
+            self.app(scope, self.incoming.get, self._send)
+        )
+        await self.accepted.wait()
+
+        if self.close_code is not None:
+            raise ConnectionError(f"Handshake refused with {self.close_code}")
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        if message["type"] == "websocket.accept":
+            self.accepted.set()
+
+        elif message["type"] == "websocket.send":
+            # A slow client stands for a slow network, holding up the write
+            if self.delay:
+                await asyncio.sleep(self.delay)
+
+            self.frames.put_nowait(message.get("text") or message.get("bytes"))
+
+        elif message["type"] == "websocket.close":
+            self.close_code = message.get("code", 1000)
+            self.frames.put_nowait(None)
+            self.accepted.set()
+
+    async def send(self, frame: str) -> None:
+        self.incoming.put_nowait({"type": "websocket.receive", "text": frame})
+
+    async def recv(self) -> str | bytes | None:
+        return await self.frames.get()
+
+    async def close(self) -> None:
+        self.incoming.put_nowait({"type": "websocket.disconnect", "code": 1001})
+        self.frames.put_nowait(None)
+
+        if self.task:
+            try:
+                await asyncio.wait_for(self.task, 5)
+            except Exception:  # pylint: disable=broad-exception-caught
+                pass
+
+
+class RemoteClient:
+    """Websocket client that connects to a running server."""
+
+    def __init__(self, url: str, delay: float = 0.0) -> None:
+        self.url = url
+        self.delay = delay
+        self.ws = None
+
+    @property
+    def close_code(self) -> int | None:
+        # Closed as soon as the connection is, even with frames still unread
+        if self.ws is None or not self.ws.closed:
+            return None
+
+        return self.ws.close_code
+
+    async def connect(self) -> None:
+        import websockets  # pylint: disable=import-outside-toplevel
+
+        # A slow client only buffers a single frame, so the frames back up on the
+        # socket instead of in the client
+        self.ws = await websockets.connect(
+            self.url,
+            open_timeout=30,
+            max_queue=1 if self.delay else None,
+        )
+
+    async def send(self, frame: str) -> None:
+        await self.ws.send(frame)
+
+    async def recv(self) -> str | bytes | None:
+        import websockets  # pylint: disable=import-outside-toplevel
+
+        try:
+            frame = await self.ws.recv()
+        except websockets.ConnectionClosed:
+            return None
+
+        # A slow client stops reading, the server's writes back up over TCP
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        return frame
+
+    async def close(self) -> None:
+        if self.ws:
+            await self.ws.close()
+
+
+async def read_forever(client, collector: Collector) -> None:
+    while (frame := await client.recv()) is not None:
+        collector.receive(orjson.loads(frame), time.perf_counter())
+
+
+def packet(action: str, payload: dict[str, Any] | None = None) -> str:
+    return orjson.dumps(
+        {"action": action, "message": action.lower(), "payload": payload}
+    ).decode()
+
+
+def percentile(values: list[float], share: float) -> float:
+    if not values:
+        return float("nan")
+
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def create_quiz(questions: int) -> int:
+    """Add a quiz to play to the test database, in-process only."""
+    # pylint: disable=import-outside-toplevel
+    from core.db import SessionLocal
+    from core.db.models import Answer, Question, Quiz, User
+
+    with SessionLocal() as session:
+        user = session.query(User).first()
+        quiz = Quiz(name=f"Soak {time.time()}", description="soak", created_by=user.id)
+
+        for index in range(questions):
+            question = Question(
+                name=f"Question {index}",
+                description="Is greg disappointed?",
+                time_limit=300.0,
+            )
+            question.answers.append(Answer(description="Yes", is_correct=True))
+            question.answers.append(Answer(description="No"))
+            quiz.questions.append(question)
+
+        session.add(quiz)
+        session.commit()
+        return quiz.id
+
+
+def delete_quiz(quiz_id: int) -> None:
+    # pylint: disable=import-outside-toplevel
+    from core.db import SessionLocal
+    from core.db.models import Quiz
+
+    with SessionLocal() as session:
+        session.delete(session.get(Quiz, quiz_id))
+        session.commit()
+
+
+async def connect_all(make_client: Callable, amount: int, concurrency: int) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def connect(client):
+        async with semaphore:
+            await client.connect()
+        return client
+
+    return await asyncio.gather(*(connect(make_client()) for _ in range(amount)))
+
+
+async def play_question(
+    host,
+    players: list,
+    collector: Collector,
+    host_collector: Collector,
+    payload: dict[str, Any] | None,
+    timeout: float,
+    storm: list,
+    slow_players: list,
+) -> tuple[list[float], float, int]:
+    """Broadcast a question and vote on it with every player, slow players that
+    are still connected included, so the question stops once all votes are in.
+
+    Returns:
+        tuple[list[float], float, int]: The broadcast latencies, the votes per
+        second and the amount of votes counted by the server.
+    """
+    survivors = [player for player in players if player not in storm]
+    voters = [
+        *survivors,
+        *(player for player in slow_players if player.close_code is None),
+    ]
+
+    started = collector.expect("QUESTION_START", len(survivors))
+    stopped = host_collector.expect("QUESTION_STOP", 1)
+    host_collector.expect("QUESTION_START", 1)
+
+    await host.send(packet("QUESTION_START", payload))
+    await asyncio.gather(*(player.close() for player in storm))
+
+    try:
+        await asyncio.wait_for(started.done.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+    vote = packet("SUBMIT_VOTE", {"answer": 0})
+    voting = time.perf_counter()
+    # A slow player may be evicted while it votes
+    await asyncio.gather(
+        *(player.send(vote) for player in voters), return_exceptions=True
+    )
+
+    try:
+        await asyncio.wait_for(stopped.done.wait(), timeout)
+    except asyncio.TimeoutError:
+        # Not everyone's vote made it, stop the question ourselves
+        await host.send(packet("QUESTION_STOP"))
+        await asyncio.wait_for(stopped.done.wait(), timeout)
+
+    elapsed = time.perf_counter() - voting
+    counted = host_collector.last_stop_votes
+    return started.latencies, counted / elapsed if elapsed else 0.0, counted
+
+
+async def measure_memory(make_client: Callable, amount: int) -> tuple[list, float]:
+    """Connect clients while tracing allocations.
+
+    Returns:
+        tuple[list, float]: The clients and the bytes allocated per connection,
+        without what the simulated clients allocated themselves.
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    clients = [make_client() for _ in range(amount)]
+    for client in clients:
+        await client.connect()
+
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(
+        stat.size_diff
+        for stat in after.compare_to(before, "filename")
+        if stat.traceback[0].filename != __file__
+    )
+    return clients, allocated / max(amount, 1)
+
+
+async def flood(players: list, amount: int) -> None:
+    """Send pool messages from every player at once, each one is fanned out to the
+    whole pool."""
+    message = packet("POOL_MESSAGE", {"message": "x" * 1024})
+
+    await asyncio.gather(
+        *(player.send(message) for player in players for _ in range(amount)),
+        return_exceptions=True,
+    )
+
+
+async def wait_for_close(clients: list, timeout: float) -> None:
+    deadline = time.perf_counter() + timeout
+
+    while any(client.close_code is None for client in clients):
+        if time.perf_counter() > deadline:
+            return
+
+        await asyncio.sleep(0.01)
+
+
+async def watch_storm(manager, remaining: int) -> float:
+    """Seconds until the pool is down to the clients that did not disconnect."""
+    started = time.perf_counter()
+
+    while manager.get_connection_count(SESSION_ID) > remaining:
+        await asyncio.sleep(0.001)
+
+    return time.perf_counter() - started
+
+
+async def run(
+    clients: int,
+    questions: int,
+    concurrency: int,
+    slow: int,
+    slow_delay: float,
+    flood_messages: int,
+    storm: float,
+    timeout: float,
+    url: str | None,
+    quiz_id: str | None,
+    token: str | None,
+) -> bool:
+    """Play the quiz and print the report.
+
+    Returns:
+        bool: Whether every slow client was evicted.
+    """
+    # pylint: disable=import-outside-toplevel,too-many-locals
+    from core.helpers.hashids import encode
+
+    manager = None
+    created_quiz = None
+
+    if url:
+        endpoint = f"{url}/{SESSION_ID}?token={token or 'soak'}"
+
+        def make_client(delay: float = 0.0):
+            return RemoteClient(endpoint, delay)
+
+    else:
+        from app.server import app
+        from core.helpers.token.token_helper import TokenHelper
+        from core.helpers.websocket import manager
+
+        await manager.start()
+        created_quiz = create_quiz(questions)
+        quiz_id = encode(created_quiz)
+        token = TokenHelper.encode_access(payload={"user_id": encode(1)})
+        path = f"{PATH}/{SESSION_ID}?token={token}"
+
+        def make_client(delay: float = 0.0):
+            return AsgiClient(app, path, delay)
+
+    collector, host_collector = Collector(), HostCollector()
+    readers = []
+
+    host = make_client()
+    await host.connect()
+    readers.append(asyncio.ensure_future(read_forever(host, host_collector)))
+
+    # Memory is only measured in-process, on a sample of the connections, tracing
+    # allocations slows down the handshakes too much to trace all of them
+    memory = None
+    sample = []
+    if manager:
+        sample, memory = await measure_memory(make_client, min(clients, 100))
+
+    connecting = time.perf_counter()
+    players = await connect_all(make_client, clients - len(sample), concurrency)
+    connect_rate = len(players) / (time.perf_counter() - connecting)
+    players = [*sample, *players]
+
+    # Slow players get their own collector, they are not waited for
+    slow_players = await connect_all(lambda: make_client(slow_delay), slow, concurrency)
+
+    for player in players:
+        readers.append(asyncio.ensure_future(read_forever(player, collector)))
+
+    for player in slow_players:
+        readers.append(asyncio.ensure_future(read_forever(player, Collector())))
+
+    print(f"{'clients':>24}: {clients} (+{slow} slow)")
+    print(f"{'connect rate':>24}: {connect_rate:,.0f} /s")
+    if memory is not None:
+        print(f"{'memory per connection':>24}: {memory / 1024:,.1f} KiB")
+
+    rounds = questions if manager else 1
+    stormed = players[: int(len(players) * storm)]
+
+    for index in range(rounds):
+        storm_players = stormed if index == rounds - 1 else []
+        watcher = None
+
+        if storm_players and manager:
+            connected = [player for player in slow_players if player.close_code is None]
+            remaining = len(players) - len(storm_players) + len(connected) + 1
+            watcher = asyncio.ensure_future(watch_storm(manager, remaining))
+
+        latencies, vote_rate, counted = await play_question(
+            host,
+            players,
+            collector,
+            host_collector,
+            {"quiz_id": quiz_id} if index == 0 else None,
+            timeout,
+            storm_players,
+            slow_players,
+        )
+
+        label = f"question {index}" + (" (storm)" if storm_players else "")
+        print(
+            f"{label:>24}: broadcast p50 {percentile(latencies, 0.5) * 1000:.1f} ms,"
+            f" p99 {percentile(latencies, 0.99) * 1000:.1f} ms"
+            f" ({len(latencies)} received),"
+            f" votes {counted} at {vote_rate:,.0f} /s"
+        )
+
+        if watcher:
+            print(
+                f"{'storm cleared':>24}: {len(storm_players)} disconnects in"
+                f" {await watcher * 1000:.1f} ms"
+            )
+
+    if slow_players:
+        survivors = players[len(stormed):]
+        await flood(survivors, flood_messages)
+        await wait_for_close(slow_players, timeout)
+
+    if manager:
+        stats = manager.get_queue_stats(SESSION_ID)
+        print(f"{'frames dropped':>24}: {stats['dropped']}")
+
+    evicted = sum(1 for player in slow_players if player.close_code in EVICTED_CODES)
+    refused = sum(
+        count for code, count in collector.status_codes.items() if code >= 400
+    )
+    print(f"{'slow clients evicted':>24}: {evicted} of {slow}")
+    print(f"{'refused actions':>24}: {refused}")
+
+    await asyncio.gather(
+        *(client.close() for client in [host, *players, *slow_players])
+    )
+    for reader in readers:
+        reader.cancel()
+
+    if manager:
+        await manager.stop()
+        delete_quiz(created_quiz)
+
+    return evicted == slow
+
+
+@click.command()
+@click.option("--clients", type=click.INT, default=1000)
+@click.option("--questions", type=click.INT, default=3)
+@click.option("--concurrency", type=click.INT, default=100)
+@click.option("--slow", type=click.INT, default=0)
+@click.option("--slow-delay", type=click.FLOAT, default=2.0)
+@click.option("--flood", "flood_messages", type=click.INT, default=5)
+@click.option("--storm", type=click.FLOAT, default=0.0)
+@click.option("--timeout", type=click.FLOAT, default=30.0)
+@click.option("--url", default=None)
+@click.option("--quiz-id", default=None)
+@click.option("--token", default=None)
+def main(**options):
+    """
+    Play a quiz with simulated clients and print what it cost.
+
+    Args:
+        options: See the module docstring.
+
+    Returns:
+        None
+    """
+    if options["url"] and not options["quiz_id"]:
+        raise click.UsageError("--quiz-id is required with --url")
+
+    # In-process runs use the test database
+    os.environ.setdefault("ENV", "test")
+
+    if not asyncio.run(run(**options)):
+        raise click.ClickException("Not every slow client was evicted")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ class Config:
     DEBUG: bool = True
     APP_HOST: str = "0.0.0.0"
     APP_PORT: int = 8000
+    APP_WORKERS: int = int(os.getenv("APP_WORKERS", 1))
 
     _db_dialect_and_driver = "mysql+mysqldb"
     DB_URL: str = "{}://{}:{}@{}:{}/{}".format(
@@ -24,6 +25,16 @@ class Config:
         os.getenv("DB_LOCAL_PORT"),
         os.getenv("MYSQL_DATABASE"),
     )
+
+    _async_db_dialect_and_driver = "mysql+aiomysql"
+    ASYNC_DB_URL: str = "{}://{}:{}@{}:{}/{}".format(
+        _async_db_dialect_and_driver,
+        os.getenv("DB_USER"),
+        os.getenv("MYSQL_ROOT_PASSWORD"),
+        os.getenv("DB_LOCAL_HOST"),
+        os.getenv("DB_LOCAL_PORT"),
+        os.getenv("MYSQL_DATABASE"),
+    )
     
     ACCESS_TOKEN_EXPIRE_PERIOD: int = 10 * 60 * 60
     REFRESH_TOKEN_EXPIRE_PERIOD: int = 24 * 60 * 60
@@ -34,6 +45,43 @@ class Config:
     HASH_ID_SALT: str = os.getenv("HASH_ID_SALT")
     HASH_ID_MIN_LENGTH: str = os.getenv("HASH_ID_MIN_LENGTH")
 
+    WEBSOCKET_SEND_TIMEOUT: float = 1.0
+    WEBSOCKET_QUEUE_SIZE: int = 64
+    WEBSOCKET_OVERFLOW_POLICY: str = "DROP_OLDEST"
+    WEBSOCKET_MAILBOX_SIZE: int = 1024
+    WEBSOCKET_SLOW_ACTION_THRESHOLD: float = 0.1
+    WEBSOCKET_HEARTBEAT_INTERVAL: float = 15.0
+    WEBSOCKET_HEARTBEAT_MISSES: int = 2
+    WEBSOCKET_RATE_LIMIT: float = 20.0
+    WEBSOCKET_RATE_BURST: int = 40
+    WEBSOCKET_MESSAGE_RATE_LIMIT: float = 1.0
+    WEBSOCKET_MESSAGE_RATE_BURST: int = 5
+    WEBSOCKET_REPLAY_SIZE: int = 256
+    WEBSOCKET_RESUME_TTL: float = 60.0
+    WEBSOCKET_BROKER: str = os.getenv("WEBSOCKET_BROKER", "memory")
+    WEBSOCKET_BROKER_PATH: str = os.getenv(
+        "WEBSOCKET_BROKER_PATH", "/tmp/quizzap-broker.sock"
+    )
+    WEBSOCKET_BROKER_QUEUE_SIZE: int = 4096
+    WEBSOCKET_BROKER_RECONNECT_DELAY: float = 0.1
+    WEBSOCKET_BROKER_RECONNECT_MAX_DELAY: float = 5.0
+    WEBSOCKET_BROKER_STARTUP_TIMEOUT: float = 10.0
+
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FILE: str | None = os.getenv("LOG_FILE", "logs/quizzap.log")
+    LOG_FILE_MAX_BYTES: int = 10 * 1024 * 1024
+    LOG_FILE_BACKUPS: int = 5
+    LOG_SAMPLE_EVERY: int = 100
+
+    LOOP_MONITOR_INTERVAL: float = 0.05
+    LOOP_BLOCK_THRESHOLD: float = 0.1
+    LOOP_BLOCK_STACK_DEPTH: int = 20
+    LOOP_BLOCK_HISTORY: int = 100
+
+    QUIZ_TALLY_INTERVAL: float = 0.25
+    QUIZ_MAX_POINTS: int = 1000
+    QUIZ_LEADERBOARD_SIZE: int = 10
+
 
 class LocalConfig(Config):
     ...
@@ -48,10 +96,20 @@ class DevelopmentConfig(Config):
         os.getenv("DB_DOCKER_PORT"),
         os.getenv("MYSQL_DATABASE"),
     )
+    ASYNC_DB_URL: str = "{}://{}:{}@{}:{}/{}".format(
+        Config._async_db_dialect_and_driver,
+        os.getenv("DB_USER"),
+        os.getenv("MYSQL_ROOT_PASSWORD"),
+        os.getenv("DB_DOCKER_HOST"),
+        os.getenv("DB_DOCKER_PORT"),
+        os.getenv("MYSQL_DATABASE"),
+    )
 
 
 class TestConfig(Config):
     DB_URL: str = "sqlite:///test.db"
+    ASYNC_DB_URL: str = "sqlite+aiosqlite:///test.db"
+    LOG_FILE: str | None = None
 
 
 def get_config() -> Config:
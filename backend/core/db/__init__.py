@@ -1,9 +1,18 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from core.config import config
 
+# Blocking engine, for seeding and migrations before the event loop runs
 engine = create_engine(config.DB_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Models are read after their session committed, e.g. by the response schemas, which
+# can't load expired attributes outside of an await
+async_engine = create_async_engine(config.ASYNC_DB_URL)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
@@ -16,6 +16,10 @@ class WebsocketActionEnum(str, BaseEnum):
     USER_CONNECT = "USER_CONNECT"       # New user has connected
     USER_DISCONNECT = "USER_DISCONNECT" # User has disconnected
     SESSION_CLOSE = "SESSION_CLOSE"     # Session is closing
+    PING = "PING"                       # Check if the other side is still there
+    PONG = "PONG"                       # Answer to a PING
+    RESUME = "RESUME"                   # Token to resume the connection with
+    SNAPSHOT = "SNAPSHOT"               # State for a client that missed too much
 
 
 class WebsocketSessionEnum(str, BaseEnum):
@@ -28,8 +32,22 @@ class WebsocketSessionEnum(str, BaseEnum):
     STOPPED = "STOPPED"         # Internal session has stopped
 
 
+class WebsocketOverflowEnum(str, BaseEnum):
+    DROP_OLDEST = "DROP_OLDEST" # Drop the oldest queued frame to make room
+    COALESCE = "COALESCE"       # Replace a queued frame of the same packet type
+    DISCONNECT = "DISCONNECT"   # Disconnect the slow consumer
+
+
+class WebsocketProtocolEnum(str, BaseEnum):
+    JSON = "json"       # JSON text frames, the default
+    MSGPACK = "msgpack" # MessagePack binary frames
+
+
 class QuizSessionActionEnum(str, BaseEnum):
     # When editing this, edit app\swipe_session\services\action_docs.py too
     SUBMIT_VOTE = "SUBMIT_VOTE"       # Send an answer vote to the session 
     QUESTION_START = "QUESTION_START" # Notify next question
     QUESTION_STOP = "QUESTION_STOP"   # Notify no question
+    VOTE_TALLY = "VOTE_TALLY"         # Notify host of the votes so far
+    LEADERBOARD = "LEADERBOARD"       # Notify the top players
+    RANK = "RANK"                     # Notify a player of their own rank
@@ -74,7 +74,25 @@ class AlreadySwipedException(CustomException):
     message = "this user has already swiped this recipe in this session"
 
 
+class RateLimitedException(CustomException):
+    status_code = 429
+    error_status_code = "WEBSOCKET__RATE_LIMITED"
+    message = "too many packets, slow down"
+
+
 class ActionNotImplementedException(CustomException):
     status_code = 501
     error_status_code = "WEBSOCKET__ACTION_NOT_IMPLEMENTED"
     message = "action is not implemented or not available"
+
+
+class MailboxFullException(CustomException):
+    status_code = 503
+    error_status_code = "WEBSOCKET__MAILBOX_FULL"
+    message = "too many actions are waiting in this pool, try again"
+
+
+class ClientNotFoundException(CustomException):
+    status_code = 404
+    error_status_code = "WEBSOCKET__CLIENT_NOT_FOUND"
+    message = "connection is not a client of this pool"
@@ -1,9 +1,6 @@
-from core.db import SessionLocal
+from core.db import AsyncSessionLocal
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def get_db():
+    async with AsyncSessionLocal() as session:
+        yield session
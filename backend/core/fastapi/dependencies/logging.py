@@ -1,9 +1,21 @@
-from fastapi import BackgroundTasks
+from starlette.requests import HTTPConnection
+
+from core.config import config
+from core.helpers.logger import get_logger
+
+
+request_logger = get_logger(__name__, sample_every=config.LOG_SAMPLE_EVERY)
 
 
 class Logging:
-    def __init__(self, background_task: BackgroundTasks):
-        background_task.add_task(self._send_log)
+    def __init__(self, connection: HTTPConnection):
+        # Global dependency, so it runs for websocket handshakes too, which have
+        # no method
+        method = connection.scope.get("method", "WEBSOCKET")
 
-    async def _send_log(self):
-        pass
+        request_logger.debug(
+            "%s %s",
+            method,
+            connection.url.path,
+            extra={"method": method, "path": connection.url.path},
+        )
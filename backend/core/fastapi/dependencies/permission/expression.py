@@ -0,0 +1,156 @@
+"""Compiled permission expressions.
+
+A permission expression is a sequence of permission classes, nested sequences and
+the AND, OR and NOT keywords, e.g. ``IsAdmin, OR, (IsAuthenticated, AND, IsOwner)``.
+AND binds tighter than OR. Expressions are validated and compiled once, when their
+dependency is constructed, into a tree that short-circuits while it is evaluated.
+Every leaf holds a single instance of its permission, and a permission that appears
+more than once is only checked once per request.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Sequence
+
+from core.fastapi.dependencies.permission.keyword import AND, NOT, OR
+
+
+Check = Callable[[Any], Awaitable[bool]]
+Memo = dict[type, bool]
+
+
+class Expression(ABC):
+    __slots__ = ()
+
+    @abstractmethod
+    async def evaluate(self, check: Check, memo: Memo) -> bool:
+        """Evaluate the expression.
+
+        Args:
+            check (Check): Runs a single permission instance.
+            memo (Memo): Results of the permissions checked so far, by class.
+
+        Returns:
+            bool: Whether the expression holds.
+        """
+        del check, memo
+
+
+class Leaf(Expression):
+    __slots__ = ("permission",)
+
+    def __init__(self, permission: Any) -> None:
+        self.permission = permission
+
+    async def evaluate(self, check: Check, memo: Memo) -> bool:
+        key = type(self.permission)
+
+        if (result := memo.get(key)) is None:
+            result = memo[key] = bool(await check(self.permission))
+
+        return result
+
+
+class Not(Expression):
+    __slots__ = ("operand",)
+
+    def __init__(self, operand: Expression) -> None:
+        self.operand = operand
+
+    async def evaluate(self, check: Check, memo: Memo) -> bool:
+        return not await self.operand.evaluate(check, memo)
+
+
+class AllOf(Expression):
+    __slots__ = ("operands",)
+
+    def __init__(self, operands: Sequence[Expression]) -> None:
+        self.operands = tuple(operands)
+
+    async def evaluate(self, check: Check, memo: Memo) -> bool:
+        for operand in self.operands:
+            if not await operand.evaluate(check, memo):
+                return False
+
+        return True
+
+
+class AnyOf(Expression):
+    __slots__ = ("operands",)
+
+    def __init__(self, operands: Sequence[Expression]) -> None:
+        self.operands = tuple(operands)
+
+    async def evaluate(self, check: Check, memo: Memo) -> bool:
+        for operand in self.operands:
+            if await operand.evaluate(check, memo):
+                return True
+
+        return False
+
+
+def compile_expression(perms: Sequence, base_perm_type: type) -> Expression:
+    """Validate a permission expression and compile it.
+
+    Args:
+        perms (Sequence): The permission classes, nested sequences and keywords.
+        base_perm_type (type): The base class the permissions have to extend.
+
+    Raises:
+        ValueError: When the expression is not valid.
+
+    Returns:
+        Expression: The compiled expression.
+    """
+    if not perms:
+        raise ValueError(f"Empty permission expression: {perms}")
+
+    alternatives: list[list[Expression]] = []
+    operands: list[Expression] = []
+    expect_operand = True
+    invert = False
+
+    for perm in perms:
+        if isinstance(perm, (list, tuple)):
+            operand = compile_expression(perm, base_perm_type)
+
+        elif isinstance(perm, type) and issubclass(perm, base_perm_type):
+            operand = Leaf(perm())
+
+        elif perm is NOT:
+            if not expect_operand:
+                raise ValueError(f"'NOT' after permission: {perms}")
+
+            if invert:
+                raise ValueError(f"'NOT' looks at keyword: {perms}")
+
+            invert = True
+            continue
+
+        elif perm is AND or perm is OR:
+            if expect_operand:
+                raise ValueError(f"'{perm.__name__}' not after a permission: {perms}")
+
+            if perm is OR:
+                alternatives.append(operands)
+                operands = []
+
+            expect_operand = True
+            continue
+
+        else:
+            raise ValueError(f"Not a permission or keyword: {perm!r}")
+
+        if not expect_operand:
+            raise ValueError(f"Two permissions adjacent: {perms}")
+
+        operands.append(Not(operand) if invert else operand)
+        expect_operand = False
+        invert = False
+
+    if expect_operand:
+        raise ValueError(f"Ends on keyword: {perms}")
+
+    alternatives.append(operands)
+
+    terms = [ops[0] if len(ops) == 1 else AllOf(ops) for ops in alternatives]
+    return terms[0] if len(terms) == 1 else AnyOf(terms)
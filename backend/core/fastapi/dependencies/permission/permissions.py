@@ -1,5 +1,5 @@
 from fastapi import Request
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.quiz.exceptions.quiz import QuizNotFoundException
 from app.quiz.services.quiz import QuizService
 from app.user.services.user import UserService
@@ -16,27 +16,26 @@ def get_hashed_param_from_path(param, request):
 class IsAuthenticated(BasePermission):
     exception = UnauthorizedException
 
-    async def has_permission(self, request: Request, session: Session) -> bool:
+    async def has_permission(self, request: Request, session: AsyncSession) -> bool:
         del session
 
         return request.user.id is not None
 
 
 class IsQuizOwner(BasePermission):
-    async def has_permission(self, request: Request, session: Session) -> bool:
+    async def has_permission(self, request: Request, session: AsyncSession) -> bool:
         quiz_id = get_hashed_param_from_path("quiz_id", request)
 
         try:
-            QuizService(session).get_quiz(quiz_id)
+            quiz = await QuizService(session).get_quiz(quiz_id, profile="bare")
         except QuizNotFoundException:
             return False
 
-
-        return True
+        return quiz.created_by == request.user.id
 
 
 class IsUserOwner(BasePermission):
-    async def has_permission(self, request: Request, session: Session) -> bool:
+    async def has_permission(self, request: Request, session: AsyncSession) -> bool:
         del session
         
         user_id = get_hashed_param_from_path("user_id", request)
@@ -50,7 +49,7 @@ class IsUserOwner(BasePermission):
 class IsAdmin(BasePermission):
     exception = UnauthorizedException
 
-    async def has_permission(self, request: Request, session: Session) -> bool:
+    async def has_permission(self, request: Request, session: AsyncSession) -> bool:
         user_id = request.user.id
         if not user_id:
             return False
@@ -59,7 +58,7 @@ class IsAdmin(BasePermission):
 
 
 class AllowAll(BasePermission):
-    async def has_permission(self, request: Request, session: Session) -> bool:
+    async def has_permission(self, request: Request, session: AsyncSession) -> bool:
         del request, session
 
         return True
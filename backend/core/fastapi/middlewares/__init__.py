@@ -1,8 +1,10 @@
 from .authentication import AuthenticationMiddleware, AuthBackend
+from .loop_monitor import LoopMonitorMiddleware
 from .response_log import ResponseLogMiddleware
 
 __all__ = [
     "AuthenticationMiddleware",
     "AuthBackend",
+    "LoopMonitorMiddleware",
     "ResponseLogMiddleware",
 ]
\ No newline at end of file
@@ -0,0 +1,19 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from core.helpers.loop_monitor import loop_monitor
+
+
+class LoopMonitorMiddleware:
+    """Marks the task of a request with its scope, so a request that blocks the
+    event loop is recorded with the endpoint it was routed to."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        with loop_monitor.activity(scope):
+            await self.app(scope, receive, send)
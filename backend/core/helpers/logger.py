@@ -1,51 +1,197 @@
+"""
+Structured logging through a background writer thread.
+
+Handlers on the root logger only put records on a queue. A listener thread takes
+them off, formats them as JSON lines and writes them to stdout and the log file,
+so no formatting of records or file and stdout write ever runs on the event loop.
+
+Records below the configured level are dropped by the logger itself before a record
+is created. Hot paths that could log for every packet use a SampledLogger, which
+only lets one in every so many records through.
+"""
+
+import copy
 import logging
-import os
-from datetime import datetime
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Any
+
+import orjson
+
+from core.config import config
+
+
+# Loggers of the server that write to stdout themselves
+SERVER_LOGGERS = ("uvicorn", "uvicorn.error", "uvicorn.access")
+
+# Attributes every LogRecord has, anything else was passed as extra. Uvicorn passes
+# a colored copy of its messages, which is left out as well
+RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "taskName", "color_message"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats a record as a JSON line, with the extra fields of the record."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+
+        for key, value in record.__dict__.items():
+            if key not in RECORD_ATTRIBUTES:
+                entry[key] = value
+
+        if record.exc_info:
+            record.exc_text = record.exc_text or self.formatException(record.exc_info)
+
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+
+        return orjson.dumps(entry, default=str).decode()
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """Puts records on the queue with as little work as possible on the caller.
+
+    Only the message is merged with its arguments and the traceback is rendered,
+    since neither can be done safely once the record left the calling thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+
+        return record
 
-import unicodedata
-import re
 
+class SampledLogger:
+    """Logs only one in every so many records, for paths that run per packet.
 
-def slugify(value, allow_unicode=False):
+    The first record is always logged. Every logged record carries how many records
+    it stands for in its sampled field.
     """
-    Taken from https://github.com/django/django/blob/master/django/utils/text.py
-    Convert to ASCII if 'allow_unicode' is False. Convert spaces or repeated
-    dashes to single dashes. Remove characters that aren't alphanumerics,
-    underscores, or hyphens. Convert to lowercase. Also strip leading and
-    trailing whitespace, dashes, and underscores.
+
+    def __init__(self, logger: logging.Logger, every: int) -> None:
+        self.logger = logger
+        self.every = max(1, every)
+        self.count = 0
+
+    def log(self, level: int, msg: str, *args, **kwargs) -> None:
+        if not self.logger.isEnabledFor(level):
+            return
+
+        self.count += 1
+        if (self.count - 1) % self.every:
+            return
+
+        kwargs["extra"] = {**kwargs.get("extra", {}), "sampled": self.every}
+        self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg: str, *args, **kwargs) -> None:
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg: str, *args, **kwargs) -> None:
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg: str, *args, **kwargs) -> None:
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+
+def get_logger(name: str, sample_every: int | None = None):
+    """Get a logger, sampled when sample_every is given.
+
+    Args:
+        name (str): The name of the logger, usually the module name.
+        sample_every (int | None, optional): Only log one in every so many records.
+
+    Returns:
+        logging.Logger | SampledLogger: The logger.
     """
-    value = str(value)
-    if allow_unicode:
-        value = unicodedata.normalize("NFKC", value)
-    else:
-        value = (
-            unicodedata.normalize("NFKD", value)
-            .encode("ascii", "ignore")
-            .decode("ascii")
+    logger = logging.getLogger(name)
+
+    if sample_every is None:
+        return logger
+
+    return SampledLogger(logger, sample_every)
+
+
+class LogPipeline:
+    def __init__(
+        self,
+        level: str = config.LOG_LEVEL,
+        path: str | None = config.LOG_FILE,
+    ) -> None:
+        self.level = level
+        self.path = path
+        self.queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.listener: logging.handlers.QueueListener | None = None
+
+    def get_handlers(self) -> list[logging.Handler]:
+        handlers: list[logging.Handler] = [logging.StreamHandler(sys.stdout)]
+
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            handlers.append(
+                logging.handlers.RotatingFileHandler(
+                    self.path,
+                    maxBytes=config.LOG_FILE_MAX_BYTES,
+                    backupCount=config.LOG_FILE_BACKUPS,
+                    encoding="utf-8",
+                )
+            )
+
+        formatter = JsonFormatter()
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        return handlers
+
+    def start(self) -> None:
+        """Route all records of the process through the queue to the writer thread."""
+        if self.listener is not None:
+            return
+
+        root = logging.getLogger()
+        root.handlers = [LogQueueHandler(self.queue)]
+        root.setLevel(self.level)
+
+        for name in SERVER_LOGGERS:
+            server_logger = logging.getLogger(name)
+            server_logger.handlers = []
+            server_logger.propagate = True
+
+        self.listener = logging.handlers.QueueListener(
+            self.queue, *self.get_handlers(), respect_handler_level=True
         )
-    value = re.sub(r"[^\w\s-]", "-", value.lower())
-    return re.sub(r"[-\s]+", "-", value).strip("-_")
+        self.listener.start()
 
+    def stop(self) -> None:
+        """Write the records left on the queue and stop the writer thread."""
+        if self.listener is None:
+            return
 
-def get_logger(exc: Exception | str = None):
-    """Initializes logger and generates log name."""
+        self.listener.stop()
 
-    Path(os.getcwd() + "/logs").mkdir(parents=True, exist_ok=True)
+        for handler in self.listener.handlers:
+            handler.close()
 
-    log_name = "_".join(
-        [
-            datetime.now().strftime("%m%d%Y-%H%M%S"),
-            (slugify(str(exc)[:50]) or "untitled"),
-        ]
-    ).lower()
+        self.listener = None
 
-    logging.basicConfig(
-        filename=f"logs/{log_name}.log",
-        format="%(levelname)s\t%(asctime)s: %(message)s",
-        encoding="utf-8",
-        level=logging.INFO,
-        force=True,
-    )
 
-    return log_name
+log_pipeline = LogPipeline()
@@ -0,0 +1,226 @@
+"""
+Event loop lag monitor and blocked loop detector.
+
+The loop beats at a fixed interval, how late a beat runs is the scheduling lag of
+the loop. A watchdog thread checks the beats: when one is overdue by more than the
+threshold, something is holding the loop, such as a synchronous database query or
+password hash inside an ``async def``. The watchdog then samples the stack of the
+loop thread, looks up what the running task was doing, and records the block once
+the loop is free again.
+
+Websocket actions and HTTP endpoints mark their task with an activity, so a block
+is recorded with the action or endpoint and the pool it ran for.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, NamedTuple
+from weakref import WeakKeyDictionary
+
+from core.config import config
+from core.helpers.logger import get_logger
+from core.helpers.metrics import metrics
+
+
+logger = get_logger(__name__)
+
+
+class Activity(NamedTuple):
+    action: str
+    pool_id: str | None = None
+
+
+class BlockedLoop(NamedTuple):
+    action: str | None
+    pool_id: str | None
+    duration: float
+    stack: list[str]
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = config.LOOP_MONITOR_INTERVAL,
+        threshold: float = config.LOOP_BLOCK_THRESHOLD,
+        stack_depth: int = config.LOOP_BLOCK_STACK_DEPTH,
+        history: int = config.LOOP_BLOCK_HISTORY,
+    ) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+
+        self.last_lag = 0.0
+        self.blocks: deque[BlockedLoop] = deque(maxlen=history)
+        self.activities: WeakKeyDictionary[asyncio.Task, Any] = WeakKeyDictionary()
+
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.loop_thread_id: int | None = None
+        self.next_beat = 0.0
+        self.handle: asyncio.TimerHandle | None = None
+        self.watchdog: threading.Thread | None = None
+        self.stopping = threading.Event()
+
+        self.lag = metrics.histogram(
+            "quizzap_event_loop_lag_seconds",
+            "How late the event loop ran a callback scheduled at a fixed interval.",
+        )
+        self.blocked_total = metrics.counter(
+            "quizzap_event_loop_blocked_total",
+            "Times the event loop was blocked past the threshold, by action.",
+            ("action",),
+        )
+        self.blocked_seconds = metrics.histogram(
+            "quizzap_event_loop_blocked_seconds",
+            "How long the event loop was blocked, when past the threshold.",
+            (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+        )
+        metrics.gauge(
+            "quizzap_event_loop_lag_last_seconds",
+            "The event loop lag of the last beat.",
+            lambda: self.last_lag,
+        )
+
+    def start(self) -> None:
+        """Start beating on the running loop and start the watchdog thread."""
+        if self.watchdog is not None:
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread_id = threading.get_ident()
+        self.stopping.clear()
+
+        self.next_beat = time.monotonic() + self.interval
+        self.handle = self.loop.call_later(self.interval, self._beat)
+
+        self.watchdog = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self.watchdog.start()
+
+    async def stop(self) -> None:
+        if self.watchdog is None:
+            return
+
+        self.stopping.set()
+        if self.handle is not None:
+            self.handle.cancel()
+
+        await asyncio.get_running_loop().run_in_executor(None, self.watchdog.join)
+
+        self.watchdog = None
+        self.handle = None
+
+    @contextmanager
+    def activity(self, action: Any, pool_id: str | None = None) -> Iterator[None]:
+        """Mark what the current task is doing, for as long as the block runs.
+
+        Args:
+            action (Any): The name of the action, or an ASGI scope of which the
+                endpoint name is looked up when a block is recorded.
+            pool_id (str | None, optional): The pool the action runs for.
+        """
+        task = asyncio.current_task()
+        if task is None:
+            yield
+            return
+
+        previous = self.activities.get(task)
+        self.activities[task] = (
+            Activity(action, pool_id) if isinstance(action, str) else action
+        )
+
+        try:
+            yield
+        finally:
+            if previous is None:
+                self.activities.pop(task, None)
+            else:
+                self.activities[task] = previous
+
+    def _beat(self) -> None:
+        now = time.monotonic()
+
+        self.last_lag = max(0.0, now - self.next_beat)
+        self.lag.observe(self.last_lag)
+
+        self.next_beat = now + self.interval
+        self.handle = self.loop.call_later(self.interval, self._beat)
+
+    def _watch(self) -> None:
+        poll = self.threshold / 2
+
+        while not self.stopping.wait(poll):
+            overdue_beat = self.next_beat
+
+            if time.monotonic() - overdue_beat < self.threshold:
+                continue
+
+            activity = self._get_activity()
+            stack = self._sample_stack()
+
+            while self.next_beat == overdue_beat and not self.stopping.wait(poll / 4):
+                pass
+
+            if self.stopping.is_set():
+                return
+
+            self._record(
+                BlockedLoop(
+                    action=activity.action if activity else None,
+                    pool_id=activity.pool_id if activity else None,
+                    duration=self.next_beat - self.interval - overdue_beat,
+                    stack=stack,
+                )
+            )
+
+    def _get_activity(self) -> Activity | None:
+        task = asyncio.current_task(self.loop)
+        if task is None:
+            return None
+
+        activity = self.activities.get(task)
+
+        if isinstance(activity, dict):
+            endpoint = activity.get("endpoint")
+            name = getattr(endpoint, "__name__", None) or activity.get("path")
+            return Activity(f"{activity.get('method', 'WEBSOCKET')} {name}")
+
+        return activity
+
+    def _sample_stack(self) -> list[str]:
+        frame = sys._current_frames().get(  # pylint: disable=protected-access
+            self.loop_thread_id
+        )
+        if frame is None:
+            return []
+
+        return traceback.format_stack(frame, limit=self.stack_depth)
+
+    def _record(self, block: BlockedLoop) -> None:
+        self.blocks.append(block)
+        self.blocked_total.inc(block.action or "callback")
+        self.blocked_seconds.observe(block.duration)
+
+        where = block.action or "a callback"
+        if block.pool_id:
+            where += f" in pool {block.pool_id}"
+
+        logger.warning(
+            "Event loop blocked for %.3fs by %s",
+            block.duration,
+            where,
+            extra={
+                "action": block.action,
+                "pool_id": block.pool_id,
+                "duration": block.duration,
+                "stack": "".join(block.stack),
+            },
+        )
+
+
+loop_monitor = LoopMonitor()
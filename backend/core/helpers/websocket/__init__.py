@@ -1,5 +1,7 @@
-from core.fastapi.dependencies.permission.permissions import AllowAll
 from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.metrics import register_manager_metrics
+from core.helpers.websocket.permission.permissions import AllowAll
 
 
 manager = WebSocketConnectionManager(AllowAll)
+register_manager_metrics(manager)
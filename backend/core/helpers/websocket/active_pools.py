@@ -8,48 +8,99 @@ class ClientConnection(TypedDict):
 
 
 class Pool(TypedDict):
-    clients: list[ClientConnection]
+    clients: dict[int, ClientConnection]
     amount: int
 
 
 class ActivePools(dict[str, Pool]):
-    def create(self, identifier: str) -> None:
-        self[identifier] = {"clients": [], "amount": 0}
+    """All pools with their connected clients.
+
+    Every pool keeps its clients in a dict keyed by connection id, and a reverse
+    index maps each connection id to the pool it is in, so adding, finding and
+    removing a client are O(1). The total connection count is kept up to date on
+    every change instead of being counted on request.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.connection_pools: dict[int, str] = {}
+        self.connection_count = 0
+
+    def create(self, identifier: str, amount: int = 0) -> None:
+        self[identifier] = {"clients": {}, "amount": amount}
+
+    def append(
+        self,
+        identifier: str,
+        ws: WebSocketConnection,
+        number: int | None = None,
+    ) -> None:
+        """Add a connection to a pool.
+
+        Args:
+            identifier (str): The pool.
+            ws (WebSocketConnection): The connection.
+            number (int | None): The number of the client, given when a client
+            resumes its old number. A new client gets the next number.
+        """
+        if ws.id in self.connection_pools:
+            return
 
-    def append(self, identifier: str, ws: WebSocketConnection) -> None:
         if not self.get(identifier):
             self.create(identifier)
 
-        self[identifier]["amount"] += 1
+        if number is None:
+            self[identifier]["amount"] += 1
+            number = self[identifier]["amount"]
 
-        self[identifier]["clients"].append(
-            {
-                "ws": ws,
-                "number": self[identifier]["amount"]
-            }
-        )
+        self[identifier]["clients"][ws.id] = {
+            "ws": ws,
+            "number": number,
+        }
+
+        self.connection_pools[ws.id] = identifier
+        self.connection_count += 1
 
     def remove(self, identifier: str, ws: WebSocketConnection) -> None:
-        if not self.get(identifier):
+        if not (pool := self.get(identifier)):
             return
-        
-        for client in self[identifier]["clients"]:
-            if client["ws"].id == ws.id:
-                self[identifier]["clients"].remove(client)
-                break
-        
-        if self.get_connection_count(identifier) < 1:
+
+        if pool["clients"].pop(ws.id, None) is None:
+            return
+
+        del self.connection_pools[ws.id]
+        self.connection_count -= 1
+
+        if not pool["clients"]:
             self.pop(identifier)
 
+    def remove_connection(self, ws: WebSocketConnection) -> str | None:
+        """Remove a connection from whichever pool it is in.
+
+        Returns:
+            str | None: The identifier of the pool the connection was removed from.
+        """
+        identifier = self.connection_pools.get(ws.id)
+
+        if identifier is not None:
+            self.remove(identifier, ws)
+
+        return identifier
+
+    def get_pool_id(self, ws: WebSocketConnection) -> str | None:
+        return self.connection_pools.get(ws.id)
+
+    def get_client(self, ws: WebSocketConnection) -> ClientConnection | None:
+        if (identifier := self.connection_pools.get(ws.id)) is None:
+            return None
+
+        return self[identifier]["clients"].get(ws.id)
+
     def get_connection_count(self, identifier: str | None = None) -> int:
         if identifier:
             if (pool := self.get(identifier)) is None:
                 return 0
-            
-            return len(pool["clients"])
 
-        total = 0
-        for _, pool in self.items():
-            total += len(pool["clients"])
+            return len(pool["clients"])
 
-        return total
+        return self.connection_count
@@ -1,43 +1,95 @@
 """Module containing the base websocket service for other variations to extend upon.
 """
 
-import logging
-from typing import Type
+import functools
+from typing import Callable
 from fastapi import WebSocket, WebSocketDisconnect, WebSocketException
 from starlette.websockets import WebSocketState
 from core.db.enums import WebsocketActionEnum
 from core.exceptions.base import CustomException
+from core.config import config
 from core.exceptions.websocket import (
+    AccessDeniedException,
     ActionNotImplementedException,
+    RateLimitedException,
     SuccessfullConnection,
 )
 from core.helpers.logger import get_logger
-from core.helpers.websocket.schemas.packet import BaseWebsocketPacketSchema
+from core.helpers.websocket.metrics import packets_received, packets_refused
+from core.helpers.websocket.rate_limit import RateLimit, RateLimiter
+from core.helpers.websocket.permission.permission_dependency import (
+    PermList,
+    WebsocketPermission,
+)
+from core.helpers.websocket.permission.permissions import IsAdmin
+from core.helpers.websocket.resume import ResumeEntry
+from core.helpers.websocket.schemas.packet import (
+    BaseWebsocketPacketSchema,
+    GlobalMessagePacketSchema,
+    PacketParser,
+    PoolMessagePacketSchema,
+    base_packet_parser,
+)
 from core.helpers.websocket.manager import WebSocketConnectionManager
 
 
+logger = get_logger(__name__)
+
+
 class BaseWebsocketService:
     def __init__(
         self,
         manager: WebSocketConnectionManager,
-        schema: Type[BaseWebsocketPacketSchema] = BaseWebsocketPacketSchema,
+        parser: PacketParser = base_packet_parser,
         actions: dict = None,
+        rate_limits: dict[str, RateLimit] | None = None,
+        perms: PermList | None = None,
     ) -> None:
         self.manager = manager
-        self.schema = schema
+        self.parser = parser
+        self.permission = WebsocketPermission(*perms) if perms else None
+
+        if rate_limits is None:
+            message_limit = RateLimit(
+                config.WEBSOCKET_MESSAGE_RATE_LIMIT,
+                config.WEBSOCKET_MESSAGE_RATE_BURST,
+            )
+            rate_limits = {
+                WebsocketActionEnum.POOL_MESSAGE.value: message_limit,
+                WebsocketActionEnum.GLOBAL_MESSAGE.value: message_limit,
+            }
+
+        self.rate_limits = rate_limits
 
         if not actions:
-            self.actions = {
+            actions = {
                 WebsocketActionEnum.POOL_MESSAGE.value: self.handle_pool_message,
                 WebsocketActionEnum.GLOBAL_MESSAGE.value: self.handle_global_message,
             }
-        else:
-            self.actions = actions
+
+        self.actions = {
+            action: self.answer_exceptions(func) for action, func in actions.items()
+        }
+
+    def answer_exceptions(self, func: Callable) -> Callable:
+        """Wrap an action so a CustomException it raises is sent back to the client
+        as a status code instead of ending up in the logs of the pool executor."""
+
+        @functools.wraps(func)
+        async def wrapper(websocket: WebSocket, **kwargs):
+            try:
+                return await func(websocket=websocket, **kwargs)
+
+            except CustomException as exc:
+                await self.manager.handle_connection_code(websocket, exc)
+
+        return wrapper
 
     async def handler(
         self,
         websocket: WebSocket,
         pool_id: int,
+        access_token: str | None = None,
         **kwargs,
     ) -> None:
         """The handler for the Websocket protocol.
@@ -46,35 +98,90 @@ class BaseWebsocketService:
             websocket (WebSocket): The websocket connection.
             pool_id (int): The identifiër for which pool the websocket will be
             connected to.
+            access_token (str | None): The access token of the handshake, decoded
+            once and kept on the connection as its claims.
             kwargs: Any extra arguments which will be passed to the functions ran by
             the handler.
         """
-        await self.manager.connect(websocket, pool_id)
+        # Permissions are checked before the upgrade completes, a denied client
+        # never gets an accepted websocket
+        claims = self.manager.decode_claims(access_token)
+
+        exception = await self.manager.check_auth(pool_id, claims, self.permission)
+        if exception:
+            await self.manager.deny(websocket, exception)
+            return
+
+        resume, seq = self.get_resume(websocket, pool_id)
+
+        websocket = await self.manager.connect(
+            websocket,
+            pool_id,
+            resume.number if resume else None,
+            claims,
+        )
         await self.manager.handle_connection_code(websocket, SuccessfullConnection)
+        await self.manager.send_resume_token(websocket, pool_id)
+
+        if resume:
+            # Only after the new connection joined, so the pool never looks empty
+            self.manager.take_over(resume, websocket)
+            await self.handle_resume(websocket, pool_id, resume)
+
+            if not await self.manager.replay(websocket, pool_id, seq):
+                await self.send_snapshot(websocket, pool_id)
+
+        limiter = RateLimiter(self.rate_limits)
 
         try:
             while (
                 websocket.application_state == WebSocketState.CONNECTED
                 and websocket.client_state == WebSocketState.CONNECTED
             ):
+                frame = await websocket.receive_frame()
+
+                # Over the limit frames are dropped before they are parsed
+                if not limiter.allow_frame():
+                    packets_refused.inc("rate_limited")
+                    await self.answer_rate_limited(websocket, limiter)
+                    continue
+
+                # The action is read before the packet is validated, so a packet
+                # over the limit of its action costs no validation
                 try:
-                    packet: self.schema = await self.manager.receive_data(
-                        websocket,
-                        self.schema,
-                    )
+                    action, data = self.parser.read_action(frame)
+
+                    # Receiving anything already counts as a sign of life, so
+                    # heartbeats don't need to go through the pool executor
+                    if action == WebsocketActionEnum.PONG.value:
+                        packets_received.inc(action)
+                        continue
+
+                    if action == WebsocketActionEnum.PING.value:
+                        packets_received.inc(action)
+                        await websocket.send_action(WebsocketActionEnum.PONG)
+                        continue
+
+                    if not limiter.allow(action):
+                        packets_refused.inc("rate_limited")
+                        await self.answer_rate_limited(websocket, limiter)
+                        continue
+
+                    packet = self.parser.validate(action, data)
 
                 except CustomException as exc:
+                    packets_refused.inc("invalid")
                     await self.manager.handle_connection_code(
                         websocket,
                         exc,
                     )
+                    continue
 
-                else:
-                    func = self.actions.get(
-                        packet.action.value,
-                        self.handle_action_not_implemented,
-                    )
+                packets_received.inc(action)
+
+                func = self.actions.get(action, self.handle_action_not_implemented)
 
+                try:
                     await self.manager.queued_run(
                         pool_id=pool_id,
                         func=func,
@@ -83,22 +190,118 @@ class BaseWebsocketService:
                         **kwargs,
                     )
 
+                except CustomException as exc:
+                    await self.manager.handle_connection_code(
+                        websocket,
+                        exc,
+                    )
+
         except WebSocketDisconnect:
             # Check because sometimes the exception is raised
             # but it's already disconnected
             if websocket.client_state == WebSocketState.CONNECTED:
                 await self.manager.disconnect(websocket, pool_id)
 
-            elif websocket.application_state == WebSocketState.CONNECTED:
-                self.manager.remove_websocket(websocket, pool_id)
+        except WebSocketException:
+            logger.exception(
+                "Websocket of pool %s failed", pool_id, extra={"pool_id": pool_id}
+            )
+
+        finally:
+            # Removing is idempotent, this makes sure a connection that was closed
+            # from our side (e.g. evicted) doesn't linger in its pool
+            self.manager.remove_websocket(websocket, pool_id)
+            await self.handle_disconnect(websocket, pool_id)
 
-        except WebSocketException as exc:
-            get_logger(exc)
-            logging.info(self.active_pools)
-            logging.info(f"pool_id {pool_id}, func: {func.__name__}")
-            logging.info(self.active_pools.get(pool_id))
-            logging.exception(exc)
-            print(exc)
+    def get_resume(
+        self,
+        websocket: WebSocket,
+        pool_id: str,
+    ) -> tuple[ResumeEntry | None, int]:
+        """Redeem the resume token a reconnecting client passed as the resume_token
+        query parameter, with the last sequence number it saw as last_seq.
+
+        Returns:
+            tuple[ResumeEntry | None, int]: What the client resumes, if anything,
+            and its last sequence number.
+        """
+        if not (token := websocket.query_params.get("resume_token")):
+            return None, 0
+
+        try:
+            seq = int(websocket.query_params.get("last_seq", ""))
+        except ValueError:
+            # Without a known position only a snapshot can catch the client up
+            seq = -1
+
+        return self.manager.resume_tokens.redeem(token, pool_id), seq
+
+    async def handle_resume(
+        self,
+        websocket: WebSocket,
+        pool_id: str,
+        resume: ResumeEntry,
+    ):
+        """Called when a client resumed its old number, before it is caught up.
+
+        Args:
+            websocket (WebSocket): The new websocket connection of the client.
+            pool_id (str): The pool the connection resumed in.
+            resume (ResumeEntry): What the client resumed.
+
+        Returns:
+            None.
+        """
+        del websocket, pool_id, resume
+
+    async def send_snapshot(
+        self,
+        websocket: WebSocket,
+        pool_id: str,
+    ):
+        """Catch up a resumed client that missed more than can be replayed. The base
+        service has no state of its own, so the snapshot only holds the sequence
+        number to continue from.
+
+        Args:
+            websocket (WebSocket): The websocket connection.
+            pool_id (str): The pool the connection resumed in.
+
+        Returns:
+            None.
+        """
+        await self.manager.personal_packet(
+            websocket,
+            BaseWebsocketPacketSchema(
+                action=WebsocketActionEnum.SNAPSHOT,
+                message="snapshot",
+                payload={"seq": self.manager.get_replay_buffer(pool_id).seq},
+            ),
+        )
+
+    async def answer_rate_limited(
+        self,
+        websocket: WebSocket,
+        limiter: RateLimiter,
+    ):
+        if limiter.should_answer():
+            await self.manager.handle_connection_code(websocket, RateLimitedException)
+
+    async def handle_disconnect(
+        self,
+        websocket: WebSocket,
+        pool_id: str,
+    ):
+        """Called after a connection has left its pool.
+
+        Args:
+            websocket (WebSocket): The websocket connection.
+            pool_id (str): The pool the connection was in.
+
+        Returns:
+            None.
+        """
+        del websocket, pool_id
 
     async def handle_action_not_implemented(
         self,
@@ -122,7 +325,8 @@ class BaseWebsocketService:
 
     async def handle_global_message(
         self,
-        packet: BaseWebsocketPacketSchema,
+        pool_id: str,
+        packet: GlobalMessagePacketSchema,
         websocket: WebSocket,
         **kwargs,
     ):
@@ -130,23 +334,31 @@ class BaseWebsocketService:
         swipe session.
 
         Args:
-            packet (SwipeSessionPacketSchema): WebsocketPacket sent by client.
+            pool_id (str): Identifier of the pool the message was sent from.
+            packet (GlobalMessagePacketSchema): WebsocketPacket sent by client.
             websocket (WebSocket): The websocket connection.
 
+        Raises:
+            AccessDeniedException: When the handshake token of the sender is not
+            one of an admin.
+
         Returns:
             None.
         """
         del kwargs
 
+        if not await IsAdmin().has_permission(pool_id, websocket.claims):
+            raise AccessDeniedException
+
         await self.manager.handle_global_message(
             websocket,
-            packet.payload.get("message"),
+            packet.payload.message if packet.payload else None,
         )
 
     async def handle_pool_message(
         self,
         pool_id: int,
-        packet: BaseWebsocketPacketSchema,
+        packet: PoolMessagePacketSchema,
         websocket: WebSocket,
         **kwargs,
     ):
@@ -154,7 +366,7 @@ class BaseWebsocketService:
 
         Args:
             pool_id (int): Identifier for the pool to send the message to.
-            packet (SwipeSessionPacketSchema): WebsocketPacket sent by client.
+            packet (PoolMessagePacketSchema): WebsocketPacket sent by client.
             websocket (WebSocket): The websocket connection.
 
         Returns:
@@ -165,5 +377,5 @@ class BaseWebsocketService:
         await self.manager.handle_pool_message(
             websocket,
             pool_id,
-            packet.payload.get("message"),
+            packet.payload.message if packet.payload else None,
         )
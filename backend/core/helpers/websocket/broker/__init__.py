@@ -0,0 +1,23 @@
+from core.config import config
+from core.helpers.websocket.broker.base import BaseBroker, GLOBAL_CHANNEL
+from core.helpers.websocket.broker.memory import InProcessBroker, InProcessHub
+from core.helpers.websocket.broker.unix import UnixSocketBroker, UnixSocketHub
+
+
+def get_broker() -> BaseBroker:
+    broker_type = {
+        "memory": InProcessBroker,
+        "unix": UnixSocketBroker,
+    }
+    return broker_type[config.WEBSOCKET_BROKER]()
+
+
+__all__ = [
+    "BaseBroker",
+    "GLOBAL_CHANNEL",
+    "InProcessBroker",
+    "InProcessHub",
+    "UnixSocketBroker",
+    "UnixSocketHub",
+    "get_broker",
+]
@@ -0,0 +1,37 @@
+"""Base broker for sharing pool and global packets between worker processes.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Callable
+
+
+GLOBAL_CHANNEL = "*"
+
+OnMessage = Callable[[str, str, str | None], None]
+
+
+class BaseBroker(ABC):
+    """Carries encoded frames published on one worker to all other workers.
+
+    A frame is published on a channel, which is either a pool id or GLOBAL_CHANNEL.
+    The publishing worker delivers the frame to its own sockets itself, so a broker
+    only has to hand it to the other workers, where on_message is called with the
+    channel, the frame and the packet type.
+    """
+
+    def __init__(self) -> None:
+        self.on_message: OnMessage | None = None
+
+    async def start(self, on_message: OnMessage) -> None:
+        self.on_message = on_message
+
+    async def stop(self) -> None:
+        self.on_message = None
+
+    @abstractmethod
+    async def publish(self, channel: str, frame: str, key: str | None = None) -> None:
+        del channel, frame, key
+
+    def deliver(self, channel: str, frame: str, key: str | None = None) -> None:
+        if self.on_message:
+            self.on_message(channel, frame, key)
@@ -0,0 +1,33 @@
+"""In-process broker.
+
+The default for a single worker. Several brokers can share one InProcessHub, which
+lets multiple managers in the same process behave like separate workers.
+"""
+
+from core.helpers.websocket.broker.base import BaseBroker
+
+
+class InProcessHub:
+    def __init__(self) -> None:
+        self.brokers: list["InProcessBroker"] = []
+
+
+class InProcessBroker(BaseBroker):
+    def __init__(self, hub: InProcessHub | None = None) -> None:
+        super().__init__()
+        self.hub = hub or InProcessHub()
+
+    async def start(self, on_message) -> None:
+        await super().start(on_message)
+        self.hub.brokers.append(self)
+
+    async def stop(self) -> None:
+        if self in self.hub.brokers:
+            self.hub.brokers.remove(self)
+
+        await super().stop()
+
+    async def publish(self, channel: str, frame: str, key: str | None = None) -> None:
+        for broker in self.hub.brokers:
+            if broker is not self:
+                broker.deliver(channel, frame, key)
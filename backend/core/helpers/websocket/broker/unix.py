@@ -0,0 +1,295 @@
+"""Broker over a Unix socket hub.
+
+The hub is a small relay every worker connects to. Each published message is one
+line of JSON which the hub writes to every other connected worker. Every
+connection gets a bounded queue of lines with its own writer, so a worker that
+reads slowly never holds up the others, lines that don't fit are dropped. A worker
+that loses the hub keeps connecting again until it is back.
+
+Only frames cross workers, state of a pool doesn't: the numbers of its clients, its
+executor and its quiz session live in the worker its clients connected to. Clients
+of one pool must therefore all reach the same worker, e.g. by a proxy that routes
+on the pool id in the path. Until such routing exists main.py refuses to start more
+than one worker.
+
+Usage:
+    python -m core.helpers.websocket.broker.unix
+
+Options:
+    --path : the Unix socket path to listen on
+"""
+
+import asyncio
+import os
+import socket
+import time
+from typing import AsyncIterator
+
+import click
+import orjson
+
+from core.config import config
+from core.helpers.logger import get_logger
+from core.helpers.websocket.broker.base import BaseBroker
+
+
+LINE_LIMIT = 2**24
+
+logger = get_logger(__name__)
+drop_logger = get_logger(__name__, sample_every=config.LOG_SAMPLE_EVERY)
+
+
+async def read_lines(reader: asyncio.StreamReader) -> AsyncIterator[bytes]:
+    """Read lines until the stream ends or the connection is lost. A line over
+    LINE_LIMIT is skipped, what is left of it shows up as a malformed line."""
+    while True:
+        try:
+            line = await reader.readline()
+        except ValueError:
+            drop_logger.warning("Unix socket broker skipped a line over the limit")
+            continue
+        except (ConnectionError, asyncio.IncompleteReadError):
+            return
+
+        if not line:
+            return
+
+        yield line
+
+
+class LineWriter:
+    """Writes lines to a stream from a bounded queue, draining the stream after
+    every batch. A line is dropped when the queue is full."""
+
+    def __init__(
+        self,
+        writer: asyncio.StreamWriter,
+        max_lines: int = config.WEBSOCKET_BROKER_QUEUE_SIZE,
+    ) -> None:
+        self.writer = writer
+        self.queue: asyncio.Queue[bytes] = asyncio.Queue(max_lines)
+        self.dropped = 0
+        self.task = asyncio.ensure_future(self._write())
+
+    def write(self, line: bytes) -> bool:
+        """Queue a line.
+
+        Returns:
+            bool: Whether the line was queued, False when it was dropped.
+        """
+        try:
+            self.queue.put_nowait(line)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            drop_logger.warning(
+                "Unix socket broker queue is full, dropping message",
+                extra={"dropped": self.dropped},
+            )
+            return False
+
+        return True
+
+    def close(self) -> None:
+        self.task.cancel()
+        self.writer.close()
+
+    async def _write(self) -> None:
+        try:
+            while True:
+                self.writer.write(await self.queue.get())
+
+                while not self.queue.empty():
+                    self.writer.write(self.queue.get_nowait())
+
+                await self.writer.drain()
+
+        except ConnectionError:
+            # The reading side of the connection notices as well and cleans up
+            pass
+
+
+class UnixSocketHub:
+    def __init__(self, path: str = config.WEBSOCKET_BROKER_PATH) -> None:
+        self.path = path
+        self.peers: set[LineWriter] = set()
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        self.server = await asyncio.start_unix_server(
+            self._handle,
+            self.path,
+            limit=LINE_LIMIT,
+        )
+
+    async def stop(self) -> None:
+        for peer in list(self.peers):
+            peer.close()
+
+        # Let the connection handlers see the end of their stream and return
+        await asyncio.sleep(0)
+
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def serve(self) -> None:
+        await self.start()
+
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def _handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        peer = LineWriter(writer)
+        self.peers.add(peer)
+
+        try:
+            async for line in read_lines(reader):
+                for other in self.peers:
+                    if other is not peer:
+                        other.write(line)
+
+        finally:
+            self.peers.discard(peer)
+            peer.close()
+
+
+class UnixSocketBroker(BaseBroker):
+    def __init__(
+        self,
+        path: str = config.WEBSOCKET_BROKER_PATH,
+        reconnect_delay: float = config.WEBSOCKET_BROKER_RECONNECT_DELAY,
+    ) -> None:
+        super().__init__()
+        self.path = path
+        self.reconnect_delay = reconnect_delay
+        self.writer: LineWriter | None = None
+        self.reader_task: asyncio.Task | None = None
+
+    async def start(self, on_message) -> None:
+        await super().start(on_message)
+
+        reader = await self._connect()
+        self.reader_task = asyncio.ensure_future(self._run(reader))
+
+    async def stop(self) -> None:
+        if self.reader_task:
+            self.reader_task.cancel()
+            self.reader_task = None
+
+        self._disconnect()
+        await super().stop()
+
+    async def publish(self, channel: str, frame: str, key: str | None = None) -> None:
+        if self.writer is None:
+            drop_logger.warning("Unix socket broker is not connected, dropping message")
+            return
+
+        self.writer.write(orjson.dumps([channel, key, frame]) + b"\n")
+
+    async def _connect(self) -> asyncio.StreamReader:
+        reader, writer = await asyncio.open_unix_connection(
+            self.path,
+            limit=LINE_LIMIT,
+        )
+        self.writer = LineWriter(writer)
+        return reader
+
+    def _disconnect(self) -> None:
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    async def _run(self, reader: asyncio.StreamReader) -> None:
+        """Read from the hub, connecting again whenever the connection is lost."""
+        while True:
+            try:
+                await self._read(reader)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Unix socket broker reader failed")
+
+            logger.warning("Unix socket broker lost the connection to the hub")
+            self._disconnect()
+            reader = await self._reconnect()
+
+    async def _reconnect(self) -> asyncio.StreamReader:
+        delay = self.reconnect_delay
+
+        while True:
+            await asyncio.sleep(delay)
+
+            try:
+                reader = await self._connect()
+            except OSError:
+                delay = min(delay * 2, config.WEBSOCKET_BROKER_RECONNECT_MAX_DELAY)
+                continue
+
+            logger.info("Unix socket broker reconnected to the hub")
+            return reader
+
+    async def _read(self, reader: asyncio.StreamReader) -> None:
+        async for line in read_lines(reader):
+            self._deliver_line(line)
+
+    def _deliver_line(self, line: bytes) -> None:
+        """Deliver a line from the hub, a bad line or a failing delivery only costs
+        that one frame."""
+        try:
+            channel, key, frame = orjson.loads(line)
+        except (ValueError, TypeError):
+            drop_logger.warning("Unix socket broker skipped a malformed line")
+            return
+
+        try:
+            self.deliver(channel, frame, key)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception(
+                "Unix socket broker failed to deliver a frame of %s",
+                channel,
+                extra={"channel": channel},
+            )
+
+
+def wait_for_hub(
+    path: str = config.WEBSOCKET_BROKER_PATH,
+    timeout: float = config.WEBSOCKET_BROKER_STARTUP_TIMEOUT,
+) -> None:
+    """Block until a hub accepts connections on a path, so workers started after
+    this can connect to it right away.
+
+    Raises:
+        TimeoutError: When no hub accepted a connection within the timeout.
+    """
+    deadline = time.monotonic() + timeout
+
+    while True:
+        with socket.socket(socket.AF_UNIX) as probe:
+            try:
+                probe.connect(path)
+                return
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"No websocket broker hub on {path}") from None
+
+        time.sleep(0.05)
+
+
+def run_hub(path: str = config.WEBSOCKET_BROKER_PATH) -> None:
+    """Run a hub until the process is stopped."""
+    asyncio.run(UnixSocketHub(path).serve())
+
+
+@click.command()
+@click.option("--path", default=config.WEBSOCKET_BROKER_PATH)
+def main(path: str):
+    run_hub(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Wire formats of websocket packets.
+
+A client picks its format with the Sec-WebSocket-Protocol header, JSON text frames
+are the default and MessagePack binary frames the alternative. Packets are encoded
+to JSON once, which is also what the broker carries between workers, and only
+transcoded when a connection speaks MessagePack.
+"""
+
+from typing import Any, Iterable
+
+import msgpack
+import orjson
+
+from core.db.enums import WebsocketProtocolEnum
+from core.exceptions.websocket import JSONSerializableException
+
+
+Frame = str | bytes
+
+
+def negotiate_protocol(offered: Iterable[str]) -> WebsocketProtocolEnum | None:
+    """Pick the first subprotocol offered by the client that we speak.
+
+    Args:
+        offered (Iterable[str]): The subprotocols from the handshake, in order of
+        preference of the client.
+
+    Returns:
+        WebsocketProtocolEnum | None: The protocol to accept with, None when the
+        client offered none we speak.
+    """
+    for subprotocol in offered:
+        try:
+            return WebsocketProtocolEnum(subprotocol.strip().lower())
+        except ValueError:
+            continue
+
+    return None
+
+
+def encode_frame(data: Any, protocol: WebsocketProtocolEnum) -> Frame:
+    if protocol == WebsocketProtocolEnum.MSGPACK:
+        return msgpack.packb(data)
+
+    return orjson.dumps(data).decode()
+
+
+def transcode_frame(frame: str, protocol: WebsocketProtocolEnum) -> Frame:
+    """Turn an encoded JSON frame into a frame of another protocol."""
+    if protocol == WebsocketProtocolEnum.JSON:
+        return frame
+
+    return encode_frame(orjson.loads(frame), protocol)
+
+
+def decode_frame(frame: Frame) -> dict[str, Any]:
+    """Decode a received frame, binary frames are MessagePack and text frames JSON.
+
+    Raises:
+        JSONSerializableException: When the frame can not be decoded to an object.
+    """
+    try:
+        if isinstance(frame, bytes):
+            data = msgpack.unpackb(frame)
+        else:
+            data = orjson.loads(frame)
+
+    except (ValueError, msgpack.UnpackException) as exc:
+        raise JSONSerializableException from exc
+
+    if not isinstance(data, dict):
+        raise JSONSerializableException
+
+    return data
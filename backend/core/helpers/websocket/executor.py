@@ -0,0 +1,187 @@
+"""Per pool serialized executor.
+
+Every pool gets its own mailbox and worker task. Actions for a pool run one after
+the other in the order they were submitted, so pool state never needs a lock, while
+the workers of different pools run concurrently.
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Coroutine, TypedDict
+
+from core.config import config
+from core.exceptions.websocket import MailboxFullException
+from core.helpers.logger import get_logger
+from core.helpers.loop_monitor import loop_monitor
+
+
+logger = get_logger(__name__)
+slow_action_logger = get_logger(__name__, sample_every=config.LOG_SAMPLE_EVERY)
+
+Action = Callable[..., Coroutine[Any, Any, Any]]
+
+
+def get_action_name(func: Action) -> str:
+    return getattr(func, "__name__", repr(func))
+
+
+class ActionStats(TypedDict):
+    count: int
+    total: float
+    max: float
+
+
+class PoolExecutor:
+    def __init__(
+        self,
+        max_mailbox_size: int = config.WEBSOCKET_MAILBOX_SIZE,
+        slow_action_threshold: float = config.WEBSOCKET_SLOW_ACTION_THRESHOLD,
+    ) -> None:
+        self.max_mailbox_size = max_mailbox_size
+        self.slow_action_threshold = slow_action_threshold
+
+        self.mailboxes: dict[str, asyncio.Queue] = {}
+        self.workers: dict[str, asyncio.Task] = {}
+        self.action_stats: dict[str, ActionStats] = {}
+        self.slow_actions = 0
+
+    def submit(
+        self,
+        pool_id: str,
+        func: Action,
+        /,
+        **kwargs,
+    ) -> asyncio.Future:
+        """Put an action in the mailbox of a pool.
+
+        Args:
+            pool_id (str): The pool to run the action for.
+            func (Action): The coroutine function to run.
+            kwargs: The arguments to call the function with.
+
+        Raises:
+            MailboxFullException: When the mailbox of the pool is at its limit.
+
+        Returns:
+            asyncio.Future: Resolves with the result of the action once it has run.
+        """
+        mailbox = self.mailboxes.get(pool_id)
+
+        if mailbox is None:
+            mailbox = asyncio.Queue()
+            self.mailboxes[pool_id] = mailbox
+            self.workers[pool_id] = asyncio.ensure_future(
+                self._work(pool_id, mailbox)
+            )
+
+        if mailbox.qsize() >= self.max_mailbox_size:
+            raise MailboxFullException
+
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve_exception)
+        mailbox.put_nowait((func, kwargs, future))
+
+        return future
+
+    def close(self, pool_id: str) -> None:
+        """Let the worker of a pool finish its mailbox and stop.
+
+        The mailbox and worker stay registered until the mailbox is drained, so an
+        action submitted in the meantime still runs on the same worker, after the
+        ones before it.
+        """
+        if (mailbox := self.mailboxes.get(pool_id)) is None:
+            return
+
+        mailbox.put_nowait(None)
+
+    async def shutdown(self) -> None:
+        """Stop all workers and wait for them to finish."""
+        workers = list(self.workers.values())
+
+        for pool_id in list(self.mailboxes):
+            self.close(pool_id)
+
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    def get_mailbox_depth(self, pool_id: str | None = None) -> int:
+        if pool_id:
+            mailbox = self.mailboxes.get(pool_id)
+            return mailbox.qsize() if mailbox else 0
+
+        return sum(mailbox.qsize() for mailbox in self.mailboxes.values())
+
+    async def _work(self, pool_id: str, mailbox: asyncio.Queue) -> None:
+        closing = False
+
+        try:
+            while not (closing and mailbox.empty()):
+                if (item := await mailbox.get()) is None:
+                    closing = True
+                    continue
+
+                await self._run(pool_id, *item)
+
+        finally:
+            # Nothing can be submitted between the last check of the mailbox and
+            # this, so the next action of the pool gets a new worker
+            if self.mailboxes.get(pool_id) is mailbox:
+                del self.mailboxes[pool_id]
+                del self.workers[pool_id]
+
+    async def _run(
+        self,
+        pool_id: str,
+        func: Action,
+        kwargs: dict[str, Any],
+        future: asyncio.Future,
+    ) -> None:
+        start = time.perf_counter()
+
+        try:
+            with loop_monitor.activity(get_action_name(func), pool_id):
+                result = await func(**kwargs)
+
+        except asyncio.CancelledError:
+            future.cancel()
+
+            # Only stop the worker when it is cancelled itself, a cancelled
+            # action shouldn't take the rest of the pool down with it
+            if asyncio.current_task().cancelling():
+                raise
+
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            if not future.done():
+                future.set_exception(exc)
+
+        else:
+            if not future.done():
+                future.set_result(result)
+
+        finally:
+            self._record(pool_id, func, time.perf_counter() - start)
+
+    def _record(self, pool_id: str, func: Action, duration: float) -> None:
+        name = get_action_name(func)
+
+        stats = self.action_stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+        stats["count"] += 1
+        stats["total"] += duration
+        stats["max"] = max(stats["max"], duration)
+
+        if duration > self.slow_action_threshold:
+            self.slow_actions += 1
+            slow_action_logger.warning(
+                "Slow websocket action %s in pool %s: %.3fs",
+                name,
+                pool_id,
+                duration,
+                extra={"action": name, "pool_id": pool_id, "duration": duration},
+            )
+
+
+def _retrieve_exception(future: asyncio.Future) -> None:
+    if future.cancelled() or (exc := future.exception()) is None:
+        return
+
+    logger.error("Websocket action failed", exc_info=exc)
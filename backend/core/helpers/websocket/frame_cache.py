@@ -0,0 +1,108 @@
+"""Cache of pre-encoded control frames.
+
+The status codes sent to clients are static, a frame only depends on the class of
+the ConnectionCode or CustomException. They are encoded once per class and protocol
+and sending one is only a write of the cached frame. The same goes for bare packets
+of an action without a payload, such as PING.
+"""
+
+from typing import Type
+
+from core.db.enums import WebsocketActionEnum, WebsocketProtocolEnum
+from core.exceptions.base import CustomException
+from core.exceptions.websocket import ConnectionCode
+from core.helpers.websocket.codec import Frame, transcode_frame
+from core.helpers.websocket.schemas.packet import (
+    BaseWebsocketPacketSchema,
+    encode_packet,
+)
+
+
+StatusCode = (
+    CustomException | ConnectionCode | Type[CustomException] | Type[ConnectionCode]
+)
+
+
+def encode_status_code(exception: StatusCode) -> str:
+    return encode_packet(
+        BaseWebsocketPacketSchema(
+            action=WebsocketActionEnum.STATUS_CODE,
+            status_code=exception.status_code,
+            message=exception.message,
+            payload=None,
+        )
+    )
+
+
+def get_subclasses(cls: type) -> list[type]:
+    subclasses = []
+
+    for subclass in cls.__subclasses__():
+        subclasses.append(subclass)
+        subclasses.extend(get_subclasses(subclass))
+
+    return subclasses
+
+
+class FrameCache:
+    def __init__(self) -> None:
+        self.status_frames: dict[tuple[type, WebsocketProtocolEnum], Frame] = {}
+        self.action_frames: dict[
+            tuple[WebsocketActionEnum, WebsocketProtocolEnum], Frame
+        ] = {}
+
+    def warm(self) -> None:
+        """Encode the frames of every status code class imported so far."""
+        for cls in (
+            CustomException,
+            *get_subclasses(CustomException),
+            *get_subclasses(ConnectionCode),
+        ):
+            for protocol in WebsocketProtocolEnum:
+                self.status_frame(cls, protocol)
+
+    def status_frame(
+        self,
+        exception: StatusCode,
+        protocol: WebsocketProtocolEnum = WebsocketProtocolEnum.JSON,
+    ) -> Frame:
+        """Get the frame of a status code.
+
+        Args:
+            exception (StatusCode): The status code, either the class or an instance.
+            protocol (WebsocketProtocolEnum): The protocol to encode the frame for.
+
+        Returns:
+            Frame: The encoded frame. Instances with a message of their own are
+            encoded on every call, those are not static.
+        """
+        cls = exception if isinstance(exception, type) else type(exception)
+
+        if exception is not cls and (
+            exception.status_code != cls.status_code
+            or exception.message != cls.message
+        ):
+            return transcode_frame(encode_status_code(exception), protocol)
+
+        if (frame := self.status_frames.get((cls, protocol))) is None:
+            frame = transcode_frame(encode_status_code(cls), protocol)
+            self.status_frames[(cls, protocol)] = frame
+
+        return frame
+
+    def action_frame(
+        self,
+        action: WebsocketActionEnum,
+        protocol: WebsocketProtocolEnum = WebsocketProtocolEnum.JSON,
+    ) -> Frame:
+        """Get the frame of a bare packet of an action, with the lowercase action as
+        message and no payload."""
+        if (frame := self.action_frames.get((action, protocol))) is None:
+            packet = BaseWebsocketPacketSchema(action=action, message=action.lower())
+            frame = transcode_frame(encode_packet(packet), protocol)
+            self.action_frames[(action, protocol)] = frame
+
+        return frame
+
+
+frame_cache = FrameCache()
@@ -0,0 +1,112 @@
+"""Application level heartbeat of websocket connections.
+
+A half-open connection, e.g. of a phone that lost its signal, is only noticed by a
+failing receive once the kernel gives up on it. Until then it stays in its pool and
+gets every broadcast. One sweeper task per process goes over all connections every
+interval instead: a connection that sent nothing since the last sweep gets a PING,
+and one that stays silent for more sweeps than the miss budget is evicted.
+"""
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+from core.config import config
+from core.db.enums import WebsocketActionEnum
+from core.helpers.logger import get_logger
+from core.helpers.websocket.frame_cache import frame_cache
+from core.helpers.websocket.websocket import WS_4009_UNRESPONSIVE, WebSocketConnection
+
+if TYPE_CHECKING:
+    from core.helpers.websocket.manager import WebSocketConnectionManager
+
+
+logger = get_logger(__name__)
+
+
+class Heartbeat:
+    def __init__(
+        self,
+        manager: "WebSocketConnectionManager",
+        interval: float = config.WEBSOCKET_HEARTBEAT_INTERVAL,
+        misses: int = config.WEBSOCKET_HEARTBEAT_MISSES,
+    ) -> None:
+        """
+        Args:
+            manager (WebSocketConnectionManager): The manager of the connections.
+            interval (float): Seconds between sweeps.
+            misses (int): Amount of sweeps a connection may stay silent for before
+            it is evicted.
+        """
+        self.manager = manager
+        self.interval = interval
+        self.misses = misses
+
+        self.sweeper: asyncio.Task | None = None
+        self.reaped = 0
+
+    def start(self) -> None:
+        if self.sweeper is None or self.sweeper.done():
+            self.sweeper = asyncio.ensure_future(self._sweep_forever())
+
+    async def stop(self) -> None:
+        if self.sweeper is None:
+            return
+
+        self.sweeper.cancel()
+
+        try:
+            await self.sweeper
+        except asyncio.CancelledError:
+            pass
+
+        self.sweeper = None
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+
+            try:
+                await self.sweep()
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Websocket heartbeat sweep failed")
+
+    async def sweep(self) -> None:
+        """Ping the connections that were silent since the last sweep, and evict
+        the ones that used up their miss budget."""
+        silent_since = time.monotonic() - self.interval
+        unresponsive: list[tuple[str, WebSocketConnection]] = []
+
+        for pool_id, pool in list(self.manager.active_pools.items()):
+            for client in pool["clients"].values():
+                websocket = client["ws"]
+
+                if websocket.last_seen > silent_since:
+                    continue
+
+                if websocket.missed_heartbeats >= self.misses:
+                    unresponsive.append((pool_id, websocket))
+                    continue
+
+                websocket.missed_heartbeats += 1
+                websocket.enqueue(
+                    frame_cache.action_frame(
+                        WebsocketActionEnum.PING,
+                        websocket.protocol,
+                    ),
+                    WebsocketActionEnum.PING.value,
+                )
+
+        for pool_id, websocket in unresponsive:
+            await self.reap(websocket, pool_id)
+
+    async def reap(self, websocket: WebSocketConnection, pool_id: str) -> None:
+        """Evict an unresponsive connection and tell the rest of its pool."""
+        client = self.manager.active_pools.get_client(websocket)
+
+        websocket.evict(WS_4009_UNRESPONSIVE, "heartbeat timeout")
+        self.manager.remove_websocket(websocket, pool_id)
+        self.reaped += 1
+
+        if client and self.manager.active_pools.get(pool_id):
+            await self.manager.user_disconnect(pool_id, client["number"])
@@ -1,34 +1,115 @@
-from typing import Any, Type
+import asyncio
+import time
+from typing import Any, Iterable, TypedDict
 
-from core.exceptions.websocket import AccessDeniedException
-from core.helpers.websocket.active_pools import ActivePools
+from core.config import config
+from core.db.enums import WebsocketActionEnum, WebsocketProtocolEnum
+from core.exceptions.websocket import (
+    AccessDeniedException,
+    ConnectionCode,
+    NoMessageException,
+)
+from core.helpers.websocket.active_pools import ActivePools, ClientConnection
+from core.helpers.websocket.broker import GLOBAL_CHANNEL, BaseBroker, get_broker
+from core.helpers.websocket.codec import Frame, negotiate_protocol, transcode_frame
+from core.helpers.websocket.executor import Action, PoolExecutor
+from core.helpers.websocket.frame_cache import frame_cache
+from core.helpers.websocket.heartbeat import Heartbeat
+from core.helpers.websocket.metrics import fan_out_frames, fan_out_seconds
+from core.helpers.websocket.resume import ReplayBuffer, ResumeEntry, ResumeTokens
 from core.exceptions.base import CustomException
+from core.helpers.logger import get_logger
+from core.helpers.token.token_helper import TokenHelper
 from core.helpers.websocket.permission.permission_dependency import (
+    Claims,
     WebsocketPermission,
     PermItem,
 )
-from core.helpers.websocket.schemas.packet import BaseWebsocketPacketSchema
-from core.helpers.websocket.websocket import WebSocketConnection
-from fastapi import status
+from core.helpers.websocket.permission.permissions import AllowAll
+from core.helpers.websocket.schemas.packet import (
+    BaseWebsocketPacketSchema,
+    PacketParser,
+    encode_packet,
+)
+from core.helpers.websocket.websocket import (
+    WS_4010_RESUMED_ELSEWHERE,
+    QueueStats,
+    WebSocketConnection,
+)
+from fastapi import WebSocket, status
+
+
+logger = get_logger(__name__)
+eviction_logger = get_logger(__name__, sample_every=config.LOG_SAMPLE_EVERY)
+
+
+class FanOutReport(TypedDict):
+    queued: int
+    evicted: int
 
 
 class WebSocketConnectionManager:
-    def __init__(self, *perms: PermItem):
+    def __init__(self, *perms: PermItem, broker: BaseBroker | None = None):
         self.active_pools = ActivePools()
-        self.perms = perms
+        self.executor = PoolExecutor()
+        self.broker = broker or get_broker()
+        # Without a permission expression every handshake is allowed
+        self.perms = perms or (AllowAll,)
+        self.permission = WebsocketPermission(*self.perms)
+        self.evicted = 0
+        self.missed_deadlines = 0
+        self.heartbeat = Heartbeat(self)
+        self.replay_buffers: dict[str, ReplayBuffer] = {}
+        self.resume_tokens = ResumeTokens()
+
+    async def start(self) -> None:
+        """Connect to the broker, to receive packets published by other workers,
+        encode the status code frames up front and start the heartbeat."""
+        frame_cache.warm()
+        await self.broker.start(self.local_fan_out)
+        self.heartbeat.start()
+
+    async def stop(self) -> None:
+        await self.heartbeat.stop()
+        await self.broker.stop()
+        await self.executor.shutdown()
+
+    @staticmethod
+    def decode_claims(access_token: str | None) -> Claims | None:
+        """Decode the access token of a handshake, once for the whole connection.
+
+        Returns:
+            Claims | None: The claims of the token, None when there is no token or
+            it is invalid or expired.
+        """
+        if not access_token:
+            return None
+
+        try:
+            return TokenHelper.decode(token=access_token)
+
+        except CustomException:
+            return None
 
     async def check_auth(
         self,
-        *perms: PermItem,
-        **kwargs,
-    ):
-        if not perms:
-            perms = self.perms
+        pool_id: str,
+        claims: Claims | None,
+        permission: WebsocketPermission | None = None,
+    ) -> CustomException | None:
+        """Evaluate the permissions of a handshake, before the websocket is accepted.
 
-        perm_checker = WebsocketPermission(perms)
+        Args:
+            pool_id (str): The pool the websocket wants to join.
+            claims (Claims | None): The decoded access token, see decode_claims.
+            permission (WebsocketPermission | None): The compiled permission
+            expression, the one of the manager when left out.
 
+        Returns:
+            CustomException | None: Why access is denied, None when it is granted.
+        """
         try:
-            await perm_checker(**kwargs)
+            await (permission or self.permission)(pool_id, claims)
 
         except CustomException as exc:
             return exc
@@ -37,12 +118,96 @@ class WebSocketConnectionManager:
 
     async def connect(
         self,
-        websocket: WebSocketConnection,
+        websocket: WebSocket,
         pool_id: str,
+        number: int | None = None,
+        claims: Claims | None = None,
     ) -> WebSocketConnection:
-        await websocket.accept()
-        self.active_pools.append(pool_id, websocket)
-        return websocket
+        """Accept a websocket with the subprotocol it asked for, if we speak it, and
+        add it to a pool.
+
+        Args:
+            websocket (WebSocket): The websocket.
+            pool_id (str): The pool to add it to.
+            number (int | None): The number of a client that resumes.
+            claims (Claims | None): The claims decoded during the handshake, kept on
+            the connection for the handlers.
+
+        Returns:
+            WebSocketConnection: The connection wrapping the websocket.
+        """
+        connection = WebSocketConnection(websocket)
+        connection.claims = claims
+        connection.on_missed_deadline = self.remove_missed_deadline
+        protocol = negotiate_protocol(websocket.scope.get("subprotocols", []))
+
+        await connection.accept(protocol.value if protocol else None)
+        connection.start_writer()
+
+        buffer = self.get_replay_buffer(pool_id)
+        buffer.idle_since = None
+
+        if pool_id not in self.active_pools:
+            self.active_pools.create(pool_id, buffer.numbers)
+
+        self.active_pools.append(pool_id, connection, number)
+        buffer.numbers = self.active_pools[pool_id]["amount"]
+        return connection
+
+    def get_replay_buffer(self, pool_id: str) -> ReplayBuffer:
+        if (buffer := self.replay_buffers.get(pool_id)) is None:
+            buffer = self.replay_buffers[pool_id] = ReplayBuffer()
+
+        return buffer
+
+    async def send_resume_token(
+        self,
+        websocket: WebSocketConnection,
+        pool_id: str,
+    ) -> None:
+        """Issue a resume token to a connection and send it, together with its number
+        and the sequence number it is at."""
+        client = self.active_pools.get_client(websocket)
+        token = self.resume_tokens.issue(pool_id, client["number"], websocket.id)
+
+        await self.personal_packet(
+            websocket,
+            BaseWebsocketPacketSchema(
+                action=WebsocketActionEnum.RESUME,
+                message="resume token",
+                payload={
+                    "token": token,
+                    "number": client["number"],
+                    "seq": self.get_replay_buffer(pool_id).seq,
+                },
+            ),
+        )
+
+    async def replay(
+        self,
+        websocket: WebSocketConnection,
+        pool_id: str,
+        seq: int,
+    ) -> bool:
+        """Send a resumed connection the pool packets it missed.
+
+        Args:
+            websocket (WebSocketConnection): The resumed connection.
+            pool_id (str): The pool of the connection.
+            seq (int): The last sequence number the client saw.
+
+        Returns:
+            bool: False when the client missed more than the replay buffer holds,
+            it needs a snapshot instead.
+        """
+        missed = self.get_replay_buffer(pool_id).since(seq)
+        if missed is None:
+            return False
+
+        for key, frame in missed:
+            await websocket.send_frame(frame, key)
+
+        return True
 
     async def send_data(
         self,
@@ -51,22 +216,30 @@ class WebSocketConnectionManager:
     ) -> None:
         return await websocket.send(data)
 
+    async def send_frame(
+        self,
+        websocket: WebSocketConnection,
+        frame: str,
+    ) -> None:
+        return await websocket.send_frame(frame)
+
     async def receive_data(
         self,
         websocket: WebSocketConnection,
-        schema: Type[BaseWebsocketPacketSchema],
+        parser: PacketParser,
         timeout: float | None = None,
     ) -> BaseWebsocketPacketSchema | None:
-        return await websocket.listen(schema, timeout)
+        return await websocket.listen(parser, timeout)
 
     async def deny(
         self,
-        websocket: WebSocketConnection,
+        websocket: WebSocket,
         exception: CustomException = AccessDeniedException(),
     ) -> None:
-        await websocket.accept()
-        await websocket.status_code(exception)
-        await websocket.close(status.WS_1000_NORMAL_CLOSURE)
+        """Refuse a websocket during the handshake. It is closed without ever being
+        accepted, so the upgrade is answered with HTTP 403 and no connection is set
+        up only to be torn down again."""
+        await websocket.close(status.WS_1008_POLICY_VIOLATION, exception.message)
 
     def remove_websocket(
         self,
@@ -74,6 +247,89 @@ class WebSocketConnectionManager:
         pool_id: str,
     ):
         self.active_pools.remove(pool_id, websocket)
+        self.resume_tokens.release(websocket.id)
+        websocket.stop()
+
+        if self.active_pools.get_connection_count(pool_id) < 1:
+            self.executor.close(pool_id)
+            self.release_replay_buffer(pool_id)
+
+    def take_over(
+        self,
+        resume: ResumeEntry,
+        websocket: WebSocketConnection,
+    ) -> None:
+        """Evict the old connection of a resumed client when it is still in its
+        pool, its number now belongs to the connection that resumed.
+
+        Args:
+            resume (ResumeEntry): What the client resumed.
+            websocket (WebSocketConnection): The connection that resumed.
+        """
+        if not resume.connected or not (pool := self.active_pools.get(resume.pool_id)):
+            return
+
+        client = pool["clients"].get(resume.connection_id)
+        if client is None or client["ws"] is websocket:
+            return
+
+        old = client["ws"]
+        old.evict(WS_4010_RESUMED_ELSEWHERE, "resumed elsewhere")
+        self.remove_websocket(old, resume.pool_id)
+
+    def remove_evicted(self, websocket: WebSocketConnection) -> None:
+        """Tear down a connection evicted during a fan out the same way as one that
+        left its pool. The rest of the pool is told in the background, since a fan
+        out doesn't wait on sending."""
+        if (pool_id := self.active_pools.get_pool_id(websocket)) is None:
+            return
+
+        client = self.active_pools.get_client(websocket)
+        self.remove_websocket(websocket, pool_id)
+
+        if client and self.active_pools.get(pool_id):
+            asyncio.ensure_future(self.user_disconnect(pool_id, client["number"]))
+
+    def remove_missed_deadline(self, websocket: WebSocketConnection) -> None:
+        """Tear down a connection its writer evicted for missing the send timeout,
+        right away instead of on the next fan out that reaches it."""
+        self.missed_deadlines += 1
+        self.remove_evicted(websocket)
+
+    def release_replay_buffer(self, pool_id: str) -> None:
+        """Keep the replay buffer of an empty pool for as long as its clients may
+        resume, and drop the buffers of pools that have been empty for longer."""
+        now = time.monotonic()
+
+        if buffer := self.replay_buffers.get(pool_id):
+            buffer.idle_since = now
+
+        expired = now - self.resume_tokens.ttl
+        for idle_pool_id, buffer in list(self.replay_buffers.items()):
+            if buffer.idle_since is not None and buffer.idle_since < expired:
+                del self.replay_buffers[idle_pool_id]
+
+    async def queued_run(
+        self,
+        pool_id: str,
+        func: Action,
+        **kwargs,
+    ) -> asyncio.Future:
+        """Queue an action on the executor of a pool. Actions of the same pool run
+        one at a time in the order they were queued.
+
+        Args:
+            pool_id (str): The pool the action belongs to.
+            func (Action): The coroutine function to run, it will be called with the
+            pool_id and the given kwargs.
+
+        Raises:
+            MailboxFullException: When the pool has too many actions waiting.
+
+        Returns:
+            asyncio.Future: Resolves once the action has run.
+        """
+        return self.executor.submit(pool_id, func, pool_id=pool_id, **kwargs)
 
     async def disconnect(
         self,
@@ -90,41 +346,233 @@ class WebSocketConnectionManager:
         pool = self.active_pools.get(pool_id)
 
         if not pool:
-            print("Tried to disconnect from non existing pool")
-            print(f"pool_id: {pool_id}", pool_id)
-            print(f"manager object: {self.__dict__}")
+            logger.warning(
+                "Tried to disconnect from non existing pool %s",
+                pool_id,
+                extra={"pool_id": pool_id},
+            )
             return
 
-        connections = [ws for ws in pool["clients"]]
+        connections = list(pool["clients"].values())
 
         for client in connections:
-            await self.disconnect(client["websocket"], pool_id)
+            await self.disconnect(client["ws"], pool_id)
+
+    async def user_disconnect(self, pool_id: str, number: int) -> None:
+        await self.pool_packet(
+            pool_id,
+            BaseWebsocketPacketSchema(
+                action=WebsocketActionEnum.USER_DISCONNECT,
+                message="user disconnected",
+                payload={"number": number},
+            ),
+        )
+
+    async def handle_connection_code(
+        self,
+        websocket: WebSocketConnection,
+        exception: CustomException | ConnectionCode,
+    ) -> None:
+        await websocket.status_code(exception)
+
+    async def handle_pool_message(
+        self,
+        websocket: WebSocketConnection,
+        pool_id: str,
+        message: str | None,
+    ) -> None:
+        if not message:
+            await self.handle_connection_code(websocket, NoMessageException)
+            return
+
+        client = self.active_pools.get_client(websocket)
+
+        await self.pool_packet(
+            pool_id,
+            BaseWebsocketPacketSchema(
+                action=WebsocketActionEnum.POOL_MESSAGE,
+                message=message,
+                payload={"number": client["number"] if client else None},
+            ),
+        )
+
+    async def handle_global_message(
+        self,
+        websocket: WebSocketConnection,
+        message: str | None,
+    ) -> None:
+        if not message:
+            await self.handle_connection_code(websocket, NoMessageException)
+            return
+
+        await self.global_packet(
+            BaseWebsocketPacketSchema(
+                action=WebsocketActionEnum.GLOBAL_MESSAGE,
+                message=message,
+            ),
+        )
 
     async def personal_packet(
         self,
         websocket: WebSocketConnection,
         packet: BaseWebsocketPacketSchema,
+        key: str | None = None,
     ) -> None:
-        await websocket.send(packet.model_dump())
+        await websocket.send_frame(encode_packet(packet), key)
+
+    def fan_out(
+        self,
+        clients: Iterable[ClientConnection],
+        frame: str,
+        key: str | None = None,
+    ) -> FanOutReport:
+        """Queue the same encoded frame on a group of clients.
+
+        Only the outbound queues of the connections are touched, the writer task of
+        every connection does the actual sending. Connections that get evicted as a
+        slow consumer are torn down like any other connection that left, see
+        remove_evicted. The frame is transcoded at most
+        once per protocol, not once per connection.
+
+        Args:
+            clients (Iterable[ClientConnection]): The clients to send the frame to.
+            frame (str): The frame to send, see encode_packet.
+            key (str | None): The packet type, used by the coalesce overflow policy.
+
+        Returns:
+            FanOutReport: The amount of clients the frame was queued for and the
+            amount that were evicted.
+        """
+        started = time.perf_counter()
+        report: FanOutReport = {"queued": 0, "evicted": 0}
+        frames: dict[WebsocketProtocolEnum, Frame] = {
+            WebsocketProtocolEnum.JSON: frame
+        }
+
+        for client in clients:
+            websocket = client["ws"]
+
+            if (encoded := frames.get(websocket.protocol)) is None:
+                encoded = transcode_frame(frame, websocket.protocol)
+                frames[websocket.protocol] = encoded
+
+            if websocket.enqueue(encoded, key):
+                report["queued"] += 1
+                continue
+
+            report["evicted"] += 1
+            self.remove_evicted(websocket)
+
+        if report["evicted"]:
+            self.evicted += report["evicted"]
+            eviction_logger.warning(
+                "Evicted %d slow websocket consumers",
+                report["evicted"],
+                extra={"evicted": report["evicted"]},
+            )
+
+        fan_out_seconds.observe(time.perf_counter() - started)
+        fan_out_frames.inc(amount=report["queued"])
+        return report
+
+    def local_fan_out(
+        self,
+        channel: str,
+        frame: str,
+        key: str | None = None,
+        exclude: WebSocketConnection | None = None,
+    ) -> FanOutReport:
+        """Queue a frame on the sockets this process holds for a channel, being either
+        a pool id or GLOBAL_CHANNEL, apart from an excluded socket. Frames of a pool
+        get a sequence number and are kept for clients that resume."""
+        if buffer := self.replay_buffers.get(channel):
+            frame = buffer.record(frame, key)
+
+        if channel == GLOBAL_CHANNEL:
+            clients = [
+                client
+                for _, pool in self.active_pools.items()
+                for client in pool["clients"].values()
+            ]
+        elif pool := self.active_pools.get(channel):
+            clients = list(pool["clients"].values())
+        else:
+            return {"queued": 0, "evicted": 0}
+
+        if exclude is not None:
+            clients = [client for client in clients if client["ws"].id != exclude.id]
+
+        return self.fan_out(clients, frame, key)
+
+    async def publish_frame(
+        self,
+        channel: str,
+        frame: str,
+        key: str | None = None,
+        exclude: WebSocketConnection | None = None,
+    ) -> FanOutReport:
+        """Send a frame to the local sockets of a channel and hand it to the broker
+        for the sockets held by other workers.
+
+        Args:
+            channel (str): A pool id or GLOBAL_CHANNEL.
+            frame (str): The frame to send, see encode_packet.
+            key (str | None): The packet type, used by the coalesce overflow policy.
+            exclude (WebSocketConnection | None): A local socket to skip, e.g. one
+            that gets a variant of the frame.
+
+        Returns:
+            FanOutReport: The report of the local fan-out.
+        """
+        report = self.local_fan_out(channel, frame, key, exclude)
+        await self.broker.publish(channel, frame, key)
+        return report
 
     async def pool_packet(
         self,
         pool_id: str,
         packet: BaseWebsocketPacketSchema,
-    ) -> None:
-        for client in self.active_pools[pool_id]["clients"]:
-            await self.send_data(client["websocket"], packet.model_dump())
+    ) -> FanOutReport:
+        return await self.publish_frame(
+            pool_id,
+            encode_packet(packet),
+            packet.action.value,
+        )
 
     async def global_packet(
         self,
         packet: BaseWebsocketPacketSchema,
-    ) -> None:
-        for _, pool in self.active_pools.items():
-            for client in pool["clients"]:
-                await self.send_data(
-                    client["websocket"],
-                    packet.model_dump(),
-                )
+    ) -> FanOutReport:
+        return await self.publish_frame(
+            GLOBAL_CHANNEL,
+            encode_packet(packet),
+            packet.action.value,
+        )
+
+    def get_queue_stats(
+        self,
+        pool_id: str | None = None,
+    ) -> QueueStats:
+        """Sum up the outbound queue stats of a pool, or of all pools.
+
+        max_depth is the deepest any single queue has been.
+        """
+        stats: QueueStats = {"depth": 0, "max_depth": 0, "dropped": 0, "coalesced": 0}
+
+        if pool_id:
+            pools = [self.active_pools[pool_id]] if pool_id in self.active_pools else []
+        else:
+            pools = list(self.active_pools.values())
+
+        for pool in pools:
+            for client in pool["clients"].values():
+                client_stats = client["ws"].queue_stats
+                stats["depth"] += client_stats["depth"]
+                stats["max_depth"] = max(stats["max_depth"], client_stats["max_depth"])
+                stats["dropped"] += client_stats["dropped"]
+                stats["coalesced"] += client_stats["coalesced"]
+
+        return stats
 
     def get_connection_count(
         self,
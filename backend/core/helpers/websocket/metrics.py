@@ -0,0 +1,114 @@
+"""
+Metrics of the websocket layer, see core.helpers.metrics.
+"""
+
+from typing import TYPE_CHECKING
+
+from core.helpers.metrics import metrics
+
+if TYPE_CHECKING:
+    from core.helpers.websocket.manager import WebSocketConnectionManager
+
+
+packets_received = metrics.counter(
+    "quizzap_websocket_packets_received_total",
+    "Inbound packets that were parsed, by action.",
+    labels=("action",),
+)
+
+packets_refused = metrics.counter(
+    "quizzap_websocket_packets_refused_total",
+    "Inbound frames that were not handled, by reason.",
+    labels=("reason",),
+)
+
+fan_out_seconds = metrics.histogram(
+    "quizzap_websocket_fan_out_seconds",
+    "Time to queue one broadcast frame on all of its connections.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05),
+)
+
+fan_out_frames = metrics.counter(
+    "quizzap_websocket_fan_out_frames_total",
+    "Frames queued by broadcasts.",
+)
+
+
+def register_manager_metrics(manager: "WebSocketConnectionManager") -> None:
+    """Register the metrics that are read from a manager when they are scraped."""
+
+    def queue_stat(name: str):
+        return lambda: manager.get_queue_stats()[name]
+
+    def action_stat(name: str):
+        return lambda: {
+            (action,): stats[name]
+            for action, stats in manager.executor.action_stats.items()
+        }
+
+    metrics.gauge(
+        "quizzap_websocket_pools",
+        "Pools with at least one connection.",
+        lambda: len(manager.active_pools),
+    )
+    metrics.gauge(
+        "quizzap_websocket_connections",
+        "Open websocket connections.",
+        lambda: manager.active_pools.connection_count,
+    )
+    metrics.gauge(
+        "quizzap_websocket_queue_depth",
+        "Frames waiting in the outbound queues of all connections.",
+        queue_stat("depth"),
+    )
+    metrics.gauge(
+        "quizzap_websocket_queue_max_depth",
+        "Deepest any open connection's outbound queue has been.",
+        queue_stat("max_depth"),
+    )
+    metrics.gauge(
+        "quizzap_websocket_queue_dropped",
+        "Frames dropped from the outbound queues of the open connections.",
+        queue_stat("dropped"),
+    )
+    metrics.gauge(
+        "quizzap_websocket_queue_coalesced",
+        "Frames coalesced in the outbound queues of the open connections.",
+        queue_stat("coalesced"),
+    )
+    metrics.gauge(
+        "quizzap_websocket_evicted_total",
+        "Connections evicted, by reason.",
+        lambda: {
+            ("slow_consumer",): manager.evicted,
+            ("missed_deadline",): manager.missed_deadlines,
+            ("unresponsive",): manager.heartbeat.reaped,
+        },
+        labels=("reason",),
+        kind="counter",
+    )
+    metrics.gauge(
+        "quizzap_websocket_mailbox_depth",
+        "Actions waiting in the mailboxes of all pools.",
+        manager.executor.get_mailbox_depth,
+    )
+    metrics.gauge(
+        "quizzap_websocket_actions_total",
+        "Actions run by the pool executor, by action.",
+        action_stat("count"),
+        labels=("action",),
+        kind="counter",
+    )
+    metrics.gauge(
+        "quizzap_websocket_action_seconds_total",
+        "Time spent running actions in the pool executor, by action.",
+        action_stat("total"),
+        labels=("action",),
+        kind="counter",
+    )
+    metrics.gauge(
+        "quizzap_websocket_slow_actions_total",
+        "Actions that took longer than the slow action threshold.",
+        lambda: manager.executor.slow_actions,
+        kind="counter",
+    )
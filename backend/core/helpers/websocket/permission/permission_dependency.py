@@ -1,15 +1,18 @@
 from abc import ABC, abstractmethod
-from typing import Type, Union
+from typing import Any, Type, Union
 
 from core.fastapi.dependencies.permission.permission_dependency import PermissionDependency
 from core.fastapi.dependencies.permission.keyword import Keyword
 from core.exceptions.base import UnauthorizedException
 
 
+Claims = dict[str, Any]
+
+
 class BaseWebsocketPermission(ABC):
     @abstractmethod
-    async def has_permission(self, pool_id: int) -> bool:
-        del pool_id
+    async def has_permission(self, pool_id: str, claims: Claims | None) -> bool:
+        del pool_id, claims
 
 
 PermItem = Union[Type[BaseWebsocketPermission], Type[Keyword], tuple, list]
@@ -17,19 +20,11 @@ PermList = Union[tuple[PermItem], list[PermItem]]
 
 
 class WebsocketPermission(PermissionDependency):
-    def __init__(self, *perms):
-        super().__init__(*perms)
-        self.base_perm_type = BaseWebsocketPermission
-
-    async def __call__(self, pool_id: int):
-        self.curr_pool_id = pool_id
+    base_perm_type = BaseWebsocketPermission
 
-        access = await self.check_permissions(self.perms)
+    async def __call__(self, pool_id: str, claims: Claims | None = None):
+        async def check(permission: BaseWebsocketPermission) -> bool:
+            return await permission.has_permission(pool_id, claims)
 
-        if not access:
+        if not await self.expression.evaluate(check, {}):
             raise UnauthorizedException
-
-    async def execute_perm(self, permission: BaseWebsocketPermission):
-        pool_id = self.curr_pool_id
-
-        return await permission().has_permission(pool_id)
@@ -5,10 +5,15 @@ Permission class to approve and refuse access on websockets.
 
 from typing import Annotated
 from fastapi import Cookie, Query, WebSocketException, status
-from core.helpers.token.token_helper import TokenHelper
-from core.helpers.websocket.permission.permission_dependency import BaseWebsocketPermission
-
-from core.exceptions.base import CustomException
+from app.user.exceptions.user import UserNotFoundException
+from app.user.services.user import UserService
+from core.db import AsyncSessionLocal
+from core.exceptions.hashids import IncorrectHashIDException
+from core.helpers.hashids import decode_single
+from core.helpers.websocket.permission.permission_dependency import (
+    BaseWebsocketPermission,
+    Claims,
+)
 
 # pylint: disable=too-few-public-methods
 
@@ -24,21 +29,29 @@ async def get_cookie_or_token(
 
 
 class AllowAll(BaseWebsocketPermission):
-    async def has_permission(self, **kwargs) -> bool:
+    async def has_permission(self, pool_id: str, claims: Claims | None) -> bool:
         return True
 
 
 class IsAuthenticated(BaseWebsocketPermission):
-    async def has_permission(self, **kwargs) -> bool:
-        access_token = kwargs.get("access_token")
+    async def has_permission(self, pool_id: str, claims: Claims | None) -> bool:
+        # The token was already decoded during the handshake, claims are only
+        # there when it was valid
+        return claims is not None
+
 
-        if not access_token:
+class IsAdmin(BaseWebsocketPermission):
+    async def has_permission(self, pool_id: str, claims: Claims | None) -> bool:
+        if not claims or not claims.get("user_id"):
             return False
 
         try:
-            TokenHelper.decode(token=access_token)
-
-        except CustomException:
+            user_id = decode_single(claims["user_id"])
+        except IncorrectHashIDException:
             return False
 
-        return True
+        async with AsyncSessionLocal() as session:
+            try:
+                return await UserService(session).is_admin(user_id)
+            except UserNotFoundException:
+                return False
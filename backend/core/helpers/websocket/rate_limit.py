@@ -0,0 +1,97 @@
+"""Inbound rate limiting of websocket connections.
+
+Every connection gets a token bucket for all of its frames, checked before a frame
+is even parsed, and a bucket per rate limited action, checked before the action is
+run. A client going over its limit only costs a clock read and a subtraction per
+frame.
+"""
+
+import time
+from typing import NamedTuple
+
+from core.config import config
+
+
+class RateLimit(NamedTuple):
+    rate: float  # Tokens added per second
+    burst: int  # Maximum amount of tokens
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, limit: RateLimit) -> None:
+        self.rate = limit.rate
+        self.capacity = limit.burst
+        self.tokens = float(limit.burst)
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        limits: dict[str, RateLimit] | None = None,
+        frame_limit: RateLimit = RateLimit(
+            config.WEBSOCKET_RATE_LIMIT,
+            config.WEBSOCKET_RATE_BURST,
+        ),
+    ) -> None:
+        """
+        Args:
+            limits (dict[str, RateLimit] | None): Limits per action, actions without
+            one are only limited by the frame limit.
+            frame_limit (RateLimit): Limit on all frames of the connection.
+        """
+        self.limits = limits or {}
+        self.frames = TokenBucket(frame_limit)
+        self.actions: dict[str, TokenBucket] = {}
+        self.answered = False
+        self.rejected = 0
+
+    def allow_frame(self) -> bool:
+        """Take a token for a received frame, before it is parsed."""
+        if self.frames.take():
+            return True
+
+        self.rejected += 1
+        return False
+
+    def allow(self, action: str) -> bool:
+        """Take a token for the action of a parsed packet.
+
+        Args:
+            action (str): The action of the packet.
+
+        Returns:
+            bool: Whether the action is within its limit.
+        """
+        if (bucket := self.actions.get(action)) is None:
+            if (limit := self.limits.get(action)) is not None:
+                bucket = self.actions[action] = TokenBucket(limit)
+
+        if bucket is None or bucket.take():
+            self.answered = False
+            return True
+
+        self.rejected += 1
+        return False
+
+    def should_answer(self) -> bool:
+        """Whether a rejection should be answered with a status code. Only the first
+        rejection after an allowed frame is answered, the rest are dropped."""
+        if self.answered:
+            return False
+
+        self.answered = True
+        return True
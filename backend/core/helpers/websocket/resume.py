@@ -0,0 +1,129 @@
+"""Resumable connections.
+
+Every pool packet gets a sequence number and is kept in a bounded ring buffer of
+its pool. A client gets a resume token on connect, and when it reconnects with that
+token and the last sequence number it saw it keeps its number in the pool and only
+receives the packets it missed. A client that fell further behind than the buffer
+reaches gets a snapshot instead.
+"""
+
+import secrets
+import time
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+from core.config import config
+
+
+def stamp_frame(frame: str, seq: int) -> str:
+    """Add a sequence number to an encoded JSON object frame, without decoding it."""
+    return f'{{"seq":{seq},{frame[1:]}'
+
+
+class ReplayBuffer:
+    def __init__(self, size: int = config.WEBSOCKET_REPLAY_SIZE) -> None:
+        self.frames: deque[tuple[int, str | None, str]] = deque(maxlen=size)
+        self.seq = 0
+        self.idle_since: float | None = None
+
+        # Highest client number of the pool, so a pool that emptied and comes back
+        # doesn't hand out the numbers of clients that may still resume
+        self.numbers = 0
+
+    def record(self, frame: str, key: str | None = None) -> str:
+        """Number a frame and keep it.
+
+        Returns:
+            str: The frame with its sequence number.
+        """
+        self.seq += 1
+        frame = stamp_frame(frame, self.seq)
+        self.frames.append((self.seq, key, frame))
+        return frame
+
+    def since(self, seq: int) -> list[tuple[str | None, str]] | None:
+        """The frames after a sequence number.
+
+        Returns:
+            list[tuple[str | None, str]] | None: The keys and frames that were
+            missed, None when some of them are no longer in the buffer.
+        """
+        if seq >= self.seq:
+            return [] if seq == self.seq else None
+
+        oldest = self.frames[0][0] if self.frames else self.seq + 1
+        if seq + 1 < oldest:
+            return None
+
+        return [(key, frame) for number, key, frame in self.frames if number > seq]
+
+
+class ResumeEntry(NamedTuple):
+    pool_id: str
+    number: int
+    connection_id: int
+    # Whether the connection the token was issued to was still registered when
+    # the token was redeemed
+    connected: bool = False
+
+
+class ResumeTokens:
+    def __init__(self, ttl: float = config.WEBSOCKET_RESUME_TTL) -> None:
+        """
+        Args:
+            ttl (float): Seconds a token stays valid after its connection is gone.
+        """
+        self.ttl = ttl
+        self.entries: dict[str, ResumeEntry] = {}
+        self.tokens: dict[int, str] = {}
+
+        # Tokens of connections that are gone, in the order they left
+        self.released: OrderedDict[str, float] = OrderedDict()
+
+    def issue(self, pool_id: str, number: int, connection_id: int) -> str:
+        self.prune()
+
+        token = secrets.token_urlsafe(16)
+        self.entries[token] = ResumeEntry(pool_id, number, connection_id)
+        self.tokens[connection_id] = token
+        return token
+
+    def release(self, connection_id: int) -> None:
+        """Start the countdown of the token of a connection that is gone."""
+        if (token := self.tokens.pop(connection_id, None)) is not None:
+            self.released[token] = time.monotonic()
+
+    def redeem(self, token: str, pool_id: str) -> ResumeEntry | None:
+        """Use up a token. The connection it was issued to may still be there when
+        the client noticed it was gone before we did, the connection redeeming the
+        token then takes its place.
+
+        Returns:
+            ResumeEntry | None: What the token resumes, with whether its connection
+            is still there, None when it is unknown, expired or for another pool.
+        """
+        self.prune()
+
+        if (entry := self.entries.get(token)) is None or entry.pool_id != pool_id:
+            return None
+
+        connected = token not in self.released
+
+        if connected:
+            del self.tokens[entry.connection_id]
+        else:
+            del self.released[token]
+
+        del self.entries[token]
+        return entry._replace(connected=connected)
+
+    def prune(self) -> None:
+        expired = time.monotonic() - self.ttl
+
+        while self.released:
+            token, released_at = next(iter(self.released.items()))
+            if released_at > expired:
+                break
+
+            del self.released[token]
+            del self.entries[token]
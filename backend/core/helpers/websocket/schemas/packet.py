@@ -1,7 +1,21 @@
-from typing import Any
-from pydantic import BaseModel
+from typing import Any, Literal, Type, get_args
+
+import orjson
+from pydantic import BaseModel, Field, ValidationError
 
 from core.db.enums import QuizSessionActionEnum, WebsocketActionEnum
+from core.exceptions.websocket import (
+    ActionNotFoundException,
+    ActionNotImplementedException,
+    JSONSerializableException,
+    ValidationException,
+)
+from core.helpers.websocket.codec import Frame, decode_frame
+
+
+KNOWN_ACTIONS = {
+    action.value for action in (*WebsocketActionEnum, *QuizSessionActionEnum)
+}
 
 
 class BaseWebsocketPacketSchema(BaseModel):
@@ -13,3 +27,154 @@ class BaseWebsocketPacketSchema(BaseModel):
 
 class QuizWebsocketPacketSchema(BaseWebsocketPacketSchema):
     action: WebsocketActionEnum | QuizSessionActionEnum
+
+
+class MessagePayloadSchema(BaseModel):
+    message: str | None = None
+
+
+class QuestionStartPayloadSchema(BaseModel):
+    quiz_id: str | None = None
+
+
+class SubmitVotePayloadSchema(BaseModel):
+    answer: int = Field(ge=0)
+
+
+class PoolMessagePacketSchema(BaseWebsocketPacketSchema):
+    action: Literal[WebsocketActionEnum.POOL_MESSAGE]
+    payload: MessagePayloadSchema | None = None
+
+
+class GlobalMessagePacketSchema(BaseWebsocketPacketSchema):
+    action: Literal[WebsocketActionEnum.GLOBAL_MESSAGE]
+    payload: MessagePayloadSchema | None = None
+
+
+class PingPacketSchema(BaseWebsocketPacketSchema):
+    action: Literal[WebsocketActionEnum.PING]
+    message: str = "ping"
+    payload: None = None
+
+
+class PongPacketSchema(BaseWebsocketPacketSchema):
+    action: Literal[WebsocketActionEnum.PONG]
+    message: str = "pong"
+    payload: None = None
+
+
+class QuestionStartPacketSchema(BaseWebsocketPacketSchema):
+    action: Literal[QuizSessionActionEnum.QUESTION_START]
+    payload: QuestionStartPayloadSchema | None = None
+
+
+class QuestionStopPacketSchema(BaseWebsocketPacketSchema):
+    action: Literal[QuizSessionActionEnum.QUESTION_STOP]
+    payload: None = None
+
+
+class SubmitVotePacketSchema(BaseWebsocketPacketSchema):
+    action: Literal[QuizSessionActionEnum.SUBMIT_VOTE]
+    payload: SubmitVotePayloadSchema
+
+
+class PacketParser:
+    """Parser of inbound packets in two steps.
+
+    A frame is decoded to a dict once and its action is read first, so a packet can
+    be refused, e.g. by the rate limit of its action, before any of its payload is
+    validated. Only then is the dict validated against the schema of its action.
+    This gives up validating JSON in a single pass over the frame, since the action
+    has to be known before the schema is picked.
+    """
+
+    def __init__(self, *schemas: Type[BaseWebsocketPacketSchema]) -> None:
+        self.schemas: dict[str, Type[BaseWebsocketPacketSchema]] = {
+            get_args(schema.model_fields["action"].annotation)[0].value: schema
+            for schema in schemas
+        }
+
+    def read_action(self, frame: Frame) -> tuple[str, dict[str, Any]]:
+        """Decode a received frame and read its action, without validating it.
+
+        Args:
+            frame (Frame): A JSON text frame or a MessagePack binary frame.
+
+        Raises:
+            JSONSerializableException: When the frame is not an encoded object.
+            ActionNotFoundException: When the action does not exist.
+            ActionNotImplementedException: When the action can't be sent by clients.
+
+        Returns:
+            tuple[str, dict[str, Any]]: The action and the decoded frame.
+        """
+        data = decode_frame(frame)
+        action = data.get("action")
+
+        # Anything but a string may not even be hashable
+        if not isinstance(action, str):
+            raise ActionNotFoundException
+
+        if action not in self.schemas:
+            if action in KNOWN_ACTIONS:
+                raise ActionNotImplementedException
+
+            raise ActionNotFoundException
+
+        return action, data
+
+    def validate(self, action: str, data: dict[str, Any]) -> BaseWebsocketPacketSchema:
+        """Validate a decoded frame against the packet schema of its action.
+
+        Raises:
+            ValidationException: When the packet does not match its schema.
+        """
+        try:
+            return self.schemas[action].model_validate(data)
+        except ValidationError as exc:
+            raise ValidationException from exc
+
+    def parse(self, frame: Frame) -> BaseWebsocketPacketSchema:
+        """Parse a received frame to the packet schema of its action.
+
+        Raises:
+            JSONSerializableException: When the frame is not an encoded object.
+            ActionNotFoundException: When the action does not exist.
+            ActionNotImplementedException: When the action can't be sent by clients.
+            ValidationException: When the packet does not match its schema.
+
+        Returns:
+            BaseWebsocketPacketSchema: The packet.
+        """
+        return self.validate(*self.read_action(frame))
+
+
+base_packet_parser = PacketParser(
+    PingPacketSchema,
+    PongPacketSchema,
+    PoolMessagePacketSchema,
+    GlobalMessagePacketSchema,
+)
+
+quiz_packet_parser = PacketParser(
+    PingPacketSchema,
+    PongPacketSchema,
+    PoolMessagePacketSchema,
+    GlobalMessagePacketSchema,
+    QuestionStartPacketSchema,
+    QuestionStopPacketSchema,
+    SubmitVotePacketSchema,
+)
+
+
+def encode_packet(packet: BaseWebsocketPacketSchema) -> str:
+    """Encode a packet to a JSON text frame, so it can be sent to many connections
+    while only being serialized once.
+
+    Args:
+        packet (BaseWebsocketPacketSchema): The packet to encode.
+
+    Returns:
+        str: The encoded frame.
+    """
+    return orjson.dumps(packet.model_dump()).decode()
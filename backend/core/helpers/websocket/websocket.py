@@ -1,73 +1,337 @@
 import asyncio
-import json
-from typing import Any, Type
+import itertools
+import time
+from collections import deque
+from typing import Any, Callable, TypedDict
+
 from fastapi import WebSocket
-from fastapi.websockets import WebSocketState
-from pydantic import ValidationError
+from fastapi.websockets import WebSocketDisconnect, WebSocketState
+
+from core.config import config
+from core.db.enums import (
+    WebsocketActionEnum,
+    WebsocketOverflowEnum,
+    WebsocketProtocolEnum,
+)
+from core.exceptions.hashids import IncorrectHashIDException
+from core.helpers.hashids import decode_single
+from core.helpers.logger import get_logger
+from core.helpers.websocket.codec import (
+    Frame,
+    encode_frame,
+    transcode_frame,
+)
+from core.helpers.websocket.frame_cache import StatusCode, frame_cache
+from core.helpers.websocket.schemas.packet import (
+    BaseWebsocketPacketSchema,
+    PacketParser,
+)
+
+
+logger = get_logger(__name__)
+
+WS_4008_SLOW_CONSUMER = 4008
+WS_4009_UNRESPONSIVE = 4009
+WS_4010_RESUMED_ELSEWHERE = 4010
+
+# Ids of connections are never reused within a process, unlike id() of an object
+# that was garbage collected, so a resume token can't point at another connection
+connection_ids = itertools.count(1)
 
-from core.db.enums import WebsocketActionEnum
-from core.exceptions.base import CustomException
-from core.exceptions.websocket import ActionNotFoundException, JSONSerializableException
-from core.helpers.websocket.schemas.packet import BaseWebsocketPacketSchema
+
+class QueueStats(TypedDict):
+    depth: int
+    max_depth: int
+    dropped: int
+    coalesced: int
 
 
 class WebSocketConnection(WebSocket):
-    def __init__(self, websocket: WebSocket):
+    """Websocket with a bounded outbound queue.
+
+    Frames are only enqueued by senders and written to the socket by a writer task
+    owned by the connection, so a stuck send never holds up whoever is broadcasting.
+    When the queue is full the overflow policy decides what gives way.
+
+    Frames are JSON text unless the connection was accepted with the MessagePack
+    subprotocol, in which case they are transcoded to binary frames.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue_size: int = config.WEBSOCKET_QUEUE_SIZE,
+        overflow_policy: WebsocketOverflowEnum = WebsocketOverflowEnum(
+            config.WEBSOCKET_OVERFLOW_POLICY
+        ),
+    ):
         self.ws = websocket
+        self.id = next(connection_ids)
+        self.max_queue_size = max_queue_size
+        self.overflow_policy = overflow_policy
+
+        self.protocol = WebsocketProtocolEnum.JSON
+
+        # Decoded access token of the handshake, None for anonymous connections
+        self.claims: dict[str, Any] | None = None
+
+        self.queue: deque[tuple[str | None, Frame]] = deque()
+        self.writer: asyncio.Task | None = None
+        self.evicted = False
+        # Called when the writer evicts the connection for missing the send
+        # timeout, set by the manager to take it out of its pool
+        self.on_missed_deadline: Callable[["WebSocketConnection"], None] | None = None
+        self.last_seen = time.monotonic()
+        self.missed_heartbeats = 0
+        self._ready = asyncio.Event()
+        self._closing = False
+
+        self.max_depth = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    @property
+    def user_id(self) -> int | None:
+        """The id of the user the handshake token was issued to, None for anonymous
+        connections."""
+        if not self.claims or not self.claims.get("user_id"):
+            return None
+
+        try:
+            return decode_single(self.claims["user_id"])
+        except IncorrectHashIDException:
+            return None
+
+    @property
+    def client_state(self) -> WebSocketState:
+        return self.ws.client_state
 
     @property
-    def id(self):
-        return id(self.websocket)
+    def application_state(self) -> WebSocketState:
+        return self.ws.application_state
+
+    @property
+    def is_connected(self) -> bool:
+        return (
+            self.ws.client_state == WebSocketState.CONNECTED
+            and self.ws.application_state == WebSocketState.CONNECTED
+        )
+
+    @property
+    def queue_stats(self) -> QueueStats:
+        return {
+            "depth": len(self.queue),
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    async def accept(self, subprotocol: str | None = None) -> None:
+        if subprotocol:
+            self.protocol = WebsocketProtocolEnum(subprotocol)
+
+        await self.ws.accept(subprotocol)
+
+    def start_writer(self) -> None:
+        if self.writer is None:
+            self.writer = asyncio.ensure_future(self._write_queue())
+
+    def stop(self) -> None:
+        """Stop the writer and throw away anything still queued."""
+        self.queue.clear()
+
+        if self.writer and not self.writer.done():
+            self.writer.cancel()
+
+    async def close(
+        self,
+        code: int = 1000,
+        reason: str | None = None,
+    ) -> None:
+        """Flush the queue within the send timeout and close the connection."""
+        if self.writer and not self.writer.done():
+            self._closing = True
+            self._ready.set()
+
+            try:
+                await asyncio.wait_for(self.writer, config.WEBSOCKET_SEND_TIMEOUT)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+
+        self.stop()
+
+        if self.is_connected:
+            await self.ws.close(code, reason)
+
+    def enqueue(self, frame: Frame, key: str | None = None) -> bool:
+        """Queue a frame for the writer.
+
+        Args:
+            frame (Frame): The frame, already encoded for the protocol of the
+            connection.
+            key (str | None): The packet type, used to coalesce frames.
+
+        Returns:
+            bool: Whether the connection is still accepting frames. False means the
+            connection was evicted as a slow consumer.
+        """
+        if self.evicted:
+            return False
+
+        if len(self.queue) >= self.max_queue_size:
+            if self.overflow_policy == WebsocketOverflowEnum.DISCONNECT:
+                self.evict()
+                return False
+
+            if self.overflow_policy == WebsocketOverflowEnum.COALESCE and key:
+                for index, (queued_key, _) in enumerate(self.queue):
+                    if queued_key == key:
+                        self.queue[index] = (key, frame)
+                        self.coalesced += 1
+                        return True
+
+            self.queue.popleft()
+            self.dropped += 1
+
+        self.queue.append((key, frame))
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self._ready.set()
+
+        return True
+
+    def evict(
+        self,
+        code: int = WS_4008_SLOW_CONSUMER,
+        reason: str = "slow consumer",
+    ) -> None:
+        """Drop the connection, by default as a slow consumer, closing it in the
+        background with its own code."""
+        self.evicted = True
+        self.stop()
+
+        if self.is_connected:
+            asyncio.ensure_future(self._close_quietly(code, reason))
+
+    async def _close_quietly(self, code: int, reason: str) -> None:
+        try:
+            await self.ws.close(code, reason)
+        except Exception:  # pylint: disable=broad-exception-caught
+            pass
+
+    async def _write_queue(self) -> None:
+        try:
+            while True:
+                if not self.queue:
+                    if self._closing:
+                        return
+
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+
+                _, frame = self.queue.popleft()
+                await self._write(frame)
+
+        except asyncio.CancelledError:
+            raise
+
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            logger.info(
+                "Websocket writer %s stopped: %r",
+                self.id,
+                exc,
+                extra={"connection_id": self.id},
+            )
+            self.queue.clear()
+
+    async def _write(self, frame: Frame) -> None:
+        """Send a frame, evicting the connection as a slow consumer when the send
+        doesn't finish within the send timeout, see on_missed_deadline."""
+        if not self.is_connected:
+            return
+
+        send = self.ws.send_bytes if isinstance(frame, bytes) else self.ws.send_text
+
+        try:
+            await asyncio.wait_for(send(frame), config.WEBSOCKET_SEND_TIMEOUT)
+
+        except asyncio.TimeoutError:
+            logger.info(
+                "Websocket %s timed out on a send, evicting it",
+                self.id,
+                extra={"connection_id": self.id},
+            )
+            self.evict()
+
+            if self.on_missed_deadline:
+                self.on_missed_deadline(self)
+
+    async def _send(
+        self,
+        frame: Frame,
+        key: str | None = None,
+    ):
+        if self.writer is None:
+            await self._write(frame)
+            return
+
+        self.enqueue(frame, key)
 
     async def send(
         self,
         data: dict[str, Any],
     ):
-        print("WEBSOCKET SENDING:", data)
-        if (
-            self.ws.client_state == WebSocketState.CONNECTED
-            and self.ws.application_state == WebSocketState.CONNECTED
-        ):
-            await self.ws.send_json(data)
+        await self._send(encode_frame(data, self.protocol))
+
+    async def send_frame(
+        self,
+        frame: str,
+        key: str | None = None,
+    ):
+        """Send an encoded JSON frame, see encode_packet."""
+        await self._send(transcode_frame(frame, self.protocol), key)
+
+    async def receive_frame(self) -> Frame:
+        message = await self.ws.receive()
+        self.last_seen = time.monotonic()
+        self.missed_heartbeats = 0
+
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message["code"])
+
+        if message.get("bytes") is not None:
+            return message["bytes"]
+
+        return message["text"]
 
     async def listen(
         self,
-        schema: Type[BaseWebsocketPacketSchema],
+        parser: PacketParser,
         timeout: float | None = None,
     ) -> BaseWebsocketPacketSchema | None:
         if timeout:
             try:
-                data = await asyncio.wait_for(
-                    self.ws.receive_text(),
+                frame = await asyncio.wait_for(
+                    self.receive_frame(),
                     timeout=timeout,
                 )
 
             except asyncio.TimeoutError:
                 return None
         else:
-            data = await self.ws.receive_text()
-
-        try:
-            data_json = json.loads(data)
-        except json.decoder.JSONDecodeError as exc:
-            raise JSONSerializableException from exc
+            frame = await self.receive_frame()
 
-        try:
-            packet = schema(**data_json)
-        except ValidationError as exc:
-            raise ActionNotFoundException from exc
+        return parser.parse(frame)
 
-        return packet
-    
     async def status_code(
         self,
-        exception: CustomException,
+        exception: StatusCode,
     ) -> None:
-        packet = BaseWebsocketPacketSchema(
-            action=WebsocketActionEnum.STATUS_CODE,
-            status_code=exception.status_code,
-            message=exception.message,
-            payload=None,
-        )
+        await self._send(frame_cache.status_frame(exception, self.protocol))
 
-        await self.send(packet)
+    async def send_action(
+        self,
+        action: WebsocketActionEnum,
+    ) -> None:
+        """Send a bare packet of an action, such as PONG."""
+        await self._send(frame_cache.action_frame(action, self.protocol), action.value)
@@ -3,10 +3,16 @@ Base reposity to contain crud logic
 """
 
 from typing import TypeVar, Type, Optional, Generic
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, delete
 
 from core.db import Base
+from core.repository.identity_cache import MISSING, IdentityCache
+from core.repository.loader_profile import (
+    LoaderProfile,
+    get_loader_options,
+    is_loaded,
+)
 
 Model = TypeVar("Model", bound=Base)
 
@@ -15,28 +21,89 @@ class BaseRepository(Generic[Model]):
     """
     A generic repository that provides basic database operations for a given SQLAlchemy 
     model.
+
+    The relationships that are loaded along with a model are picked by name from the
+    loader profiles of the repository, the default profile is used when no profile
+    is given.
     """
 
-    def __init__(self, model: Type[Model], session: Session):
+    loader_profiles: dict[str, LoaderProfile] = {"bare": ()}
+    default_profile: str = "bare"
+
+    def __init__(self, model: Type[Model], session: AsyncSession):
         self.model = model
         self.session = session
-    
-    def query_options(self, query):
-        return query
-    
-    def get(self) -> Optional[list[Model]]:
+        self.identities = IdentityCache.of(session)
+
+    def get_profile(self, profile: str | None = None) -> LoaderProfile:
+        """Get a loader profile by its name.
+
+        Raises:
+            ValueError: When the repository has no profile by that name.
+        """
+        name = profile or self.default_profile
+
+        try:
+            return self.loader_profiles[name]
+        except KeyError as exc:
+            raise ValueError(
+                f"{self.__class__.__name__} has no loader profile '{name}'"
+            ) from exc
+
+    def query_options(self, query, profile: str | None = None):
+        return query.options(*get_loader_options(self.get_profile(profile)))
+
+    async def get(self, profile: str | None = None) -> Optional[list[Model]]:
         query = select(self.model)
-        query = self.query_options(query)
-        result = self.session.execute(query)
+        query = self.query_options(query, profile)
+        result = await self.session.execute(query)
         return result.scalars().all()
 
-    def get_by_id(self, model_id: int) -> Optional[Model]:
+    async def get_by_id(
+        self,
+        model_id: int,
+        profile: str | None = None,
+    ) -> Optional[Model]:
+        model = self.identities.get(self.model, model_id)
+
+        # A model cached with less loaded than asked for is queried again, which
+        # only loads what it is missing
+        if model is None or (
+            model is not MISSING and is_loaded(model, self.get_profile(profile))
+        ):
+            return model
+
         query = select(self.model).where(self.model.id == model_id)
-        query = self.query_options(query)
-        result = self.session.execute(query)
-        return result.scalars().first()
+        query = self.query_options(query, profile)
+        result = await self.session.execute(query)
+        model = result.scalars().first()
 
-    def update_by_id(
+        self.identities.set(self.model, model_id, model)
+        return model
+
+    async def reload(
+        self,
+        model_id: int,
+        profile: str | None = None,
+    ) -> Optional[Model]:
+        """Load a model again, overwriting what the session already has of it.
+
+        Models are not expired on commit, since that would need a lazy load on the
+        next access, so changes made through a query are picked up by reloading.
+        """
+        query = (
+            select(self.model)
+            .where(self.model.id == model_id)
+            .execution_options(populate_existing=True)
+        )
+        query = self.query_options(query, profile)
+        result = await self.session.execute(query)
+        model = result.scalars().first()
+
+        self.identities.set(self.model, model_id, model)
+        return model
+
+    async def update_by_id(
         self,
         model_id: int,
         params: dict,
@@ -46,15 +113,16 @@ class BaseRepository(Generic[Model]):
             .where(self.model.id == model_id)
             .values(**params)
         )
-        query = self.query_options(query)
-        self.session.execute(query)
-        self.session.commit()
+        await self.session.execute(query)
+        await self.session.commit()
+        await self.reload(model_id)
 
-    def delete(self, model: Model) -> None:
-        self.session.delete(model)
-        self.session.commit()
+    async def delete(self, model: Model) -> None:
+        await self.session.delete(model)
+        await self.session.commit()
+        self.identities.set(self.model, model.id, None)
 
-    def delete_by_id(
+    async def delete_by_id(
         self,
         model_id: int,
     ) -> None:
@@ -62,11 +130,11 @@ class BaseRepository(Generic[Model]):
             delete(self.model)
             .where(self.model.id == model_id)
         )
-        self.session.execute(query)
-        self.session.commit()
+        await self.session.execute(query)
+        await self.session.commit()
+        self.identities.set(self.model, model_id, None)
 
-    def create(self, model: Model) -> int:
+    async def create(self, model: Model) -> Model:
         self.session.add(model)
-        self.session.commit()
-        self.session.refresh(model)
-        return model
+        await self.session.commit()
+        return await self.reload(model.id)
@@ -0,0 +1,47 @@
+"""
+Request scoped cache of models by their id
+"""
+
+from typing import Type
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.db import Base
+
+
+MISSING = object()
+
+
+class IdentityCache:
+    """
+    Models looked up by id during the lifetime of a session. The database session
+    of a request is shared by its permissions and services, so keeping the cache on
+    the session makes every (model, id) pair be fetched at most once per request,
+    whichever permission or service asks for it first.
+
+    Ids that were looked up but don't exist are kept as well, as None.
+    """
+
+    def __init__(self) -> None:
+        self.models: dict[tuple[type, int], Base | None] = {}
+
+    @classmethod
+    def of(cls, session: AsyncSession) -> "IdentityCache":
+        """Get the cache of a session, creating it on first use."""
+        if (cache := session.info.get("identity_cache")) is None:
+            cache = session.info["identity_cache"] = cls()
+
+        return cache
+
+    def get(self, model: Type[Base], model_id: int) -> Base | None | object:
+        """Get a cached model.
+
+        Returns:
+            Base | None | object: The model, None when it is known not to exist or
+            MISSING when it was never looked up.
+        """
+        return self.models.get((model, model_id), MISSING)
+
+    def set(self, model: Type[Base], model_id: int, instance: Base | None) -> None:
+        self.models[(model, model_id)] = instance
+
@@ -0,0 +1,73 @@
+"""
+Named sets of relationships a repository loads up front
+"""
+
+from typing import Iterable
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import InstrumentedAttribute, joinedload, selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from core.db import Base
+
+
+# A chain of relationships, e.g. (Quiz.questions, Question.answers)
+LoaderPath = tuple[InstrumentedAttribute, ...]
+LoaderProfile = tuple[LoaderPath, ...]
+
+
+def get_loader_option(path: LoaderPath) -> LoaderOption:
+    """Build the loader option of a path of relationships.
+
+    A relationship to a single model is joined into the query of its parent, a
+    collection is loaded with one extra query for all parents together. Either way
+    the amount of queries doesn't grow with the amount of rows.
+
+    Args:
+        path (LoaderPath): The relationships, starting at the model of the query.
+
+    Returns:
+        LoaderOption: The loader option.
+    """
+    first, *rest = path
+    option = _get_strategy(first)(first)
+
+    for attribute in rest:
+        option = getattr(option, _get_strategy(attribute).__name__)(attribute)
+
+    return option
+
+
+def _get_strategy(attribute: InstrumentedAttribute):
+    return selectinload if attribute.property.uselist else joinedload
+
+
+def get_loader_options(profile: LoaderProfile) -> list[LoaderOption]:
+    return [get_loader_option(path) for path in profile]
+
+
+def is_loaded(instance: Base, profile: LoaderProfile) -> bool:
+    """Check whether every relationship of a profile is loaded on a model, so it
+    can be used without a lazy load, which an async session can't do."""
+    return all(_is_path_loaded((instance,), path) for path in profile)
+
+
+def _is_path_loaded(instances: Iterable[Base], path: LoaderPath) -> bool:
+    if not path:
+        return True
+
+    attribute, *rest = path
+
+    for instance in instances:
+        if attribute.key in inspect(instance).unloaded:
+            return False
+
+        related = getattr(instance, attribute.key)
+
+        if not attribute.property.uselist:
+            related = () if related is None else (related,)
+
+        if not _is_path_loaded(related, tuple(rest)):
+            return False
+
+    return True
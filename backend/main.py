@@ -7,6 +7,7 @@ Usage:
 Options:
     --env : ["local", "dev", "prod"]
     --debug : bool
+    --workers : int
 """
 
 import os
@@ -29,7 +30,12 @@ from core.config import config
     is_flag=True,
     default=False,
 )
-def main(env: str = None, debug: bool = None):
+@click.option(
+    "--workers",
+    type=click.INT,
+    default=config.APP_WORKERS,
+)
+def main(env: str = None, debug: bool = None, workers: int = None):
     """
     Boot up the application.
 
@@ -37,18 +43,28 @@ def main(env: str = None, debug: bool = None):
         env (str): The environment to run the application in, can be one of "local", 
         "dev", or "prod".
         debug (bool): Whether or not to run the application in debug mode.
+        workers (int): The amount of worker processes. Only one is supported for
+        now: the state of a websocket pool lives in the worker its clients
+        connected to, and nothing routes all clients of a pool to the same worker
+        yet.
 
     Returns:
         None
     """
     os.environ["ENV"] = env
     os.environ["DEBUG"] = str(debug)
+
+    if workers > 1:
+        raise click.BadParameter(
+            "quiz sessions can't span workers yet, run a single worker",
+            param_hint="--workers",
+        )
+
     uvicorn.run(
         app="app.server:app",
         host=config.APP_HOST,
         port=config.APP_PORT,
         reload=config.ENV != "production",
-        workers=1,
     )
 
 
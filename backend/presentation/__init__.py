@@ -10,6 +10,7 @@ from presentation.quiz.v1.websocket import quiz_websocket_router
 from presentation.user.v1.user import user_v1_router
 from presentation.auth.v1.auth import auth_v1_router
 from presentation.me.v1.me import me_v1_router
+from presentation.metrics.v1.metrics import metrics_v1_router
 
 
 question_v1_router.include_router(answer_v1_router, prefix="/{question_id}/answers", tags=["Answers"])
@@ -24,6 +25,7 @@ router.include_router(auth_v1_router, prefix="/auth", tags=["Auth"])
 router.include_router(user_v1_router, prefix="/users", tags=["Users"])
 router.include_router(me_v1_router, prefix="/me", tags=["Me"])
 router.include_router(quiz_v1_router, prefix="/quizzes", tags=["Quizzes"])
+router.include_router(metrics_v1_router, prefix="/metrics", tags=["Metrics"])
 
 
 __all__ = ["router"]
@@ -1,7 +1,7 @@
 """User endpoints."""
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.auth.schemas.jwt import RefreshTokenSchema, TokensSchema
 from app.auth.services.auth import AuthService
@@ -21,7 +21,7 @@ auth_v1_router = APIRouter()
     dependencies=[Depends(PermissionDependency(AllowAll))],
 )
 @version(1)
-async def login(schema: LoginSchema, session: Session = Depends(get_db)):
+async def login(schema: LoginSchema, session: AsyncSession = Depends(get_db)):
     return await AuthService(session).login(schema)
 
 
@@ -31,5 +31,5 @@ async def login(schema: LoginSchema, session: Session = Depends(get_db)):
     dependencies=[Depends(PermissionDependency(AllowAll))],
 )
 @version(1)
-async def refresh(schema: RefreshTokenSchema, session: Session = Depends(get_db)):
+async def refresh(schema: RefreshTokenSchema, session: AsyncSession = Depends(get_db)):
     return await AuthService(session).refresh(schema)
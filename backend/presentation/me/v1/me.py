@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.user.dependencies.user import get_current_user
 from app.user.services.user import UserService
@@ -21,7 +21,7 @@ me_v1_router = APIRouter()
 @version(1)
 async def get_me(
     user_id: int = Depends(get_current_user),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await UserService(session=session).get_user(user_id)
 
@@ -35,7 +35,7 @@ async def get_me(
 async def update_me(
     schema: UpdateUserSchema,
     user_id: int = Depends(get_current_user),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await UserService(session=session).update_user(user_id, schema)
 
@@ -48,6 +48,6 @@ async def update_me(
 @version(1)
 async def delete_me(
     user_id: int = Depends(get_current_user),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await UserService(session).delete_user(user_id)
@@ -0,0 +1,24 @@
+"""Metrics endpoints."""
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+from core.fastapi.dependencies.permission.permission_dependency import PermissionDependency
+from core.fastapi.dependencies.permission.permissions import IsAdmin
+from core.helpers.metrics import metrics
+from core.versioning import version
+
+
+metrics_v1_router = APIRouter()
+
+
+@metrics_v1_router.get(
+    "",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(PermissionDependency(IsAdmin))],
+)
+@version(1)
+async def get_metrics():
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -1,7 +1,7 @@
 """Answer endpoints."""
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.answer.schemas.answer import CreateAnswerSchema, AnswerSchema, UpdateAnswerSchema
 from app.answer.services.answer import AnswerService
@@ -27,7 +27,7 @@ answer_v1_router = APIRouter()
 async def get_answers(
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await AnswerService(session).get_answers(quiz_id, question_id)
 
@@ -42,7 +42,7 @@ async def get_answer(
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
     answer_id: int = Depends(get_path_answer_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await AnswerService(session).get_answer(quiz_id, question_id, answer_id)
 
@@ -58,7 +58,7 @@ async def create_answer(
     schema: CreateAnswerSchema,
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await AnswerService(session).create_answer(quiz_id, question_id, schema)
 
@@ -77,7 +77,7 @@ async def update_answer(
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
     answer_id: int = Depends(get_path_answer_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await AnswerService(session).update_answer(quiz_id, question_id, answer_id, schema)
 
@@ -94,6 +94,6 @@ async def delete_answer(
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
     answer_id: int = Depends(get_path_answer_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await AnswerService(session).delete_answer(quiz_id, question_id, answer_id)
@@ -1,7 +1,7 @@
 """Question endpoints."""
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.question.schemas.question import CreateQuestionSchema, QuestionSchema, UpdateQuestionSchema
 from app.question.services.question import QuestionService
@@ -25,7 +25,7 @@ question_v1_router = APIRouter()
 @version(1)
 async def get_questions(
     quiz_id: int = Depends(get_path_quiz_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await QuestionService(session).get_questions(quiz_id)
 
@@ -39,7 +39,7 @@ async def get_questions(
 async def get_question(
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await QuestionService(session).get_question(quiz_id, question_id)
 
@@ -54,7 +54,7 @@ async def get_question(
 async def create_question(
     schema: CreateQuestionSchema,
     quiz_id: int = Depends(get_path_quiz_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await QuestionService(session).create_question(quiz_id, schema)
 
@@ -72,7 +72,7 @@ async def update_question(
     schema: UpdateQuestionSchema,
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await QuestionService(session).update_question(quiz_id, question_id, schema)
 
@@ -88,6 +88,6 @@ async def update_question(
 async def delete_question(
     quiz_id: int = Depends(get_path_quiz_id),
     question_id: int = Depends(get_path_question_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await QuestionService(session).delete_question(quiz_id, question_id, question_id)
@@ -1,7 +1,7 @@
 """Quiz endpoints."""
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.quiz.dependencies.quiz import get_path_quiz_id
 
 from app.quiz.schemas.quiz import CreateQuizSchema, QuizSchema, UploadQuizSchema
@@ -26,7 +26,7 @@ quiz_v1_router = APIRouter()
 @version(1)
 async def upload_quiz(
     schema: UploadQuizSchema,
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
     current_user: int = Depends(get_current_user),
 ):
     """
@@ -45,8 +45,8 @@ async def upload_quiz(
     dependencies=[Depends(PermissionDependency(IsAuthenticated))],
 )
 @version(1)
-async def get_quizzes(session: Session = Depends(get_db)):
-    return await QuizService(session).get_quizzes()
+async def get_quizzes(session: AsyncSession = Depends(get_db)):
+    return await QuizService(session).get_quizzes(profile="full")
 
 
 @quiz_v1_router.get(
@@ -57,9 +57,9 @@ async def get_quizzes(session: Session = Depends(get_db)):
 @version(1)
 async def get_quiz(
     quiz_id: int = Depends(get_path_quiz_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
-    return await QuizService(session).get_quiz(quiz_id)
+    return await QuizService(session).get_quiz(quiz_id, profile="full")
 
 
 @quiz_v1_router.post(
@@ -71,7 +71,7 @@ async def get_quiz(
 @version(1)
 async def create_quiz(
     schema: CreateQuizSchema,
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
     current_user: int = Depends(get_current_user),
 ):
     return await QuizService(session).create_quiz(schema, current_user)
@@ -89,7 +89,7 @@ async def create_quiz(
 async def update_quiz(
     schema: UpdateQuizSchema,
     quiz_id: int = Depends(get_path_quiz_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await QuizService(session).update_quiz(quiz_id, schema)
 
@@ -104,6 +104,6 @@ async def update_quiz(
 @version(1)
 async def delete_quiz(
     quiz_id: int = Depends(get_path_quiz_id),
-    session: Session = Depends(get_db),
+    session: AsyncSession = Depends(get_db),
 ):
     return await QuizService(session).delete_quiz(quiz_id)
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, WebSocket
 
 from app.quiz.websocket.quiz import QuizWebsocketService
-from core.helpers.websocket.permission.permissions import get_cookie_or_token
+from core.helpers.websocket.permission.permissions import (
+    IsAuthenticated,
+    get_cookie_or_token,
+)
 
 
 quiz_websocket_router = APIRouter()
+quiz_websocket_service = QuizWebsocketService(perms=(IsAuthenticated,))
 
 
 @quiz_websocket_router.websocket("/{session_id}")
@@ -13,7 +17,7 @@ async def websocket_endpoint(
     session_id: str = None,
     access_token: str = Depends(get_cookie_or_token),
 ):
-    await QuizWebsocketService().handler(
+    await quiz_websocket_service.handler(
         websocket,
         session_id,
         access_token,
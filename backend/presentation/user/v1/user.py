@@ -1,7 +1,7 @@
 """User endpoints."""
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.user.dependencies.user import get_path_user_id
 
 from app.user.schemas.user import CreateUserSchema, FullUserSchema
@@ -23,7 +23,7 @@ user_v1_router = APIRouter()
     dependencies=[Depends(PermissionDependency([[IsAdmin]]))],
 )
 @version(1)
-async def get_users(session: Session = Depends(get_db)):
+async def get_users(session: AsyncSession = Depends(get_db)):
     return await UserService(session).get_users()
 
 
@@ -33,7 +33,7 @@ async def get_users(session: Session = Depends(get_db)):
     dependencies=[Depends(PermissionDependency(IsAdmin, OR, (IsAuthenticated, AND, IsUserOwner)))],
 )
 @version(1)
-async def get_user(user_id: int = Depends(get_path_user_id), session: Session = Depends(get_db)):
+async def get_user(user_id: int = Depends(get_path_user_id), session: AsyncSession = Depends(get_db)):
     return await UserService(session).get_user(user_id)
 
 
@@ -44,7 +44,7 @@ async def get_user(user_id: int = Depends(get_path_user_id), session: Session =
     dependencies=[Depends(PermissionDependency([[AllowAll]]))],
 )
 @version(1)
-async def create_user(schema: CreateUserSchema, session: Session = Depends(get_db)):
+async def create_user(schema: CreateUserSchema, session: AsyncSession = Depends(get_db)):
     return await UserService(session).create_user(schema)
 
 
@@ -53,12 +53,12 @@ async def create_user(schema: CreateUserSchema, session: Session = Depends(get_d
     response_model=FullUserSchema,
     status_code=200,
     dependencies=[
-        Depends(PermissionDependency([[IsAdmin], [IsAuthenticated, IsUserOwner]]))
+        Depends(PermissionDependency(IsAdmin, OR, (IsAuthenticated, AND, IsUserOwner)))
     ],
 )
 @version(1)
 async def update_user(
-    schema: UpdateUserSchema, user_id: int = Depends(get_path_user_id), session: Session = Depends(get_db)
+    schema: UpdateUserSchema, user_id: int = Depends(get_path_user_id), session: AsyncSession = Depends(get_db)
 ):
     return await UserService(session).update_user(user_id, schema)
 
@@ -67,9 +67,9 @@ async def update_user(
     "/{user_id}",
     status_code=204,
     dependencies=[
-        Depends(PermissionDependency([[IsAdmin], [IsAuthenticated, IsUserOwner]]))
+        Depends(PermissionDependency(IsAdmin, OR, (IsAuthenticated, AND, IsUserOwner)))
     ],
 )
 @version(1)
-async def delete_user(user_id: int = Depends(get_path_user_id), session: Session = Depends(get_db)):
+async def delete_user(user_id: int = Depends(get_path_user_id), session: AsyncSession = Depends(get_db)):
     return await UserService(session).delete_user(user_id)
@@ -0,0 +1,76 @@
+import logging
+import threading
+
+import orjson
+import pytest
+
+from core.helpers.logger import LogPipeline, get_logger
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    root = logging.getLogger()
+    handlers, level = root.handlers, root.level
+
+    pipeline = LogPipeline(level="INFO", path=str(tmp_path / "logs" / "test.log"))
+    pipeline.start()
+    yield pipeline
+
+    pipeline.stop()
+    root.handlers, root.level = handlers, level
+
+
+def read_entries(pipeline: LogPipeline) -> list[dict]:
+    with open(pipeline.path, encoding="utf-8") as file:
+        return [orjson.loads(line) for line in file]
+
+
+def test_records_are_written_by_the_listener_thread(pipeline: LogPipeline):
+    writers = []
+    file_handler = pipeline.listener.handlers[-1]
+    emit = file_handler.emit
+
+    def record_writer(record: logging.LogRecord) -> None:
+        writers.append(threading.current_thread())
+        emit(record)
+
+    file_handler.emit = record_writer
+
+    logger = get_logger("tests.logger")
+    logger.info("Vote of %s", "player", extra={"pool_id": "pool"})
+    logger.debug("Below the level")
+
+    try:
+        raise ValueError("broken")
+    except ValueError:
+        logger.exception("Action failed")
+
+    pipeline.stop()
+
+    first, second = read_entries(pipeline)
+    assert first["message"] == "Vote of player"
+    assert first["level"] == "INFO"
+    assert first["logger"] == "tests.logger"
+    assert first["pool_id"] == "pool"
+    assert second["message"] == "Action failed"
+    assert "ValueError: broken" in second["exception"]
+    assert threading.current_thread() not in writers
+
+
+def test_sampled_logger(pipeline: LogPipeline):
+    logger = get_logger("tests.logger.sampled", sample_every=10)
+
+    for number in range(25):
+        logger.warning("Dropped %d", number)
+
+    logger.debug("Below the level")
+    pipeline.stop()
+
+    entries = read_entries(pipeline)
+    assert [entry["message"] for entry in entries] == [
+        "Dropped 0",
+        "Dropped 10",
+        "Dropped 20",
+    ]
+    assert entries[0]["sampled"] == 10
+    assert logger.count == 25
@@ -0,0 +1,49 @@
+import pytest
+from httpx import AsyncClient
+
+from core.helpers.metrics import MetricsRegistry
+
+
+@pytest.mark.asyncio
+async def test_metrics_as_admin(client: AsyncClient, admin_token_headers: dict[str, str]):
+    admin_headers = await admin_token_headers
+
+    res = await client.get("/api/v1/metrics", headers=admin_headers)
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+
+    assert "# TYPE quizzap_websocket_connections gauge" in res.text
+    assert "# TYPE quizzap_websocket_fan_out_seconds histogram" in res.text
+    assert 'quizzap_event_loop_lag_seconds_bucket{le="+Inf"}' in res.text
+
+
+@pytest.mark.asyncio
+async def test_metrics_as_user(client: AsyncClient, normal_user_token_headers: dict[str, str]):
+    normal_headers = await normal_user_token_headers
+
+    res = await client.get("/api/v1/metrics", headers=normal_headers)
+    assert res.status_code == 401
+
+
+def test_metrics_render():
+    registry = MetricsRegistry()
+    packets = registry.counter("packets_total", "Packets.", labels=("action",))
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    registry.gauge("pools", "Pools.", lambda: 3)
+
+    packets.inc("SUBMIT_VOTE")
+    packets.inc("SUBMIT_VOTE")
+    packets.inc('say "hi"')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(5)
+
+    lines = registry.render().splitlines()
+
+    assert 'packets_total{action="SUBMIT_VOTE"} 2' in lines
+    assert 'packets_total{action="say \\"hi\\""} 1' in lines
+    assert 'latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{le="1.0"} 2' in lines
+    assert 'latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "latency_seconds_count 3" in lines
+    assert "pools 3" in lines
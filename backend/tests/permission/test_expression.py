@@ -0,0 +1,83 @@
+import pytest
+
+from core.fastapi.dependencies.permission.expression import compile_expression
+from core.fastapi.dependencies.permission.keyword import AND, NOT, OR
+
+
+class Perm:
+    pass
+
+
+class Yes(Perm):
+    pass
+
+
+class No(Perm):
+    pass
+
+
+class Other(Perm):
+    pass
+
+
+def make_check(checked: list[str]):
+    async def check(permission: Perm) -> bool:
+        checked.append(type(permission).__name__)
+        return not isinstance(permission, No)
+
+    return check
+
+
+async def evaluate(*perms) -> tuple[bool, list[str]]:
+    checked = []
+    result = await compile_expression(perms, Perm).evaluate(make_check(checked), {})
+    return result, checked
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "perms, expected",
+    [
+        ((Yes,), True),
+        ((No,), False),
+        ((NOT, No), True),
+        ((No, OR, Yes, AND, Yes), True),
+        ((No, OR, Yes, AND, No), False),
+        ((Yes, OR, No, AND, No), True),
+        ((NOT, (No, OR, Yes)), False),
+        (([[Yes]],), True),
+    ],
+)
+async def test_expression_result(perms, expected):
+    result, _ = await evaluate(*perms)
+    assert result is expected
+
+
+@pytest.mark.asyncio
+async def test_expression_short_circuits_and_memoizes():
+    result, checked = await evaluate(Yes, OR, No)
+    assert result is True
+    assert checked == ["Yes"]
+
+    result, checked = await evaluate(No, AND, Other, OR, (Other, AND, No))
+    assert result is False
+    assert checked == ["No", "Other"]
+
+
+@pytest.mark.parametrize(
+    "perms",
+    [
+        (),
+        (Yes, No),
+        (Yes, NOT, No),
+        (AND, Yes),
+        (Yes, OR),
+        (NOT, NOT, Yes),
+        (Yes, OR, AND, No),
+        ([Yes], [No]),
+        (object,),
+    ],
+)
+def test_invalid_expression_fails_to_compile(perms):
+    with pytest.raises(ValueError):
+        compile_expression(perms, Perm)
@@ -0,0 +1,98 @@
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.quiz.schemas.quiz import UpdateQuizSchema
+from app.quiz.services.quiz import QuizService
+from app.user.services.user import UserService
+from core.db import Base
+from core.db.models import Quiz, User
+from core.fastapi.dependencies.permission.permissions import IsAdmin, IsQuizOwner
+from core.helpers.hashids import encode
+
+
+@pytest_asyncio.fixture()
+async def session():
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        user = User(username="admin", password="admin", is_admin=True)
+        session.add(user)
+        await session.commit()
+        session.add(Quiz(name="quiz", description="quiz", created_by=user.id))
+        await session.commit()
+        session.expunge_all()
+
+        yield session
+
+    await engine.dispose()
+
+
+def count_selects(session: AsyncSession, table: str) -> list[str]:
+    statements = []
+
+    @event.listens_for(session.bind.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        if statement.startswith("SELECT") and f"FROM {table}" in statement:
+            statements.append(statement)
+
+    return statements
+
+
+@pytest.mark.asyncio
+async def test_permissions_and_services_share_lookups(session: AsyncSession):
+    quiz_selects = count_selects(session, "quiz")
+    user_selects = count_selects(session, "user")
+    request = SimpleNamespace(
+        path_params={"quiz_id": encode(1)},
+        user=SimpleNamespace(id=1),
+    )
+
+    assert await IsAdmin().has_permission(request, session)
+    assert await IsQuizOwner().has_permission(request, session)
+    assert await UserService(session).is_admin(1)
+
+    quiz = await QuizService(session).update_quiz(
+        1,
+        UpdateQuizSchema(name="renamed", description="quiz"),
+    )
+
+    assert quiz.name == "renamed"
+    assert len(user_selects) == 1
+
+    # One lookup, and one refresh of the updated quiz
+    assert len(quiz_selects) == 2
+
+
+@pytest.mark.asyncio
+async def test_quiz_owner_is_the_creator(session: AsyncSession):
+    def request(user_id: int | None, quiz_id: int = 1) -> SimpleNamespace:
+        return SimpleNamespace(
+            path_params={"quiz_id": encode(quiz_id)},
+            user=SimpleNamespace(id=user_id),
+        )
+
+    assert await IsQuizOwner().has_permission(request(1), session)
+    assert not await IsQuizOwner().has_permission(request(2), session)
+    assert not await IsQuizOwner().has_permission(request(None), session)
+    assert not await IsQuizOwner().has_permission(request(1, quiz_id=2), session)
+
+
+@pytest.mark.asyncio
+async def test_missing_and_deleted_ids_are_cached(session: AsyncSession):
+    quiz_selects = count_selects(session, "quiz")
+    service = QuizService(session)
+
+    assert await service.repo.get_by_id(2) is None
+    assert await service.repo.get_by_id(2) is None
+    assert len(quiz_selects) == 1
+
+    await service.repo.delete_by_id(1)
+    assert await service.repo.get_by_id(1) is None
+    assert len(quiz_selects) == 1
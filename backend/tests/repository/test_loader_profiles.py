@@ -0,0 +1,118 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.quiz.repository.quiz import QuizRepository
+from app.quiz.schemas.quiz import QuizSchema
+from app.quiz.services.quiz import QuizService
+from core.db import Base
+from core.db.models import Answer, Question, Quiz, User
+
+
+QUESTIONS_PER_QUIZ = 3
+ANSWERS_PER_QUESTION = 4
+
+
+@pytest_asyncio.fixture()
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    yield engine
+
+    await engine.dispose()
+
+
+async def seed(engine, quizzes: int) -> None:
+    async with AsyncSession(engine) as session:
+        for number in range(quizzes):
+            creator = User(username=f"user {number}", password="user")
+            session.add(
+                Quiz(
+                    name=f"quiz {number}",
+                    description="quiz",
+                    creator=creator,
+                    questions=[
+                        Question(
+                            name=f"question {question}",
+                            description="question",
+                            answers=[
+                                Answer(description=f"answer {answer}")
+                                for answer in range(ANSWERS_PER_QUESTION)
+                            ],
+                        )
+                        for question in range(QUESTIONS_PER_QUIZ)
+                    ],
+                )
+            )
+
+        await session.commit()
+
+
+def count_selects(engine) -> list[str]:
+    statements = []
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        if statement.startswith("SELECT"):
+            statements.append(statement)
+
+    return statements
+
+
+async def list_quizzes(engine) -> list[dict]:
+    async with AsyncSession(engine) as session:
+        quizzes = await QuizService(session).get_quizzes(profile="full")
+        return [QuizSchema.model_validate(quiz).model_dump() for quiz in quizzes]
+
+
+@pytest.mark.asyncio
+async def test_list_runs_a_constant_amount_of_queries(engine):
+    statements = count_selects(engine)
+
+    await seed(engine, quizzes=2)
+    statements.clear()
+    quizzes = await list_quizzes(engine)
+
+    assert len(quizzes) == 2
+    assert len(quizzes[0]["questions"]) == QUESTIONS_PER_QUIZ
+    assert len(quizzes[0]["questions"][0]["answers"]) == ANSWERS_PER_QUESTION
+
+    # The quizzes joined with their creator, the questions and the answers
+    assert len(statements) == 3
+
+    await seed(engine, quizzes=20)
+    statements.clear()
+
+    assert len(await list_quizzes(engine)) == 22
+    assert len(statements) == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_model_loads_what_a_profile_misses(engine):
+    await seed(engine, quizzes=1)
+    statements = count_selects(engine)
+
+    async with AsyncSession(engine) as session:
+        repo = QuizRepository(session)
+
+        quiz = await repo.get_by_id(1, profile="bare")
+        assert await repo.get_by_id(1, profile="bare") is quiz
+        assert len(statements) == 1
+
+        assert await repo.get_by_id(1, profile="full") is quiz
+        assert QuizSchema.model_validate(quiz).creator.username == "user 0"
+        assert len(statements) == 4
+
+        assert await repo.get_by_id(1, profile="questions") is quiz
+        assert len(statements) == 4
+
+
+@pytest.mark.asyncio
+async def test_unknown_profile(engine):
+    async with AsyncSession(engine) as session:
+        with pytest.raises(ValueError):
+            await QuizRepository(session).get(profile="everything")
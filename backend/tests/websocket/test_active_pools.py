@@ -0,0 +1,57 @@
+from core.helpers.websocket.active_pools import ActivePools
+
+
+class FakeConnection:
+    @property
+    def id(self):
+        return id(self)
+
+
+def test_append_and_remove_keep_counts():
+    pools = ActivePools()
+    first = [FakeConnection() for _ in range(3)]
+    second = [FakeConnection() for _ in range(2)]
+
+    for connection in first:
+        pools.append("first", connection)
+    for connection in second:
+        pools.append("second", connection)
+
+    assert pools.get_connection_count() == 5
+    assert pools.get_connection_count("first") == 3
+    assert pools.get_pool_id(second[0]) == "second"
+    assert pools.get_client(first[2])["number"] == 3
+
+    pools.remove("first", first[1])
+    assert pools.get_connection_count() == 4
+    assert pools.get_connection_count("first") == 2
+    assert pools.get_pool_id(first[1]) is None
+
+    assert pools.remove_connection(second[0]) == "second"
+    assert pools.remove_connection(second[0]) is None
+    assert pools.get_connection_count() == 3
+
+
+def test_numbers_are_not_reused():
+    pools = ActivePools()
+    first, second, third = FakeConnection(), FakeConnection(), FakeConnection()
+
+    pools.append("pool", first)
+    pools.append("pool", second)
+    pools.remove("pool", first)
+    pools.append("pool", third)
+
+    assert pools.get_client(third)["number"] == 3
+
+
+def test_empty_pool_is_removed():
+    pools = ActivePools()
+    connection = FakeConnection()
+
+    pools.append("pool", connection)
+    pools.append("pool", connection)
+    assert pools.get_connection_count("pool") == 1
+
+    pools.remove("pool", connection)
+    assert "pool" not in pools
+    assert pools.get_connection_count() == 0
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from core.helpers.token.token_helper import TokenHelper
+from core.helpers.websocket.base import BaseWebsocketService
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.permission.permissions import AllowAll, IsAuthenticated
+from tests.websocket.test_manager import FakeWebSocket
+
+
+@pytest.mark.asyncio
+async def test_denied_handshake_is_closed_before_accept():
+    manager = WebSocketConnectionManager(IsAuthenticated)
+    service = BaseWebsocketService(manager)
+    ws = FakeWebSocket()
+
+    await asyncio.wait_for(service.handler(ws, "pool", "not a token"), 0.1)
+
+    assert ws.close_code == 1008
+    assert ws.subprotocol is None
+    assert ws.received == []
+    assert "pool" not in manager.active_pools
+
+
+@pytest.mark.asyncio
+async def test_handshake_decodes_token_once_and_keeps_claims(monkeypatch):
+    decoded = []
+    decode = TokenHelper.decode
+
+    def counting_decode(token: str) -> dict:
+        decoded.append(token)
+        return decode(token)
+
+    monkeypatch.setattr(TokenHelper, "decode", staticmethod(counting_decode))
+
+    manager = WebSocketConnectionManager(AllowAll)
+    service = BaseWebsocketService(manager, perms=(IsAuthenticated,))
+    token = TokenHelper.encode_access(payload={"user_id": "abc"})
+    ws = FakeWebSocket()
+
+    task = asyncio.ensure_future(service.handler(ws, "pool", token))
+    await asyncio.sleep(0.01)
+
+    client = next(iter(manager.active_pools["pool"]["clients"].values()))
+    assert client["ws"].claims["user_id"] == "abc"
+    assert decoded == [token]
+
+    ws.incoming.put_nowait({"type": "websocket.disconnect", "code": 1001})
+    await task
+
+
+@pytest.mark.asyncio
+async def test_anonymous_handshake_is_allowed_by_allow_all():
+    manager = WebSocketConnectionManager(AllowAll)
+    ws = FakeWebSocket()
+
+    claims = manager.decode_claims(None)
+    assert claims is None
+    assert await manager.check_auth("pool", claims) is None
+
+    connection = await manager.connect(ws, "pool", claims=claims)
+    assert connection.claims is None
+    connection.stop()
@@ -0,0 +1,183 @@
+import asyncio
+
+import orjson
+import pytest
+
+from core.db.enums import WebsocketActionEnum
+from core.helpers.websocket.broker import (
+    InProcessBroker,
+    InProcessHub,
+    UnixSocketBroker,
+    UnixSocketHub,
+)
+from core.helpers.websocket.broker.unix import LineWriter, wait_for_hub
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.schemas.packet import BaseWebsocketPacketSchema
+from tests.websocket.test_manager import FakeWebSocket
+
+
+def make_packet(message: str) -> BaseWebsocketPacketSchema:
+    return BaseWebsocketPacketSchema(
+        action=WebsocketActionEnum.POOL_MESSAGE,
+        message=message,
+    )
+
+
+async def assert_packets_cross_workers(
+    first: WebSocketConnectionManager,
+    second: WebSocketConnectionManager,
+):
+    on_first, on_second, elsewhere = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await first.connect(on_first, "pool")
+    await second.connect(on_second, "pool")
+    await second.connect(elsewhere, "other")
+
+    await first.pool_packet("pool", make_packet("pool"))
+    await second.global_packet(make_packet("global"))
+
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if len(on_first.received) == 2 and len(on_second.received) == 2:
+            break
+
+    def messages(ws: FakeWebSocket) -> list[str]:
+        return sorted(orjson.loads(frame)["message"] for frame in ws.received)
+
+    assert messages(on_first) == ["global", "pool"]
+    assert messages(on_second) == ["global", "pool"]
+    assert messages(elsewhere) == ["global"]
+
+    await first.pool_disconnect("pool")
+    await second.pool_disconnect("pool")
+    await second.pool_disconnect("other")
+
+
+@pytest.mark.asyncio
+async def test_in_process_broker():
+    hub = InProcessHub()
+    first = WebSocketConnectionManager(broker=InProcessBroker(hub))
+    second = WebSocketConnectionManager(broker=InProcessBroker(hub))
+    await first.start()
+    await second.start()
+
+    await assert_packets_cross_workers(first, second)
+
+    await first.stop()
+    await second.stop()
+
+
+@pytest.mark.asyncio
+async def test_unix_socket_broker(tmp_path):
+    path = str(tmp_path / "hub.sock")
+    hub = UnixSocketHub(path)
+    await hub.start()
+
+    first = WebSocketConnectionManager(broker=UnixSocketBroker(path))
+    second = WebSocketConnectionManager(broker=UnixSocketBroker(path))
+    await first.start()
+    await second.start()
+
+    await assert_packets_cross_workers(first, second)
+
+    await first.stop()
+    await second.stop()
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_unix_socket_broker_reconnects_to_a_new_hub(tmp_path):
+    path = str(tmp_path / "hub.sock")
+    hub = UnixSocketHub(path)
+    await hub.start()
+
+    first = WebSocketConnectionManager(broker=UnixSocketBroker(path, 0.01))
+    second = WebSocketConnectionManager(broker=UnixSocketBroker(path, 0.01))
+    await first.start()
+    await second.start()
+
+    await hub.stop()
+    hub = UnixSocketHub(path)
+    await hub.start()
+
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if len(hub.peers) == 2:
+            break
+
+    await assert_packets_cross_workers(first, second)
+
+    await first.stop()
+    await second.stop()
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_line_writer_drops_lines_over_its_limit(tmp_path):
+    path = str(tmp_path / "hub.sock")
+    server = await asyncio.start_unix_server(lambda reader, writer: None, path)
+    _, writer = await asyncio.open_unix_connection(path)
+
+    line_writer = LineWriter(writer, max_lines=2)
+    queued = [line_writer.write(b"line\n") for _ in range(3)]
+
+    assert queued == [True, True, False]
+    assert line_writer.dropped == 1
+
+    line_writer.close()
+    server.close()
+    await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_hub(tmp_path):
+    path = str(tmp_path / "hub.sock")
+
+    with pytest.raises(TimeoutError):
+        wait_for_hub(path, timeout=0.1)
+
+    hub = UnixSocketHub(path)
+    await hub.start()
+
+    await asyncio.get_running_loop().run_in_executor(None, wait_for_hub, path, 1)
+    await hub.stop()
+
+
+@pytest.mark.asyncio
+async def test_unix_socket_broker_skips_bad_lines(tmp_path, monkeypatch):
+    monkeypatch.setattr("core.helpers.websocket.broker.unix.LINE_LIMIT", 64)
+    path = str(tmp_path / "hub.sock")
+    lines = [
+        b"not json\n",
+        b"[1, 2]\n",
+        orjson.dumps(["pool", None, "x" * 100]) + b"\n",
+        orjson.dumps(["fails", None, "frame"]) + b"\n",
+        orjson.dumps(["pool", None, "frame"]) + b"\n",
+    ]
+
+    async def feed(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.writelines(lines)
+        await writer.drain()
+        await reader.read()
+
+    server = await asyncio.start_unix_server(feed, path)
+    delivered = []
+
+    def on_message(channel: str, frame: str, key: str | None):
+        if channel == "fails":
+            raise RuntimeError
+        delivered.append((channel, frame))
+
+    broker = UnixSocketBroker(path)
+    await broker.start(on_message)
+
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if delivered:
+            break
+
+    assert delivered == [("pool", "frame")]
+    assert not broker.reader_task.done()
+
+    await broker.stop()
+    server.close()
+    await server.wait_closed()
@@ -0,0 +1,110 @@
+import asyncio
+
+import msgpack
+import orjson
+import pytest
+from fastapi.websockets import WebSocketDisconnect
+
+from core.db.enums import WebsocketActionEnum, WebsocketProtocolEnum
+from core.exceptions.websocket import (
+    ActionNotFoundException,
+    JSONSerializableException,
+    SuccessfullConnection,
+)
+from core.helpers.websocket.codec import decode_frame, negotiate_protocol
+from core.helpers.websocket.frame_cache import FrameCache
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.schemas.packet import base_packet_parser
+from tests.websocket.test_manager import FakeWebSocket, make_packet
+
+
+def test_negotiate_protocol():
+    assert negotiate_protocol([]) is None
+    assert negotiate_protocol(["graphql-ws"]) is None
+    assert negotiate_protocol(["graphql-ws", "msgpack", "json"]) == (
+        WebsocketProtocolEnum.MSGPACK
+    )
+
+
+def test_decode_frame_rejects_non_objects():
+    assert decode_frame(msgpack.packb({"a": 1})) == {"a": 1}
+    assert decode_frame('{"a": 1}') == {"a": 1}
+
+    for frame in ["[1, 2]", "{nope", b"\xc1"]:
+        with pytest.raises(JSONSerializableException):
+            decode_frame(frame)
+
+
+@pytest.mark.asyncio
+async def test_mixed_protocols_in_one_pool():
+    manager = WebSocketConnectionManager()
+    json_ws = FakeWebSocket()
+    msgpack_ws = [FakeWebSocket(subprotocols=["msgpack"]) for _ in range(2)]
+
+    for ws in [json_ws, *msgpack_ws]:
+        await manager.connect(ws, "pool")
+
+    await manager.pool_packet("pool", make_packet())
+    await asyncio.sleep(0.01)
+
+    assert json_ws.subprotocol is None
+    assert msgpack_ws[0].subprotocol == "msgpack"
+    assert orjson.loads(json_ws.received[0])["message"] == "hello"
+
+    # Transcoded once for the whole pool
+    frame = msgpack_ws[0].received[0]
+    assert frame is msgpack_ws[1].received[0]
+    assert msgpack.unpackb(frame) == orjson.loads(json_ws.received[0])
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_listen_binary_frames():
+    manager = WebSocketConnectionManager()
+    ws = FakeWebSocket(subprotocols=["msgpack"])
+    connection = await manager.connect(ws, "pool")
+
+    ws.incoming.put_nowait(
+        {
+            "type": "websocket.receive",
+            "bytes": msgpack.packb(
+                {
+                    "action": "POOL_MESSAGE",
+                    "message": "hi",
+                    "payload": {"message": "hello"},
+                }
+            ),
+        }
+    )
+    packet = await connection.listen(base_packet_parser)
+    assert packet.action == WebsocketActionEnum.POOL_MESSAGE
+    assert packet.payload.message == "hello"
+
+    ws.incoming.put_nowait({"type": "websocket.disconnect", "code": 1001})
+    with pytest.raises(WebSocketDisconnect):
+        await connection.listen(base_packet_parser)
+
+    await manager.pool_disconnect("pool")
+
+
+def test_status_frames_are_cached_per_class_and_protocol():
+    cache = FrameCache()
+
+    frame = cache.status_frame(SuccessfullConnection)
+    assert cache.status_frame(SuccessfullConnection) is frame
+    assert orjson.loads(frame)["status_code"] == SuccessfullConnection.status_code
+
+    msgpack_frame = cache.status_frame(
+        ActionNotFoundException(),
+        WebsocketProtocolEnum.MSGPACK,
+    )
+    assert msgpack.unpackb(msgpack_frame)["message"] == "action does not exist"
+    assert msgpack_frame is cache.status_frame(
+        ActionNotFoundException,
+        WebsocketProtocolEnum.MSGPACK,
+    )
+
+    # A message of its own is not static, so it is not cached
+    custom = cache.status_frame(ActionNotFoundException("where is greg"))
+    assert orjson.loads(custom)["message"] == "where is greg"
+    assert len(cache.status_frames) == 2
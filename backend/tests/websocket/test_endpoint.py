@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from core.helpers.hashids import encode
+from core.helpers.token.token_helper import TokenHelper
+
+
+def test_websocket_handshake_through_router(fastapi_client: TestClient):
+    token = TokenHelper.encode_access(payload={"user_id": encode(1)})
+
+    with fastapi_client as client:
+        with client.websocket_connect(
+            f"/api/v1/quizzes/websocket/s1?token={token}"
+        ) as websocket:
+            packet = websocket.receive_json()
+
+    assert packet["action"] == "STATUS_CODE"
+    assert packet["status_code"] == 202
+
+
+def test_websocket_handshake_with_invalid_token_is_denied(fastapi_client: TestClient):
+    with fastapi_client as client:
+        with pytest.raises(WebSocketDisconnect) as exc_info:
+            with client.websocket_connect(
+                "/api/v1/quizzes/websocket/s1?token=invalid"
+            ) as websocket:
+                websocket.receive_json()
+
+    assert exc_info.value.code == 1008
+
+
+@pytest.mark.parametrize("user_id,status_code", [(1, None), (2, 403)])
+def test_only_admins_can_send_global_messages(
+    fastapi_client: TestClient,
+    user_id: int,
+    status_code: int | None,
+):
+    token = TokenHelper.encode_access(payload={"user_id": encode(user_id)})
+
+    with fastapi_client as client:
+        with client.websocket_connect(
+            f"/api/v1/quizzes/websocket/s1?token={token}"
+        ) as websocket:
+            # The status code of the handshake and the resume token
+            websocket.receive_json()
+            websocket.receive_json()
+
+            websocket.send_json(
+                {
+                    "action": "GLOBAL_MESSAGE",
+                    "message": "hello",
+                    "payload": {"message": "hello"},
+                }
+            )
+            packet = websocket.receive_json()
+
+    assert packet["status_code"] == status_code
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from core.exceptions.websocket import MailboxFullException
+from core.helpers.websocket.executor import PoolExecutor
+
+
+@pytest.mark.asyncio
+async def test_actions_of_a_pool_run_in_order():
+    executor = PoolExecutor()
+    order = []
+
+    async def action(number: int, delay: float):
+        await asyncio.sleep(delay)
+        order.append(number)
+
+    futures = [
+        executor.submit("pool", action, number=number, delay=0.01 * (3 - number))
+        for number in range(3)
+    ]
+    await asyncio.gather(*futures)
+
+    assert order == [0, 1, 2]
+    assert executor.action_stats["action"]["count"] == 3
+    await executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_pools_run_concurrently():
+    executor = PoolExecutor()
+    started = asyncio.Event()
+
+    async def blocker():
+        await started.wait()
+
+    async def starter():
+        started.set()
+
+    blocked = executor.submit("first", blocker)
+    await asyncio.wait_for(executor.submit("second", starter), 1)
+    await asyncio.wait_for(blocked, 1)
+    await executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_mailbox_limit():
+    executor = PoolExecutor(max_mailbox_size=2)
+
+    async def action():
+        pass
+
+    executor.submit("pool", action)
+    executor.submit("pool", action)
+
+    with pytest.raises(MailboxFullException):
+        executor.submit("pool", action)
+
+    await executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_close_drains_mailbox_and_stops_worker():
+    executor = PoolExecutor()
+    done = []
+
+    async def action(number: int):
+        done.append(number)
+
+    for number in range(3):
+        executor.submit("pool", action, number=number)
+
+    worker = executor.workers["pool"]
+    executor.close("pool")
+    await asyncio.wait_for(worker, 1)
+
+    assert done == [0, 1, 2]
+    assert "pool" not in executor.mailboxes
+
+
+@pytest.mark.asyncio
+async def test_failing_action_does_not_stop_worker():
+    executor = PoolExecutor()
+
+    async def failing():
+        raise ValueError
+
+    async def action():
+        return "ok"
+
+    failed = executor.submit("pool", failing)
+    assert await executor.submit("pool", action) == "ok"
+
+    with pytest.raises(ValueError):
+        await failed
+
+    await executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_submit_while_closing_reuses_the_worker():
+    executor = PoolExecutor()
+    release = asyncio.Event()
+    running = []
+    order = []
+
+    async def action(number: int):
+        running.append(number)
+        assert len(running) == 1
+        await release.wait()
+        order.append(number)
+        running.remove(number)
+
+    executor.submit("pool", action, number=0)
+    worker = executor.workers["pool"]
+    executor.close("pool")
+
+    late = executor.submit("pool", action, number=1)
+    assert executor.workers["pool"] is worker
+
+    release.set()
+    await asyncio.wait_for(late, 1)
+    await asyncio.wait_for(worker, 1)
+
+    assert order == [0, 1]
+    assert "pool" not in executor.mailboxes
+    assert "pool" not in executor.workers
+
+
+@pytest.mark.asyncio
+async def test_cancelled_action_does_not_stop_worker():
+    executor = PoolExecutor()
+
+    async def cancelled():
+        raise asyncio.CancelledError
+
+    async def action():
+        return "ok"
+
+    failed = executor.submit("pool", cancelled)
+    assert await asyncio.wait_for(executor.submit("pool", action), 1) == "ok"
+    assert failed.cancelled()
+
+    await executor.shutdown()
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import orjson
+import pytest
+
+from core.helpers.websocket.heartbeat import Heartbeat
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.websocket import WS_4009_UNRESPONSIVE
+from tests.websocket.test_manager import FakeWebSocket
+
+
+def actions(ws: FakeWebSocket) -> list[str]:
+    return [orjson.loads(frame)["action"] for frame in ws.received]
+
+
+@pytest.mark.asyncio
+async def test_silent_connection_is_pinged_then_reaped():
+    manager = WebSocketConnectionManager()
+    heartbeat = Heartbeat(manager, interval=0.01, misses=1)
+    alive, silent = FakeWebSocket(), FakeWebSocket()
+
+    alive_connection = await manager.connect(alive, "pool")
+    await manager.connect(silent, "pool")
+
+    for _ in range(3):
+        await asyncio.sleep(0.02)
+        # Answering a ping is seen as receiving a frame
+        alive_connection.last_seen = time.monotonic()
+        await heartbeat.sweep()
+
+    await asyncio.sleep(0.01)
+
+    assert actions(silent) == ["PING"]
+    assert silent.close_code == WS_4009_UNRESPONSIVE
+    assert manager.get_connection_count("pool") == 1
+    assert heartbeat.reaped == 1
+
+    assert actions(alive) == ["USER_DISCONNECT"]
+    assert orjson.loads(alive.received[0])["payload"] == {"number": 2}
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_heartbeat_runs_as_one_task():
+    manager = WebSocketConnectionManager()
+    manager.heartbeat = Heartbeat(manager, interval=0.01, misses=0)
+    sockets = [FakeWebSocket() for _ in range(5)]
+
+    for ws in sockets:
+        await manager.connect(ws, "pool")
+
+    await manager.start()
+    await asyncio.sleep(0.05)
+    await manager.stop()
+
+    assert manager.heartbeat.sweeper is None
+    assert manager.get_connection_count() == 0
+    assert all(ws.close_code == WS_4009_UNRESPONSIVE for ws in sockets)
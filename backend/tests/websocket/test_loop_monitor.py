@@ -0,0 +1,83 @@
+import asyncio
+import time
+
+import pytest
+
+from core.helpers.loop_monitor import loop_monitor
+from core.helpers.websocket.executor import PoolExecutor
+
+
+async def wait_for_block() -> None:
+    while not loop_monitor.blocks:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_blocking_action_is_recorded():
+    executor = PoolExecutor()
+    loop_monitor.blocks.clear()
+    loop_monitor.start()
+
+    async def hash_password():
+        time.sleep(loop_monitor.threshold * 3)
+
+    try:
+        await executor.submit("pool", hash_password)
+        await asyncio.wait_for(wait_for_block(), 1)
+    finally:
+        await loop_monitor.stop()
+        await executor.shutdown()
+
+    block = loop_monitor.blocks[-1]
+    assert block.action == "hash_password"
+    assert block.pool_id == "pool"
+    assert block.duration >= loop_monitor.threshold
+    assert any("hash_password" in line for line in block.stack)
+    assert loop_monitor.blocked_total.values[("hash_password",)] >= 1
+
+
+@pytest.mark.asyncio
+async def test_blocking_callback_is_recorded():
+    loop_monitor.blocks.clear()
+    loop_monitor.start()
+
+    def blocking_callback():
+        time.sleep(loop_monitor.threshold * 3)
+
+    try:
+        asyncio.get_running_loop().call_soon(blocking_callback)
+        await asyncio.wait_for(wait_for_block(), 1)
+    finally:
+        await loop_monitor.stop()
+
+    block = loop_monitor.blocks[-1]
+    assert block.action is None
+    assert block.pool_id is None
+    assert any("blocking_callback" in line for line in block.stack)
+
+
+@pytest.mark.asyncio
+async def test_activity_is_restored():
+    with loop_monitor.activity("outer", "pool"):
+        with loop_monitor.activity("inner"):
+            task = asyncio.current_task()
+            assert loop_monitor.activities[task].action == "inner"
+
+        assert loop_monitor.activities[task].action == "outer"
+
+    assert task not in loop_monitor.activities
+
+
+@pytest.mark.asyncio
+async def test_scope_activity_is_named_by_endpoint():
+    async def get_user():
+        pass
+
+    scope = {"type": "http", "method": "GET", "path": "/api/v1/users/1"}
+
+    with loop_monitor.activity(scope):
+        loop_monitor.loop = asyncio.get_running_loop()
+        assert loop_monitor._get_activity().action == "GET /api/v1/users/1"
+
+        scope["endpoint"] = get_user
+        assert loop_monitor._get_activity().action == "GET get_user"
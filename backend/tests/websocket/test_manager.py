@@ -0,0 +1,191 @@
+import asyncio
+
+import orjson
+import pytest
+from starlette.websockets import WebSocketState
+
+from core.config import config
+from core.db.enums import WebsocketActionEnum, WebsocketOverflowEnum
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.schemas.packet import BaseWebsocketPacketSchema
+from core.helpers.websocket.websocket import WS_4008_SLOW_CONSUMER, WebSocketConnection
+
+
+class FakeWebSocket:
+    def __init__(
+        self,
+        delay: float = 0.0,
+        subprotocols: list[str] | None = None,
+        query_params: dict[str, str] | None = None,
+    ):
+        self.delay = delay
+        self.scope = {"subprotocols": subprotocols or []}
+        self.query_params = query_params or {}
+        self.client_state = WebSocketState.CONNECTING
+        self.application_state = WebSocketState.CONNECTING
+        self.received = []
+        self.incoming = asyncio.Queue()
+        self.subprotocol = None
+        self.close_code = None
+
+    async def accept(self, subprotocol=None):
+        self.subprotocol = subprotocol
+        self.client_state = WebSocketState.CONNECTED
+        self.application_state = WebSocketState.CONNECTED
+
+    async def send_text(self, frame):
+        await asyncio.sleep(self.delay)
+        self.received.append(frame)
+
+    async def send_bytes(self, frame):
+        await self.send_text(frame)
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def close(self, code=1000, reason=None):
+        self.close_code = code
+        self.application_state = WebSocketState.DISCONNECTED
+
+
+def make_packet(
+    action: WebsocketActionEnum = WebsocketActionEnum.POOL_MESSAGE,
+    message: str = "hello",
+) -> BaseWebsocketPacketSchema:
+    return BaseWebsocketPacketSchema(action=action, message=message)
+
+
+@pytest.mark.asyncio
+async def test_pool_packet_slow_client_does_not_block_pool():
+    manager = WebSocketConnectionManager()
+    fast = [FakeWebSocket() for _ in range(10)]
+    slow = FakeWebSocket(delay=5)
+
+    connections = [await manager.connect(ws, "pool") for ws in [slow, *fast]]
+
+    report = await asyncio.wait_for(manager.pool_packet("pool", make_packet()), 0.1)
+    assert report == {"queued": 11, "evicted": 0}
+
+    await asyncio.sleep(0.01)
+    assert all(len(ws.received) == 1 for ws in fast)
+    assert slow.received == []
+
+    for connection in connections:
+        connection.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_packet_encodes_once():
+    manager = WebSocketConnectionManager()
+    sockets = [FakeWebSocket() for _ in range(3)]
+
+    for ws in sockets:
+        await manager.connect(ws, "pool")
+
+    await manager.pool_packet("pool", make_packet())
+    await asyncio.sleep(0.01)
+
+    frames = [ws.received[0] for ws in sockets]
+    assert all(frame is frames[0] for frame in frames)
+    assert orjson.loads(frames[0])["message"] == "hello"
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_pool_packet_unknown_pool():
+    manager = WebSocketConnectionManager()
+
+    report = await manager.pool_packet("nope", make_packet())
+
+    assert report == {"queued": 0, "evicted": 0}
+
+
+@pytest.mark.asyncio
+async def test_overflow_drop_oldest():
+    connection = WebSocketConnection(FakeWebSocket(), max_queue_size=2)
+
+    for number in range(4):
+        connection.enqueue(str(number))
+
+    assert [frame for _, frame in connection.queue] == ["2", "3"]
+    assert connection.queue_stats == {
+        "depth": 2,
+        "max_depth": 2,
+        "dropped": 2,
+        "coalesced": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_overflow_coalesce():
+    connection = WebSocketConnection(
+        FakeWebSocket(),
+        max_queue_size=2,
+        overflow_policy=WebsocketOverflowEnum.COALESCE,
+    )
+
+    connection.enqueue("tally 1", "TALLY")
+    connection.enqueue("message", "POOL_MESSAGE")
+    connection.enqueue("tally 2", "TALLY")
+
+    assert list(connection.queue) == [("TALLY", "tally 2"), ("POOL_MESSAGE", "message")]
+    assert connection.coalesced == 1
+
+
+@pytest.mark.asyncio
+async def test_overflow_disconnect_evicts_from_pool():
+    manager = WebSocketConnectionManager()
+    ws = FakeWebSocket(delay=5)
+    connection = await manager.connect(ws, "pool")
+    connection.max_queue_size = 1
+    connection.overflow_policy = WebsocketOverflowEnum.DISCONNECT
+
+    reports = [await manager.pool_packet("pool", make_packet()) for _ in range(3)]
+    await asyncio.sleep(0.01)
+
+    assert sum(report["evicted"] for report in reports) == 1
+    assert manager.get_connection_count() == 0
+    assert ws.close_code == WS_4008_SLOW_CONSUMER
+
+
+@pytest.mark.asyncio
+async def test_evicted_consumer_is_torn_down_like_a_disconnect():
+    manager = WebSocketConnectionManager()
+    slow_ws = FakeWebSocket(delay=5)
+    other_ws = FakeWebSocket()
+    slow = await manager.connect(slow_ws, "pool")
+    await manager.connect(other_ws, "pool")
+    await manager.send_resume_token(slow, "pool")
+    slow.max_queue_size = 1
+    slow.overflow_policy = WebsocketOverflowEnum.DISCONNECT
+
+    for _ in range(3):
+        await manager.pool_packet("pool", make_packet())
+    await asyncio.sleep(0.01)
+
+    assert manager.get_connection_count("pool") == 1
+    assert slow.id not in manager.resume_tokens.tokens
+    assert any(
+        orjson.loads(frame)["action"] == WebsocketActionEnum.USER_DISCONNECT.value
+        for frame in other_ws.received
+    )
+
+
+@pytest.mark.asyncio
+async def test_send_past_the_timeout_evicts(monkeypatch):
+    monkeypatch.setattr(config, "WEBSOCKET_SEND_TIMEOUT", 0.01)
+    manager = WebSocketConnectionManager()
+    ws = FakeWebSocket(delay=5)
+    connection = await manager.connect(ws, "pool")
+
+    await manager.pool_packet("pool", make_packet())
+    await asyncio.sleep(0.05)
+
+    assert connection.evicted
+    assert ws.close_code == WS_4008_SLOW_CONSUMER
+    assert ws.received == []
+    assert manager.missed_deadlines == 1
+    assert manager.get_connection_count() == 0
+
+    report = await manager.pool_packet("pool", make_packet())
+    assert report == {"queued": 0, "evicted": 0}
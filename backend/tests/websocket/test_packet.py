@@ -0,0 +1,50 @@
+import msgpack
+import pytest
+
+from core.db.enums import QuizSessionActionEnum
+from core.exceptions.websocket import (
+    ActionNotFoundException,
+    ActionNotImplementedException,
+    JSONSerializableException,
+    ValidationException,
+)
+from core.helpers.websocket.schemas.packet import (
+    QuestionStopPacketSchema,
+    SubmitVotePacketSchema,
+    quiz_packet_parser,
+)
+
+
+def test_parse_routes_on_action():
+    packet = quiz_packet_parser.parse(
+        '{"action": "SUBMIT_VOTE", "message": "", "payload": {"answer": 2}}'
+    )
+    assert isinstance(packet, SubmitVotePacketSchema)
+    assert packet.action == QuizSessionActionEnum.SUBMIT_VOTE
+    assert packet.payload.answer == 2
+
+    packet = quiz_packet_parser.parse('{"action": "QUESTION_STOP", "message": ""}')
+    assert isinstance(packet, QuestionStopPacketSchema)
+
+
+@pytest.mark.parametrize(
+    "frame,exception",
+    [
+        ("{nope", JSONSerializableException),
+        ("[1, 2]", JSONSerializableException),
+        ('{"message": ""}', ActionNotFoundException),
+        ('{"action": "DANCE", "message": ""}', ActionNotFoundException),
+        ('{"action": [], "message": ""}', ActionNotFoundException),
+        ('{"action": {}, "message": ""}', ActionNotFoundException),
+        (msgpack.packb({"action": ["PING"], "message": ""}), ActionNotFoundException),
+        ('{"action": "STATUS_CODE", "message": ""}', ActionNotImplementedException),
+        (
+            '{"action": "SUBMIT_VOTE", "message": "", "payload": {"answer": -1}}',
+            ValidationException,
+        ),
+        ('{"action": "SUBMIT_VOTE", "message": ""}', ValidationException),
+    ],
+)
+def test_parse_errors(frame, exception):
+    with pytest.raises(exception):
+        quiz_packet_parser.parse(frame)
@@ -0,0 +1,346 @@
+import asyncio
+
+import orjson
+import pytest
+
+from app.quiz.exceptions.quiz import (
+    AlreadyVotedException,
+    InvalidAnswerException,
+    NotSessionHostException,
+)
+from app.quiz.websocket import session as session_module
+from app.quiz.websocket.leaderboard import Leaderboard
+from app.quiz.websocket.quiz import QuizWebsocketService
+from app.quiz.websocket.scheduler import TimingWheel
+from app.quiz.websocket.session import QuizSession, quiz_sessions
+from app.quiz.websocket.snapshot import QuestionSnapshot, QuizSnapshot
+from app.quiz.websocket.tally import VoteTally
+from core.db.enums import WebsocketSessionEnum
+from core.db.models import Answer, Question, Quiz
+from core.helpers.hashids import encode
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.schemas.packet import SubmitVotePacketSchema
+from core.helpers.websocket.websocket import WebSocketConnection
+from tests.websocket.test_manager import FakeWebSocket
+
+
+QUESTIONS = (
+    QuestionSnapshot(
+        name="Important Greg question",
+        description="Is greg disappointed?",
+        time_limit=0.05,
+        answers=("Yes", "No"),
+        correct_mask=0b01,
+    ),
+    QuestionSnapshot(
+        name="Another Greg question",
+        description="Is greg still disappointed?",
+        time_limit=5,
+        answers=("Yes", "No"),
+        correct_mask=0b01,
+    ),
+)
+
+
+def actions(ws: FakeWebSocket) -> list[str]:
+    return [orjson.loads(frame)["action"] for frame in ws.received]
+
+
+async def make_session(
+    players: int,
+    questions: tuple[QuestionSnapshot, ...] = QUESTIONS,
+):
+    manager = WebSocketConnectionManager()
+    host = FakeWebSocket()
+    host_connection = await manager.connect(host, "pool")
+    sockets = [FakeWebSocket() for _ in range(players)]
+
+    for ws in sockets:
+        await manager.connect(ws, "pool")
+
+    wheel = TimingWheel(tick=0.01, slots=8)
+    quiz = QuizSnapshot(id=1, name="Greg quiz", questions=tuple(questions))
+    session = QuizSession("pool", quiz, host_connection, manager, wheel)
+    return manager, session, host, sockets
+
+
+@pytest.mark.asyncio
+async def test_timing_wheel_fires_in_order_and_cancels():
+    wheel = TimingWheel(tick=0.01, slots=4)
+    fired = []
+
+    wheel.schedule(0.03, lambda: fired.append("short"))
+    wheel.schedule(0.1, lambda: fired.append("long"))
+    wheel.schedule(0.02, lambda: fired.append("cancelled")).cancel()
+
+    await asyncio.sleep(0.2)
+
+    assert fired == ["short", "long"]
+    assert wheel.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_timing_wheel_keeps_timers_scheduled_a_revolution_ahead():
+    wheel = TimingWheel(tick=0.01, slots=4)
+    loop = asyncio.get_running_loop()
+    fired = [loop.time()]
+
+    # Scheduled from a callback, this lands a full revolution ahead in the slot
+    # that is being advanced
+    def reschedule():
+        fired.append(loop.time())
+        if len(fired) < 4:
+            wheel.schedule(0.035, reschedule)
+
+    wheel.schedule(0.035, reschedule)
+    await asyncio.sleep(0.3)
+
+    assert len(fired) == 4
+    assert all(later - earlier >= 0.035 for earlier, later in zip(fired, fired[1:]))
+    assert wheel.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_vote_from_a_connection_outside_the_pool_is_refused(monkeypatch):
+    manager, session, host, sockets = await make_session(players=1)
+    service = QuizWebsocketService()
+    monkeypatch.setattr(service, "manager", manager)
+    monkeypatch.setitem(quiz_sessions, "pool", session)
+    stranger = WebSocketConnection(FakeWebSocket())
+    await stranger.accept()
+
+    await service.actions["SUBMIT_VOTE"](
+        pool_id="pool",
+        packet=SubmitVotePacketSchema(
+            action="SUBMIT_VOTE", message="", payload={"answer": 0}
+        ),
+        websocket=stranger,
+    )
+
+    assert stranger.ws.received
+    assert orjson.loads(stranger.ws.received[-1])["status_code"] == 404
+    session.close()
+
+
+@pytest.mark.asyncio
+async def test_question_stops_at_deadline():
+    manager, session, host, sockets = await make_session(players=2)
+
+    await session.start_question()
+    assert session.state == WebsocketSessionEnum.IN_PROGRESS
+
+    await asyncio.sleep(0.2)
+
+    assert session.state == WebsocketSessionEnum.FINISHED
+    assert actions(host) == ["QUESTION_START", "QUESTION_STOP", "LEADERBOARD"]
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_question_stops_early_when_everyone_voted():
+    manager, session, host, sockets = await make_session(players=2)
+    session.question_index = 0
+
+    await session.start_question()
+    await session.record_vote(2, 0)
+    assert session.state == WebsocketSessionEnum.IN_PROGRESS
+
+    await session.record_vote(3, 1)
+    assert session.state == WebsocketSessionEnum.FINISHED
+    assert session.timer is None
+
+    await asyncio.sleep(0.01)
+    assert actions(sockets[0]) == [
+        "QUESTION_START",
+        "QUESTION_STOP",
+        "LEADERBOARD",
+        "RANK",
+    ]
+    await manager.pool_disconnect("pool")
+
+
+def test_tally_counts_each_participant_once():
+    tally = VoteTally(3)
+
+    tally.vote(2, 0)
+    tally.vote(17, 2)
+
+    with pytest.raises(AlreadyVotedException):
+        tally.vote(2, 1)
+
+    with pytest.raises(InvalidAnswerException):
+        tally.vote(5, 3)
+
+    assert tally.has_voted(17)
+    assert not tally.has_voted(5)
+    assert tally.flush() == [1, 0, 1]
+    assert tally.flush() is None
+
+
+@pytest.mark.asyncio
+async def test_vote_burst_sends_tally_per_tick():
+    manager, session, host, sockets = await make_session(200, [QUESTIONS[1]])
+    session.tally_interval = 0.02
+
+    await session.start_question()
+
+    # Everyone but the last player votes at once
+    for number in range(2, 201):
+        await session.record_vote(number, number % 2)
+
+    def tallies() -> list[dict]:
+        return [
+            orjson.loads(frame)["payload"]
+            for frame in host.received
+            if orjson.loads(frame)["action"] == "VOTE_TALLY"
+        ]
+
+    for _ in range(100):
+        if tallies():
+            break
+        await asyncio.sleep(0.01)
+
+    # Nothing changed since, so later ticks send nothing
+    await asyncio.sleep(0.1)
+
+    assert len(tallies()) == 1
+    assert tallies()[0]["votes"] == [100, 99]
+    assert actions(sockets[0]) == ["QUESTION_START"]
+
+    await session.record_vote(201, 1)
+    assert session.state == WebsocketSessionEnum.FINISHED
+    assert session.tally_timer is None
+    await manager.pool_disconnect("pool")
+
+
+def test_leaderboard_keeps_ranks_sorted_across_buckets():
+    board = Leaderboard(load=2)
+
+    for number in range(1, 11):
+        board.add(number, number * 10)
+
+    board.add(3, 100)
+    board.remove(10)
+
+    assert [number for number, _ in board] == [3, 9, 8, 7, 6, 5, 4, 2, 1]
+    assert board.rank(3) == 0
+    assert board.rank(1) == 8
+    assert board.rank(10) is None
+    assert board.top(2) == [
+        {"number": 3, "score": 130, "rank": 0},
+        {"number": 9, "score": 90, "rank": 1},
+    ]
+    assert len(board.buckets) > 1
+
+
+@pytest.mark.asyncio
+async def test_players_only_get_their_own_rank_when_it_changed():
+    manager, session, host, sockets = await make_session(3, [QUESTIONS[1]] * 2)
+
+    def ranks(ws: FakeWebSocket) -> list[dict]:
+        return [
+            orjson.loads(frame)["payload"]
+            for frame in ws.received
+            if orjson.loads(frame)["action"] == "RANK"
+        ]
+
+    await session.start_question()
+    await session.record_vote(4, 0)
+    await session.record_vote(2, 1)
+    await session.record_vote(3, 1)
+    await asyncio.sleep(0.01)
+
+    assert ranks(sockets[2])[0]["rank"] == 0
+    assert ranks(sockets[2])[0]["score"] > 0
+    assert ranks(sockets[0])[0]["rank"] == 1
+
+    # Nobody votes the second time, so no standing changes
+    await session.start_question()
+    await session.stop_question()
+    await asyncio.sleep(0.01)
+
+    assert [len(ranks(ws)) for ws in sockets] == [1, 1, 1]
+    assert actions(host).count("LEADERBOARD") == 2
+    assert "RANK" not in actions(host)
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_only_host_gets_correct_answers_at_question_start():
+    manager, session, host, sockets = await make_session(players=2)
+
+    await session.start_question()
+    await asyncio.sleep(0.01)
+
+    host_payload = orjson.loads(host.received[0])["payload"]
+    player_payload = orjson.loads(sockets[0].received[0])["payload"]
+
+    assert host_payload["correct"] == [0]
+    assert "correct" not in player_payload
+    assert sockets[0].received[0] is sockets[1].received[0]
+    await manager.pool_disconnect("pool")
+
+
+def test_quiz_snapshot_packs_correct_answers():
+    quiz = Quiz(
+        id=1,
+        name="Greg quiz",
+        questions=[
+            Question(
+                name="Greg question",
+                description="Which greg?",
+                time_limit=10.0,
+                answers=[
+                    Answer(description="Greg", is_correct=True),
+                    Answer(description="Not greg", is_correct=False),
+                    Answer(description="Also greg", is_correct=True),
+                ],
+            )
+        ],
+    )
+
+    snapshot = QuizSnapshot.from_model(quiz)
+    question = snapshot.questions[0]
+
+    assert question.answers == ("Greg", "Not greg", "Also greg")
+    assert question.correct_mask == 0b101
+    assert question.correct == [0, 2]
+    assert question.is_correct(2) and not question.is_correct(1)
+
+    with pytest.raises(AttributeError):
+        question.name = "Changed"
+
+
+@pytest.mark.asyncio
+async def test_only_the_quiz_owner_can_host(monkeypatch):
+    async def load_quiz(quiz_id: int) -> QuizSnapshot:
+        return QuizSnapshot(quiz_id, "Greg quiz", QUESTIONS, created_by=1)
+
+    monkeypatch.setattr(session_module, "load_quiz", load_quiz)
+    manager = WebSocketConnectionManager()
+
+    anonymous, other, owner = [
+        await manager.connect(FakeWebSocket(), "pool", claims=claims)
+        for claims in (None, {"user_id": encode(2)}, {"user_id": encode(1)})
+    ]
+
+    for host in (anonymous, other):
+        with pytest.raises(NotSessionHostException):
+            await QuizSession.create("pool", 1, host, manager)
+
+    session = await QuizSession.create("pool", 1, owner, manager)
+    assert session.is_host(owner)
+
+
+@pytest.mark.asyncio
+async def test_disconnect_with_a_full_mailbox_does_not_fail(monkeypatch):
+    manager, session, host, sockets = await make_session(players=2)
+    service = QuizWebsocketService()
+    monkeypatch.setattr(service, "manager", manager)
+    monkeypatch.setitem(quiz_sessions, "pool", session)
+    manager.executor.max_mailbox_size = 0
+
+    await service.handle_disconnect(sockets[0], "pool")
+
+    assert manager.executor.get_mailbox_depth("pool") == 0
+    session.close()
@@ -0,0 +1,113 @@
+import asyncio
+
+import orjson
+import pytest
+
+from core.db.enums import WebsocketActionEnum
+from core.helpers.websocket.base import BaseWebsocketService
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.rate_limit import RateLimit, RateLimiter, TokenBucket
+from tests.websocket.test_manager import FakeWebSocket
+
+
+def test_token_bucket_refills_over_time(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+
+    bucket = TokenBucket(RateLimit(rate=2, burst=3))
+    assert [bucket.take() for _ in range(4)] == [True, True, True, False]
+
+    now[0] += 0.5
+    assert [bucket.take() for _ in range(2)] == [True, False]
+
+
+def test_limiter_answers_once_per_rejection_streak():
+    limiter = RateLimiter({"POOL_MESSAGE": RateLimit(rate=0, burst=1)})
+
+    assert limiter.allow("POOL_MESSAGE")
+    assert limiter.allow("SUBMIT_VOTE")
+    assert not limiter.allow("POOL_MESSAGE")
+    assert limiter.should_answer()
+    assert not limiter.allow("POOL_MESSAGE")
+    assert not limiter.should_answer()
+
+    assert limiter.allow("SUBMIT_VOTE")
+    assert not limiter.allow("POOL_MESSAGE")
+    assert limiter.should_answer()
+    assert limiter.rejected == 3
+
+
+@pytest.mark.asyncio
+async def test_pool_message_flood_is_dropped():
+    manager = WebSocketConnectionManager()
+    service = BaseWebsocketService(
+        manager,
+        rate_limits={"POOL_MESSAGE": RateLimit(rate=0, burst=2)},
+    )
+    listener = FakeWebSocket()
+    flooder = FakeWebSocket()
+    await manager.connect(listener, "pool")
+
+    frame = orjson.dumps(
+        {
+            "action": "POOL_MESSAGE",
+            "message": "",
+            "payload": {"message": "spam"},
+        }
+    ).decode()
+
+    for _ in range(50):
+        flooder.incoming.put_nowait({"type": "websocket.receive", "text": frame})
+    flooder.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+    await service.handler(flooder, "pool")
+    await manager.executor.shutdown()
+    await asyncio.sleep(0.01)
+
+    messages = [orjson.loads(frame) for frame in listener.received]
+    assert [m["action"] for m in messages] == [WebsocketActionEnum.POOL_MESSAGE] * 2
+
+    status_codes = [
+        orjson.loads(frame)["status_code"]
+        for frame in flooder.received
+        if orjson.loads(frame)["action"] == WebsocketActionEnum.STATUS_CODE
+    ]
+    assert status_codes == [202, 429]
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_action_limit_applies_before_payload_validation(monkeypatch):
+    manager = WebSocketConnectionManager()
+    service = BaseWebsocketService(
+        manager,
+        rate_limits={"POOL_MESSAGE": RateLimit(rate=0, burst=2)},
+    )
+    validated = []
+    validate = service.parser.validate
+
+    def counting_validate(action, data):
+        validated.append(action)
+        return validate(action, data)
+
+    monkeypatch.setattr(service.parser, "validate", counting_validate)
+    flooder = FakeWebSocket()
+
+    frame = orjson.dumps(
+        {"action": "POOL_MESSAGE", "message": "", "payload": {"message": 5}}
+    ).decode()
+
+    for _ in range(4):
+        flooder.incoming.put_nowait({"type": "websocket.receive", "text": frame})
+    flooder.incoming.put_nowait({"type": "websocket.disconnect", "code": 1000})
+
+    await service.handler(flooder, "pool")
+    await manager.executor.shutdown()
+
+    status_codes = [
+        orjson.loads(frame)["status_code"]
+        for frame in flooder.received
+        if orjson.loads(frame)["action"] == WebsocketActionEnum.STATUS_CODE
+    ]
+    assert status_codes == [202, 400, 400, 429]
+    assert validated == ["POOL_MESSAGE", "POOL_MESSAGE"]
@@ -0,0 +1,184 @@
+import asyncio
+
+import orjson
+import pytest
+
+from core.config import config
+from core.helpers.websocket.base import BaseWebsocketService
+from core.helpers.websocket.manager import WebSocketConnectionManager
+from core.helpers.websocket.resume import ReplayBuffer, ResumeTokens
+from core.helpers.websocket import websocket as websocket_module
+from core.helpers.websocket.websocket import WS_4010_RESUMED_ELSEWHERE
+from tests.websocket.test_manager import FakeWebSocket, make_packet
+
+
+def packets(ws: FakeWebSocket) -> list[dict]:
+    return [orjson.loads(frame) for frame in ws.received]
+
+
+def test_replay_buffer_only_replays_what_it_still_holds():
+    buffer = ReplayBuffer(size=2)
+
+    frames = [buffer.record('{"action":"POOL_MESSAGE"}') for _ in range(3)]
+
+    assert orjson.loads(frames[2]) == {"seq": 3, "action": "POOL_MESSAGE"}
+    assert buffer.since(3) == []
+    assert buffer.since(2) == [(None, frames[2])]
+    assert buffer.since(1) == [(None, frames[1]), (None, frames[2])]
+    assert buffer.since(0) is None
+    assert buffer.since(4) is None
+
+
+def test_resume_token_is_single_use_and_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    tokens = ResumeTokens(ttl=10)
+
+    token = tokens.issue("pool", 3, connection_id=1)
+    tokens.release(1)
+    assert tokens.redeem(token, "other pool") is None
+    assert tokens.redeem(token, "pool") == ("pool", 3, 1, False)
+    assert tokens.redeem(token, "pool") is None
+
+    # Still connected, the connection redeeming it takes its place
+    connected = tokens.issue("pool", 5, connection_id=3)
+    assert tokens.redeem(connected, "pool") == ("pool", 5, 3, True)
+    assert tokens.redeem(connected, "pool") is None
+    assert 3 not in tokens.tokens
+
+    expired = tokens.issue("pool", 4, connection_id=2)
+    tokens.release(2)
+    now[0] += 11
+    assert tokens.redeem(expired, "pool") is None
+    assert tokens.entries == {}
+
+
+async def run_client(service: BaseWebsocketService, ws: FakeWebSocket) -> asyncio.Task:
+    task = asyncio.ensure_future(service.handler(ws, "pool"))
+    await asyncio.sleep(0.01)
+    return task
+
+
+async def leave(ws: FakeWebSocket, task: asyncio.Task) -> None:
+    ws.incoming.put_nowait({"type": "websocket.disconnect", "code": 1001})
+    await task
+
+
+@pytest.mark.asyncio
+async def test_reconnect_resumes_number_and_gets_missed_packets():
+    manager = WebSocketConnectionManager()
+    service = BaseWebsocketService(manager)
+    listener = FakeWebSocket()
+    await manager.connect(listener, "pool")
+
+    first = FakeWebSocket()
+    task = await run_client(service, first)
+    resume = packets(first)[1]["payload"]
+    assert resume["number"] == 2
+
+    await manager.pool_packet("pool", make_packet(message="seen"))
+    await asyncio.sleep(0.01)
+    await leave(first, task)
+
+    await manager.pool_packet("pool", make_packet(message="missed"))
+
+    second = FakeWebSocket(
+        query_params={"resume_token": resume["token"], "last_seq": "1"},
+    )
+    task = await run_client(service, second)
+
+    received = packets(second)
+    assert [packet["action"] for packet in received] == [
+        "STATUS_CODE",
+        "RESUME",
+        "POOL_MESSAGE",
+    ]
+    assert received[1]["payload"]["number"] == 2
+    assert received[2]["message"] == "missed"
+    assert received[2]["seq"] == 2
+
+    await leave(second, task)
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_reconnect_too_far_behind_gets_snapshot():
+    manager = WebSocketConnectionManager()
+    service = BaseWebsocketService(manager)
+    listener = FakeWebSocket()
+    await manager.connect(listener, "pool")
+
+    first = FakeWebSocket()
+    task = await run_client(service, first)
+    token = packets(first)[1]["payload"]["token"]
+    await leave(first, task)
+
+    for _ in range(config.WEBSOCKET_REPLAY_SIZE + 1):
+        await manager.pool_packet("pool", make_packet())
+
+    second = FakeWebSocket(query_params={"resume_token": token, "last_seq": "0"})
+    task = await run_client(service, second)
+
+    snapshot = packets(second)[-1]
+    assert snapshot["action"] == "SNAPSHOT"
+    assert snapshot["payload"] == {"seq": config.WEBSOCKET_REPLAY_SIZE + 1}
+
+    await leave(second, task)
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_resume_takes_over_a_connection_that_is_still_there():
+    manager = WebSocketConnectionManager()
+    service = BaseWebsocketService(manager)
+    listener = FakeWebSocket()
+    await manager.connect(listener, "pool")
+
+    first = FakeWebSocket()
+    first_task = await run_client(service, first)
+    resume = packets(first)[1]["payload"]
+
+    second = FakeWebSocket(
+        query_params={"resume_token": resume["token"], "last_seq": str(resume["seq"])},
+    )
+    second_task = await run_client(service, second)
+
+    assert packets(second)[1]["payload"]["number"] == resume["number"]
+    assert first.close_code == WS_4010_RESUMED_ELSEWHERE
+    assert manager.get_connection_count("pool") == 2
+
+    await leave(first, first_task)
+    assert manager.get_connection_count("pool") == 2
+
+    await leave(second, second_task)
+    await manager.pool_disconnect("pool")
+
+
+@pytest.mark.asyncio
+async def test_resume_of_a_gone_connection_never_evicts_another(monkeypatch):
+    manager = WebSocketConnectionManager()
+    service = BaseWebsocketService(manager)
+    listener = FakeWebSocket()
+    await manager.connect(listener, "pool")
+
+    # The player that joins after the first client left gets the same id, as id()
+    # of a garbage collected socket could
+    monkeypatch.setattr(websocket_module, "connection_ids", iter([7, 7, 8]))
+
+    first = FakeWebSocket()
+    task = await run_client(service, first)
+    token = packets(first)[1]["payload"]["token"]
+    await leave(first, task)
+
+    player = FakeWebSocket()
+    player_task = await run_client(service, player)
+
+    second = FakeWebSocket(query_params={"resume_token": token, "last_seq": "0"})
+    second_task = await run_client(service, second)
+
+    assert player.close_code is None
+    assert manager.get_connection_count("pool") == 3
+
+    await leave(player, player_task)
+    await leave(second, second_task)
+    await manager.pool_disconnect("pool")